@@ -22,6 +22,8 @@ import time
 from datetime import datetime
 from datetime import date
 
+import LoadGeonames
+
 ## ======================================================
 ## Read in parameters
 ## ======================================================
@@ -90,7 +92,11 @@ try:
     
     arcpy.AddMessage("Feature Count Check: Make sure input feature class does not have any features...")
     
-    if numCount > 0:
+    # the features of an unfinished load are kept, the load resumes after them
+    if numCount > 0 and LoadGeonames.HasCheckpoint(featClass):
+        arcpy.AddMessage("Input feature class has " + str(numCount) + " features of an unfinished load, " \
+                         "the load resumes after them.")
+    elif numCount > 0:
         arcpy.AddError("Error: Input feature class has " + str(numCount) + " features.")
         hasError = hasError + 1
 
@@ -0,0 +1,551 @@
+#------------------------------------------------------------------------------
+# Copyright 2015 Esri
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#------------------------------------------------------------------------------
+# Parsing of NGA GNS geonames text files for the Geonames tools.
+#
+# A LoadPlan is built once from the header of the file and the fields of the
+# target feature class: which field each column goes to, how its text is
+# converted, and where the fields derived from the code tables (country,
+# first-order administrative division and feature designation names) go.
+# Each line is then turned into a tuple of values, in the order of the plan
+# fields, for an arcpy.da.InsertCursor.
+#
+# A GeonameFile memory maps the file and splits it into chunks of whole
+# lines, with the byte offsets of each chunk, so a load can report its
+# progress in bytes and restart from the end of the last chunk it loaded.
+#
+# The code tables are derived once into CodeTables records (admin division
+# names and classes already split), which can be cached in a local JSON file
+# and reused until the tables change.
+#
+# Does not use arcpy, so chunks can also be parsed in worker processes: each
+# worker parses whole chunks with the plan it was started with (see
+# InitWorker and ParseChunk).
+#------------------------------------------------------------------------------
+
+import json
+import mmap
+import os
+from datetime import datetime
+
+# Date columns, which get a time suffix (and are parsed for date fields)
+DATE_COLUMNS = ["MODIFY_DATE", "NM_MODIFY_DATE", "F_EFCTV_DT", "F_TERM_DT"]
+DATE_SUFFIX = " 00:00:00 AM"
+DATE_FORMATS = ["%Y-%m-%d", "%m/%d/%Y", "%Y%m%d"]
+
+# Columns that are only used for the geometry
+COORDINATE_COLUMNS = ["LAT", "LONG"]
+
+# Fields populated from the code tables and other columns
+DERIVED_FIELDS = ["COUNTRYCODE1", "COUNTRYNAME1", "ADM1CODE", "ADM1NAMEALL", "ADM1NAME",
+                  "ADM1CLASSALL", "ADM1CLASS", "USER_FLD", "DSGNAME", "PLACENAME"]
+
+SHAPE_FIELD = "SHAPE@XY"
+
+
+def ReadHeader(line):
+    ''' Upper case column names of the header line of a geonames file '''
+    return [field.rstrip('\n').upper() for field in line.split("\t")]
+
+
+def AdminName(adm1NameAll):
+    '''
+    First name of a primary admin division, i.e. for BE11
+    "Brussels-Capital Region [conventional] / Brussels Hoofdstedelijk [Dutch] /
+    Bruxelles-Capitale [French]" is "Brussels-Capital Region"
+    (the first value minus "/", "[", "]" and the contents of the brackets)
+    '''
+    return adm1NameAll.split("/")[0].split("[")[0].strip()
+
+
+def AdminClass(adm1ClassAll):
+    '''
+    'Assembled' class of a primary admin division: the first class name,
+    followed by any type in brackets, i.e. "Province / Provincia (first-order)"
+    is "Province (first-order)"
+    '''
+    i = adm1ClassAll.find("(")
+    if i > -1:
+        # characters before "(", and from "(" on
+        adm1Class = adm1ClassAll[:i].strip()
+        adm1Type = adm1ClassAll[i:].strip()
+    else:
+        adm1Class = adm1ClassAll
+        adm1Type = ''
+    adm1Class = adm1Class.split("/")[0].split("[")[0].strip()
+    # strip the trailing space left when there is no type
+    return (adm1Class + " " + adm1Type).strip()
+
+
+def AdminRecord(adm1NameAll, adm1ClassAll):
+    '''
+    (name all, name, class all, class, user field) record of a primary admin
+    division, None if it has no name. The class values and the user field are
+    None if it has no class
+    '''
+    if adm1NameAll is None:
+        return None
+    adm1Name = AdminName(adm1NameAll)
+    if adm1ClassAll is None:
+        return (adm1NameAll, adm1Name, None, None, None)
+    adm1Class = AdminClass(adm1ClassAll)
+    return (adm1NameAll, adm1Name, adm1ClassAll, adm1Class,
+            "Primary Admin Division: " + adm1Name + " [" + adm1Class + "]")
+
+
+# Bump when the derived code table records change, so cached ones are not used
+CODE_TABLES_VERSION = 2
+
+
+class CodeTables(object):
+    '''
+    Lookups of the code tables: countries is country code to country name,
+    admin1 admin code (country code + ADM1) to AdminRecord, and features
+    feature code to feature name
+    '''
+
+    def __init__(self, countries, admin1, features):
+        self.countries = countries
+        self.admin1 = admin1
+        self.features = features
+
+
+def DeriveCodeTables(countryCodes, admin1Codes, featureCodes):
+    '''
+    CodeTables of the dictionaries of the code tables: country code to name,
+    admin code to (name, class) and feature code to name
+    '''
+    admin1 = {}
+    for code, (adm1NameAll, adm1ClassAll) in admin1Codes.items():
+        record = AdminRecord(adm1NameAll, adm1ClassAll)
+        if record is not None:
+            admin1[code] = record
+    return CodeTables(dict(countryCodes), admin1, dict(featureCodes))
+
+
+def ReadCodeTablesCache(path, state):
+    '''
+    CodeTables cached at path, None if there isn't a cache file (or it can't
+    be read), or it is of another version or state of the source tables
+    '''
+    try:
+        with open(path, "r") as cacheFile:
+            cache = json.load(cacheFile)
+        if not isinstance(cache, dict) or cache["version"] != CODE_TABLES_VERSION or cache["state"] != state:
+            return None
+        admin1 = dict((code, tuple(record)) for code, record in cache["admin1"].items())
+        return CodeTables(cache["countries"], admin1, cache["features"])
+    except (IOError, OSError, ValueError, KeyError):
+        return None
+
+
+def WriteCodeTablesCache(path, state, codeTables):
+    ''' Caches the CodeTables at path, for the state of the source tables '''
+    temporary = "{0}.{1}.tmp".format(path, os.getpid())
+    with open(temporary, "w") as cacheFile:
+        json.dump({"version": CODE_TABLES_VERSION, "state": state,
+                   "countries": codeTables.countries,
+                   "admin1": dict((code, list(record)) for code, record in codeTables.admin1.items()),
+                   "features": codeTables.features}, cacheFile)
+    # another load may have written the same tables, which is as good
+    if os.path.exists(path):
+        os.remove(path)
+    os.rename(temporary, path)
+
+
+def _text(value):
+    return value
+
+
+def _integer(value):
+    try:
+        return int(value)
+    except ValueError:
+        number = float(value)
+        if number != int(number):
+            raise
+        return int(number)
+
+
+def _date(value):
+    # only the date part of suffixed dates
+    text = value.split(" ")[0]
+    for dateFormat in DATE_FORMATS:
+        try:
+            return datetime.strptime(text, dateFormat)
+        except ValueError:
+            pass
+    raise ValueError("Unknown date format: " + value)
+
+
+# Converters for the arcpy field types, any other type is written as text
+CONVERTERS = {"String": _text,
+              "Integer": _integer,
+              "SmallInteger": _integer,
+              "Double": float,
+              "Single": float,
+              "Date": _date}
+
+# Field types that can't be loaded from a column
+SKIPPED_TYPES = ["OID", "Geometry", "Raster", "Blob"]
+
+
+class LoadPlan(object):
+    '''
+    How the columns of a geonames file are loaded into a feature class.
+    fileFields are the (upper case) columns of the file header, targetFields
+    the (name, type) of the feature class fields, and codeTables the
+    CodeTables lookups.
+    fields are the cursor fields, in the order of the values of Row.
+    '''
+
+    def __init__(self, fileFields, targetFields, codeTables):
+        self.fileFields = list(fileFields)
+        self.codeTables = codeTables
+
+        targetTypes = dict((name.upper(), fieldType) for name, fieldType in targetFields
+                           if fieldType not in SKIPPED_TYPES)
+        targetNames = dict((name.upper(), name) for name, fieldType in targetFields)
+
+        self.fields = []
+        outputIndex = {}
+        for name in self.fileFields:
+            if name in COORDINATE_COLUMNS or name not in targetTypes or name in outputIndex:
+                continue
+            outputIndex[name] = len(self.fields)
+            self.fields.append(targetNames[name])
+        for name in DERIVED_FIELDS:
+            if name in targetTypes and name not in outputIndex:
+                outputIndex[name] = len(self.fields)
+                self.fields.append(targetNames[name])
+
+        # (column index, output index, column name, is a date column, converter)
+        # of the loaded columns
+        self.columns = []
+        for index, name in enumerate(self.fileFields):
+            if name not in outputIndex or name in COORDINATE_COLUMNS:
+                continue
+            self.columns.append((index, outputIndex[name], name, name in DATE_COLUMNS,
+                                 CONVERTERS.get(targetTypes[name], _text)))
+
+        # output index of each derived field, None if the feature class doesn't have it
+        self.derived = dict((name, outputIndex.get(name)) for name in DERIVED_FIELDS)
+
+        # column index of the columns used by the derived fields and the geometry
+        self.columnIndex = dict((name, self.fileFields.index(name) if name in self.fileFields else None)
+                                for name in ["CC1", "ADM1", "DSG", "FULL_NAME_ND_RO", "LAT", "LONG"])
+
+        self.extraFields = sorted(set(self.fileFields) - set(targetNames))
+
+        self.fields.append(SHAPE_FIELD)
+
+    def _column(self, values, name):
+        index = self.columnIndex[name]
+        if index is None or index >= len(values):
+            return ''
+        return values[index].rstrip('\n')
+
+    def _set(self, row, name, value):
+        index = self.derived[name]
+        if index is not None:
+            row[index] = value
+
+    def Row(self, line, lineNumber=None, warnings=None):
+        '''
+        Cursor values of a line of the geonames file. Values that can't be
+        converted to their field type are left null, with a warning (appended
+        to warnings, if given).
+        '''
+        values = line.split("\t")
+        row = [None] * len(self.fields)
+
+        for index, output, name, isDate, converter in self.columns:
+            if index >= len(values):
+                continue
+            value = values[index].rstrip('\n')
+            if value == '':
+                continue
+            if isDate:
+                value = value + DATE_SUFFIX
+            try:
+                row[output] = converter(value)
+            except (ValueError, TypeError):
+                if warnings is not None:
+                    warnings.append("Warning: exception setting field: " \
+                                    + name + " to value " + value + \
+                                    " (Input geoname file row number: " \
+                                    + str(lineNumber) + ")")
+
+        # Country code and name, from the first of the CC1 codes
+        countryCode1 = self._column(values, "CC1").split(",")[0]
+        if countryCode1 != '':
+            self._set(row, "COUNTRYCODE1", countryCode1)
+            self._set(row, "COUNTRYNAME1", self.codeTables.countries.get(countryCode1))
+
+        # Primary admin division code, names and class
+        adm1 = self._column(values, "ADM1")
+        if countryCode1 != '' and adm1 != '':
+            adm1Code = countryCode1 + adm1
+            self._set(row, "ADM1CODE", adm1Code)
+            admin1 = self.codeTables.admin1.get(adm1Code)
+            if admin1 is not None:
+                adm1NameAll, adm1Name, adm1ClassAll, adm1Class, userField = admin1
+                self._set(row, "ADM1NAMEALL", adm1NameAll)
+                self._set(row, "ADM1NAME", adm1Name)
+                if adm1ClassAll is not None:
+                    self._set(row, "ADM1CLASSALL", adm1ClassAll)
+                    self._set(row, "ADM1CLASS", adm1Class)
+                    self._set(row, "USER_FLD", userField)
+
+        # Feature designation name
+        featDSGCode = self._column(values, "DSG")
+        if featDSGCode != '':
+            self._set(row, "DSGNAME", self.codeTables.features.get(featDSGCode))
+
+        # Place name is the reading order non-diacritic name
+        self._set(row, "PLACENAME", self._column(values, "FULL_NAME_ND_RO"))
+
+        lat = self._column(values, "LAT")
+        long_ = self._column(values, "LONG")
+        row[-1] = (float(long_), float(lat)) if lat != '' and long_ != '' else None
+        return tuple(row)
+
+    def Key(self, line):
+        '''
+        (UFI, UNI) of a line of the geonames file, converted as Row does, for
+        lines that Row can't parse. None if they can't be read either
+        '''
+        values = line.split("\t")
+        columns = dict((name, (index, converter)) for index, output, name, isDate, converter in self.columns)
+        key = []
+        for name in KEY_FIELDS:
+            if name not in columns or columns[name][0] >= len(values):
+                return None
+            index, converter = columns[name]
+            value = values[index].rstrip('\n')
+            if value == '':
+                return None
+            try:
+                key.append(converter(value))
+            except (ValueError, TypeError):
+                return None
+        return tuple(key)
+
+
+def ParseLines(plan, lines, firstLineNumber):
+    '''
+    (line number, values, warnings, key) of each line, parsed with the load
+    plan. values is None for lines that can't be parsed (i.e. without a valid
+    location), and key their (UFI, UNI) (see LoadPlan.Key), None for the
+    lines that are parsed
+    '''
+    lineNumber = firstLineNumber
+    for line in lines:
+        warnings = []
+        key = None
+        try:
+            values = plan.Row(line, lineNumber, warnings)
+        except (ValueError, TypeError, IndexError):
+            values = None
+            key = plan.Key(line)
+        yield lineNumber, values, warnings, key
+        lineNumber = lineNumber + 1
+
+
+def DecodeLines(data):
+    ''' Text lines (with their newline) of a chunk of the bytes of a geonames file '''
+    text = data.decode("utf-8")
+    if "\r" in text:
+        text = text.replace("\r\n", "\n")
+    lines = text.split("\n")
+    if lines[-1] == '':
+        lines.pop()
+    return [line + "\n" for line in lines]
+
+
+def ParseData(plan, data, firstLineNumber):
+    ''' Parsed (line number, values, warnings, key) of the lines of a chunk of bytes '''
+    return list(ParseLines(plan, DecodeLines(data), firstLineNumber))
+
+
+class GeonameFile(object):
+    '''
+    Memory mapped geonames file. header is the list of (upper case) columns
+    of the first line, dataOffset the byte offset of the second line.
+    '''
+
+    def __init__(self, path):
+        self.path = path
+        self._file = open(path, "rb")
+        self._map = None
+        self.size = os.fstat(self._file.fileno()).st_size
+        # an empty file can't be mapped
+        if self.size > 0:
+            self._map = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        self.dataOffset = self._lineEnd(0)
+        self.header = ReadHeader(self._map[0:self.dataOffset].decode("utf-8").rstrip("\r\n") if self.dataOffset else '')
+
+    def _lineEnd(self, offset):
+        ''' Offset just past the end of the line that offset is in (or the file size) '''
+        if offset >= self.size:
+            return self.size
+        end = self._map.find(b"\n", offset)
+        return self.size if end == -1 else end + 1
+
+    def Chunks(self, offset, firstLineNumber, chunkBytes):
+        '''
+        (offset, end offset, first line number, bytes) chunks of whole lines of
+        about chunkBytes, from offset (the start of a line) to the end of the file
+        '''
+        while offset < self.size:
+            end = self._lineEnd(min(offset + chunkBytes, self.size) - 1)
+            data = self._map[offset:end]
+            yield offset, end, firstLineNumber, data
+            firstLineNumber = firstLineNumber + data.count(b"\n")
+            offset = end
+
+    def close(self):
+        if self._map is not None:
+            self._map.close()
+            self._map = None
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+# Fields identifying a name of a feature, and the dates its feature and name were last changed
+KEY_FIELDS = ["UFI", "UNI"]
+MODIFY_DATE_FIELDS = ["MODIFY_DATE", "NM_MODIFY_DATE"]
+
+# Comparison of a geonames file row with the feature class
+INSERT = "INSERT"
+UPDATE = "UPDATE"
+UNCHANGED = "UNCHANGED"
+
+
+class Delta(object):
+    '''
+    Changes that bring a feature class up to date with a geonames file.
+    existing are the rows of the IndexFields of the feature class: (object id,
+    UFI, UNI, MODIFY_DATE, NM_MODIFY_DATE) and, if the feature class has it,
+    COUNTRYCODE1. Rows of the file are compared by their UFI and UNI: new
+    names are inserted, and names with a different MODIFY_DATE or
+    NM_MODIFY_DATE updated. A name repeated in the file is only inserted or
+    updated the first time, and a name loaded more than once into the feature
+    class only has its first copy updated, the other copies are deleted.
+    Names that are not in the file are deleted, but only in the countries the
+    file has names for, so a file of one country only changes that country
+    (names not in the file are deleted from all countries if the feature
+    class has no COUNTRYCODE1 field). Names of lines that can't be parsed are
+    kept as they are (see Keep).
+    '''
+
+    def __init__(self, plan, existing):
+        upperFields = [field.upper() for field in plan.fields]
+        for name in KEY_FIELDS + MODIFY_DATE_FIELDS:
+            if name not in upperFields:
+                raise ValueError("Geonames file or feature class is missing field: " + name)
+        self.keyIndex = [upperFields.index(name) for name in KEY_FIELDS]
+        self.dateIndex = [upperFields.index(name) for name in MODIFY_DATE_FIELDS]
+        self.countryIndex = plan.derived["COUNTRYCODE1"]
+        self.hasCountry = self.countryIndex is not None
+
+        # (UFI, UNI) to the (object id, modify dates, country code) of each
+        # copy of the names of the feature class not found in the file yet
+        self.index = {}
+        for row in existing:
+            countryCode = row[5] if self.hasCountry else None
+            self.index.setdefault((row[1], row[2]), []).append((row[0], (row[3], row[4]), countryCode))
+        # (UFI, UNI) of the names found in the file to their object id (None if inserted)
+        self.seen = {}
+        self.countries = set()
+        # object ids of the extra copies of the names found in the file
+        self.duplicates = []
+        # True if a line of the file couldn't be parsed, nor its UFI and UNI read
+        self.unreadKeys = False
+
+    @staticmethod
+    def IndexFields(plan):
+        ''' Cursor fields of the existing rows of the feature class of the plan '''
+        fields = ["OID@"] + KEY_FIELDS + MODIFY_DATE_FIELDS
+        if plan.derived["COUNTRYCODE1"] is not None:
+            fields.append("COUNTRYCODE1")
+        return fields
+
+    def Compare(self, values):
+        '''
+        (INSERT, None), (UPDATE, object id) or (UNCHANGED, object id or None)
+        for the cursor values of a row of the file
+        '''
+        if self.hasCountry:
+            self.countries.add(values[self.countryIndex])
+        key = tuple(values[index] for index in self.keyIndex)
+        if key in self.seen:
+            # a name repeated in the file
+            return UNCHANGED, self.seen[key]
+        copies = self.index.pop(key, None)
+        if copies is None:
+            self.seen[key] = None
+            return INSERT, None
+        oid, dates, countryCode = copies[0]
+        self.duplicates.extend(copy[0] for copy in copies[1:])
+        self.seen[key] = oid
+        if tuple(values[index] for index in self.dateIndex) != dates:
+            return UPDATE, oid
+        return UNCHANGED, oid
+
+    def Keep(self, key):
+        '''
+        Keeps the name of a line of the file that can't be parsed, with its
+        (UFI, UNI) key: it is neither updated nor deleted. If key is None (the
+        line has no readable UFI and UNI), no names not in the file are deleted
+        '''
+        if key is None:
+            self.unreadKeys = True
+        elif key not in self.seen and key in self.index:
+            self.seen[key] = self.index.pop(key)[0][0]
+
+    def Deletes(self):
+        '''
+        Object ids of the names that were not in the file, in the countries of
+        the file (none if a line had no readable key), and of the extra copies
+        of the names that were
+        '''
+        oids = list(self.duplicates)
+        if not self.unreadKeys:
+            for copies in self.index.values():
+                for oid, dates, countryCode in copies:
+                    if not self.hasCountry or countryCode in self.countries:
+                        oids.append(oid)
+        return sorted(oids)
+
+
+# Load plan of a worker process, set once when the worker starts
+_workerPlan = None
+
+
+def InitWorker(plan):
+    ''' Pool initializer, keeps the load plan for the ParseChunk calls of the worker '''
+    global _workerPlan
+    _workerPlan = plan
+
+
+def ParseChunk(chunk):
+    ''' Parsed (line number, values, warnings, key) of a (first line number, bytes) chunk '''
+    firstLineNumber, data = chunk
+    return ParseData(_workerPlan, data, firstLineNumber)
@@ -0,0 +1,52 @@
+#------------------------------------------------------------------------------
+# Copyright 2015 Esri
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#------------------------------------------------------------------------------
+# Process pool helpers of the Geonames tools.
+#
+# These mirror ProcessCount and SetPoolExecutable of
+# griddedreferencegraphic/scripts/Utilities.py: each toolbox folder is
+# installed on its own, so the Geonames scripts can't import that module.
+# Keep the two in step.
+#
+# Does not use arcpy.
+#------------------------------------------------------------------------------
+
+import os
+import sys
+import multiprocessing
+
+def ProcessCount(factor):
+    '''
+    Returns the number of worker processes for a Parallel Processing Factor
+    environment value (i.e. "4" or "50%"), 1 (no workers) if it isn't set
+    '''
+    if not factor:
+        return 1
+    factor = str(factor).strip()
+    try:
+        if factor.endswith('%'):
+            count = int(multiprocessing.cpu_count() * float(factor[:-1]) / 100.0)
+        else:
+            count = int(float(factor))
+    except ValueError:
+        return 1
+    return max(1, count)
+
+def SetPoolExecutable():
+    '''
+    Geoprocessing tools run inside the application (i.e. ArcGISPro.exe or ArcMap.exe),
+    the worker processes have to be started with the python install of the application
+    '''
+    if not os.path.basename(sys.executable).lower().startswith('python'):
+        multiprocessing.set_executable(os.path.join(sys.exec_prefix, 'pythonw.exe'))
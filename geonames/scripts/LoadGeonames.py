@@ -13,350 +13,341 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 #------------------------------------------------------------------------------
+# Loads a geonames file into an empty feature class, run by the Load Geonames
+# File model after Check Input.
+#
+# The file is committed in chunks. If a load fails or is canceled, run Load
+# Geonames File again with the same feature class and the same, unchanged
+# file: Check Input accepts the features already loaded, and the load resumes
+# after the last committed chunk. The features of a load that can't be resumed
+# (e.g. the file was changed) have to be deleted before loading again.
+#------------------------------------------------------------------------------
 # Import ArcPy site-package and os modules
 #
 import arcpy 
+import glob
 import os
 import sys, traceback
-import time
-from datetime import datetime
-from datetime import date
-from decimal import *
+import collections
+import hashlib
+import json
+import multiprocessing
 
-lineCount = 0
+import GeonamesParser
+import GeonamesUtilities
 
-## ======================================================
-## Read in parameters
-## ======================================================
-featClass = arcpy.GetParameterAsText(0)
-geonameFilePath = arcpy.GetParameterAsText(1)
-countryCodeTable = arcpy.GetParameterAsText(2)
-admin1CodeTable = arcpy.GetParameterAsText(3)
-featureCodeTable = arcpy.GetParameterAsText(4)
-desc = arcpy.Describe(featClass)
-fieldNameList = [field.name.upper() for field in desc.Fields] 
+# Defines how many features have to be inserted before it will
+# report status
+reportNum = 10000
+
+# Size of the chunks of lines the file is read, parsed and committed in
+# (the load can be restarted after the last committed chunk), and chunks
+# read ahead for each worker when the Parallel Processing Factor
+# environment is set
+chunkBytes = 2 * 1024 * 1024
+chunksInFlight = 2
 
 ## ======================================================
-## Read geoname file and insert feature
+## Read the code tables
 ## ======================================================
 
-try:
-    # Defines how many features have to be inserted before it will
-    # report status
-    reportNum = 10000
-    
-    row, rows, pntObj = None, None, None
-
-    rowCC, rowsCC = None, None
-    
-    rowADM1, rowsADM1 = None, None
-    
-    rowFeatCode, rowsFeatCode = None, None
-    
-    pntObj = arcpy.Point()
-    
-    # ======================================================
-    # Create CountryCode/CountryName dictionary
-    # ======================================================
+def ReadCodeTables(countryCodeTable, admin1CodeTable, featureCodeTable):
+    '''
+    Dictionaries of the code tables: country code to country name,
+    primary admin code to (admin name, admin division class) and
+    feature code to feature name
+    '''
     arcpy.AddMessage("- Reading CountryCode table " + countryCodeTable + "...")
+    with arcpy.da.SearchCursor(countryCodeTable, ["Code", "Name"]) as rowsCC:
+        countryCodeDict = dict((rowCC[0], rowCC[1]) for rowCC in rowsCC)
 
-    # Create dictionary
-    countryCodeDict = {}
-    
-    # Create search cursor
-    rowsCC = arcpy.SearchCursor(countryCodeTable)
-
-    # Loop through cursor and extract values into dictionary
-    for rowCC in rowsCC:
-        countryCodeDict[rowCC.Code] = rowCC.Name
-
-    # ======================================================
-    # Create Primary Administrative Code/Administrative Name dictionary and
-    # Primary Administrative Code/Administrative Class dictionary
-    # ======================================================
     arcpy.AddMessage("- Reading Primary Administrative Code table " + admin1CodeTable + "...")
+    with arcpy.da.SearchCursor(admin1CodeTable, ["Code", "Name", "AdminDivisionClass"]) as rowsADM1:
+        admin1CodeDict = dict((rowADM1[0], (rowADM1[1], rowADM1[2])) for rowADM1 in rowsADM1)
 
-    # Create dictionaries
-    admin1CodeDict = {}
-    admin1ClassDict = {}
-    
-    # Create search cursor
-    rowsADM1 = arcpy.SearchCursor(admin1CodeTable)
-
-    # Loop through cursor and extract values into dictionary
-    for rowADM1 in rowsADM1:
-        admin1CodeDict[rowADM1.Code] = rowADM1.Name
-        admin1ClassDict[rowADM1.Code] = rowADM1.AdminDivisionClass
-        
-    # ======================================================
-    # Create Feature Code/Feature Name dictionary
-    # ======================================================
     arcpy.AddMessage("- Reading Feature Code table " + featureCodeTable + "...")
+    with arcpy.da.SearchCursor(featureCodeTable, ["Code", "Name"]) as rowsFeatCode:
+        featCodeDict = dict((rowFeatCode[0], rowFeatCode[1]) for rowFeatCode in rowsFeatCode)
 
-    # Create dictionary
-    featCodeDict = {}
-    
-    # Create search cursor
-    rowsFeatCode = arcpy.SearchCursor(featureCodeTable)
-
-    # Loop through cursor and extract values into dictionary
-    for rowFeatCode in rowsFeatCode:
-        featCodeDict[rowFeatCode.Code] = rowFeatCode.Name
-        
-    # ======================================================
-    # Open geonames text file
-    # ======================================================
-    
-    # Open geoname file
-    arcpy.AddMessage("- Opening geoname file " + geonameFilePath + "...")
-    if sys.version_info[0] > 2:
-        fileGeoname = open(geonameFilePath, "r", encoding="utf8")
+    return countryCodeDict, admin1CodeDict, featCodeDict
+
+## ======================================================
+## Read geoname file and insert features
+## ======================================================
+
+def TableState(table):
+    '''
+    Modification state of a code table: its path, row count, and the size and
+    modification time of its file (or the newest file of its workspace, i.e.
+    of a file geodatabase). None if it isn't stored in local files
+    '''
+    path = arcpy.Describe(table).catalogPath
+    location = path
+    while not os.path.exists(location):
+        parent = os.path.dirname(location)
+        if parent == location or parent == '':
+            return None
+        location = parent
+    if os.path.isfile(location):
+        # a table in a database connection file can change without the file changing
+        if location != path:
+            return None
+        files = [location]
     else:
-        fileGeoname = open(geonameFilePath, "r")
-    
-    # Get list of fields in geoname file
-    for lineGeoname in fileGeoname:
-        lineCount = lineCount + 1
-        fileFieldValueList = lineGeoname.split("\t")
-        fileFieldList = [field.rstrip('\n').upper() for field in fileFieldValueList]
-        break
-    
+        # lock files change on every read, not when the table changes
+        files = [os.path.join(location, name) for name in os.listdir(location)
+                 if not name.lower().endswith(".lock")]
+        files = [name for name in files if os.path.isfile(name)]
+    stats = [os.stat(name) for name in files]
+    count = int(arcpy.GetCount_management(table).getOutput(0))
+    return [path, count, len(stats), sum(stat.st_size for stat in stats),
+            max([stat.st_mtime for stat in stats] or [0])]
+
+def LoadCodeTables(countryCodeTable, admin1CodeTable, featureCodeTable):
+    '''
+    GeonamesParser.CodeTables of the code tables, from the code table cache
+    in the scratch folder when the tables haven't changed since it was written
+    '''
+    tables = [countryCodeTable, admin1CodeTable, featureCodeTable]
+    state = [TableState(table) for table in tables]
+    if None in state:
+        return GeonamesParser.DeriveCodeTables(*ReadCodeTables(*tables))
+
+    signature = hashlib.md5(json.dumps([tableState[0] for tableState in state]).encode('utf-8')).hexdigest()
+    cachePath = os.path.join(arcpy.env.scratchFolder, "GeonamesCodeTables_{0}.json".format(signature))
+    codeTables = GeonamesParser.ReadCodeTablesCache(cachePath, state)
+    if codeTables is not None:
+        arcpy.AddMessage("- Using cached code tables " + cachePath + "...")
+        return codeTables
+
+    codeTables = GeonamesParser.DeriveCodeTables(*ReadCodeTables(*tables))
+    try:
+        GeonamesParser.WriteCodeTablesCache(cachePath, state, codeTables)
+    except (IOError, OSError):
+        arcpy.AddWarning("Warning: Could not write code table cache " + cachePath)
+    return codeTables
+
+def MakeLoadPlan(featClass, fileFieldList, countryCodeTable, admin1CodeTable, featureCodeTable):
+    '''
+    Builds the load plan (see GeonamesParser.LoadPlan) of a geonames file
+    with the given header fields into the feature class
+    '''
+    codeTables = LoadCodeTables(countryCodeTable, admin1CodeTable, featureCodeTable)
+    targetFields = [(field.name, field.type) for field in arcpy.ListFields(featClass)]
+    plan = GeonamesParser.LoadPlan(fileFieldList, targetFields, codeTables)
+
     # Find any fields in geonames txt file which do not exist in the feature class
-    fieldsExtra = list(set(fileFieldList) - set(fieldNameList))
-    if len(fieldsExtra) > 0:
+    if len(plan.extraFields) > 0:
         arcpy.AddWarning("Warning: The following fields exist in geonames " \
                          "file, but do not exist in feature class; these " \
-                         "fields will not be populated: " + str(fieldsExtra))
-    
-    # ======================================================
-    # Loop through geonames file and insert features
-    # ======================================================   
-    
-    # Create insert cursor
-    rows = arcpy.InsertCursor(featClass)
-    
-    arcpy.AddMessage("- Creating features (report progress every " + str(reportNum) + " features)...")
-
-    for lineGeoname in fileGeoname:
-        lineCount = lineCount + 1
-
-        # Reset variables
-        lat = ''
-        long_ = ''
-        ufi = ''
-        uni = ''                       
-        adm1 = ''
-        countryCode1 = ''            
-        placeName = ''
-        featDSGCode = ''
-        adm1NameAll = ''
-        adm1Name = ''
-        adm1ClassAll = ''
-        adm1Class = ''
-        mgrs = ''
-        userValue = ''
-        
-        # Geoname file is Tab delimited so split line by Tab
-        fileFieldValueList = lineGeoname.split("\t")
-            
-        # Create new row
-        row = rows.newRow()
-
-        # Populate feature class fields from text file
-        fieldIndex = 0
-        for fieldValue in fileFieldValueList:
-            
-            # Remove any trailing newline character from field name
-            #   and field value
-            fieldName = fileFieldList[fieldIndex].rstrip('\n')
-            fieldValue = fieldValue.rstrip('\n')
-            
-            if fieldValue != '':
-                
-                # Format date value
-                if fieldName.upper() in ["MODIFY_DATE", "NM_MODIFY_DATE", "F_EFCTV_DT", "F_TERM_DT"]:
-                    fieldValue = fieldValue + " 00:00:00 AM"
-                
-                if fieldName.upper() == "CC1":
-                    country1List = fieldValue.split(",")
-                    countryCode1 = country1List[0]
-                    row.setValue("COUNTRYCODE1", countryCode1)
-                    
-                    # Populate country name field
-                    countryName = countryCodeDict.get(countryCode1)
-                    
-                    if countryName is None:
-                        row.setNull("COUNTRYNAME1")
-                    else:
-                        row.setValue("COUNTRYNAME1", countryName)
-                    
-                # Extract Latitude and Longitude values to create
-                # point geometry
-                if fieldName.upper() == "LAT":
-                    lat = float(fieldValue)
-                    
-                if fieldName.upper() == "LONG":
-                    long_ = float(fieldValue)
-                
-                if fieldName.upper() == "UFI":
-                    ufi = fieldValue
-
-                if fieldName.upper() == "UNI":
-                    uni = fieldValue                       
-
-                if fieldName.upper() == "ADM1":
-                    adm1 = fieldValue
-                
-                if fieldName.upper() == "FULL_NAME_ND_RO":
-                    placeName = fieldValue
-                
-                if fieldName.upper() == "DSG":
-                    featDSGCode = fieldValue
-                
-                if fieldName.upper() == "MGRS":
-                    mgrs = fieldValue
-                    
-                # Populate geodatabase field with text file value 
-                try:
-                    if fieldName.upper() not in ["LAT", "LONG"]:
-                        if fieldName in fieldNameList:
-                            row.setValue(fieldName, fieldValue)
-                        
-                except:
-                    arcpy.AddWarning("Warning: exception setting field: " \
-                            + fieldName + " to value " + fieldValue + \
-                            " (Input geoname file row number: " \
-                            + str(lineCount) + ")")
-                 
-            else:
-                if fieldName in fieldNameList:
-                    row.setNull(fieldName)
-                
-            fieldIndex = fieldIndex + 1
-        
-        # Set CountryCode/First-order Administrative Class field value
-        if countryCode1 != '' and adm1 != '':
-            row.setValue("ADM1CODE", countryCode1 + adm1)
-            
-            # Populate primary admin field value
-            adm1NameAll = admin1CodeDict.get(countryCode1 + adm1)
-            
-            if adm1NameAll is None:
-                row.setNull("ADM1NAMEALL")
-            else:
-                row.setValue("ADM1NAMEALL", adm1NameAll)
-                
-                ## Populate ADM1NAME field with first name in list
-                #
-                # Extract first element:
-                # some admin name have multiple "versions" for
-                # example BE11 is
-                # "Brussels-Capital Region [conventional] /
-                # Brussels Hoofdstedelijk [Dutch] /
-                # Bruxelles-Capitale [French]"
-                #
-                # Extract first value minus "/", "[", "]" and
-                # contents within brackets
-                adm1Name = adm1NameAll.split("/")[0].split("[")[0].strip()
-                row.setValue("ADM1NAME", adm1Name)
-                
-                userValue = "Primary Admin Division: " + adm1Name
-                
-                ## Populate Admin Division Class field (ADM1CLASS)
-                adm1ClassAll = admin1ClassDict.get(countryCode1 + adm1)
-                
-                if adm1ClassAll is None:
-                    row.setNull("ADM1CLASSALL")
-                    row.setNull("ADM1CLASS")
-                else:
-                    row.setValue("ADM1CLASSALL", adm1ClassAll)
-                    
-                    # 'Assemble' the Admin1 Class value
-                    i = adm1ClassAll.find("(")
-                    if i > -1:
-                        # Extract characters before "("
-                        adm1Class = adm1ClassAll[:i].strip()
-                        # Extract characters after ")"
-                        adm1Type =  adm1ClassAll[i:].strip()
-                    else:
-                        adm1Class = adm1ClassAll
-                        adm1Type = ''
-                    
-                    adm1Class = adm1Class.split("/")[0].split("[")[0].strip()
-                    adm1Class = adm1Class + " " + adm1Type
-                    # Remove trailing space that exists if adm1Type does
-                    # not have a value
-                    adm1Class = adm1Class.strip()
-                    
-                    row.setValue("ADM1CLASS", adm1Class)
-                    
-                    userValue = userValue + " [" + adm1Class + "]"
-                    
-                    row.setValue("USER_FLD", userValue)
-                    
-        # Set Feature Designation Name field value
-        if featDSGCode != '':
-            
-            featDSGName = featCodeDict.get(featDSGCode)
-            
-            if featDSGName is None:
-                row.setNull("DSGNAME")
-            else:
-                row.setValue("DSGNAME", featDSGName)
-        
-
-        # Populate Place name field using the reading order non-diatrictic
-        row.setValue("PLACENAME", placeName)
-        
-        # Set lat/long values on point object
-        pntObj.Y = lat
-        pntObj.X = long_
-        
-        # Populate geometry
-        row.Shape = pntObj
-        
-        # Insert feature
+                         "fields will not be populated: " + str(plan.extraFields))
+    return plan
+
+def InsertRows(cursor, rows, lineCount, lastOID):
+    '''
+    Inserts (line number, values, warnings, key) rows with the insert cursor,
+    reporting progress, returns the line number and object id of the last row
+    '''
+    for lineCount, values, warnings, key in rows:
+        for warning in warnings:
+            arcpy.AddWarning(warning)
         try:
-            rows.insertRow(row)
+            if values is None:
+                raise ValueError("Invalid line")
+            lastOID = cursor.insertRow(values)
         except:
             arcpy.AddWarning("Error inserting row: " + str(lineCount))
         # Print progress
         if lineCount % reportNum == 0:
             arcpy.AddMessage("\tCreating feature number: " + str(lineCount))
-        
-    # Close met file 
-    fileGeoname.close()
-    
-    # Set Output parameter (required so that script 
-    # tool output can be connected to other model tools)
-    arcpy.SetParameter(5, featClass)
-    arcpy.AddMessage("Completed, " + str(lineCount) + " records completed")
-    
-except:
-     
-    # Get the traceback object
-    tb = sys.exc_info()[2]
-    tbinfo = traceback.format_tb(tb)[0]
- 
-    # Concatenate information together concerning the error into a message string
-    pymsg = "PYTHON ERRORS:\nTraceback info:\n" + tbinfo + "\nError Info:\n" + str(sys.exc_info()[1])
-    msgs = "ArcPy ERRORS:\n" + arcpy.GetMessages() + "\n"
- 
-    # Return python error messages for use in script tool or Python Window
-    arcpy.AddError(pymsg)
-    arcpy.AddError(msgs)
-    
-finally:
-    # Regardless of whether the script succeeds or not, delete 
-    #  the row and cursor
-    
-    if row:
-        del row
-    if rows:
-        del rows
-    if pntObj:
-        del pntObj
-
-    # Close met file
-    if fileGeoname:
-        fileGeoname.close()
+    return lineCount, lastOID
+
+def ParseChunks(plan, chunks, processes):
+    '''
+    (chunk, rows) of each (offset, end offset, first line number, bytes)
+    chunk, in file order, rows being the (line number, values, warnings, key) of
+    its lines. With more than one process the chunks are parsed by a pool of
+    worker processes, and at most chunksInFlight chunks per process are read
+    ahead of the rows being inserted, so memory stays bounded however large
+    the file is.
+    '''
+    if processes <= 1:
+        for chunk in chunks:
+            yield chunk, GeonamesParser.ParseData(plan, chunk[3], chunk[2])
+        return
+
+    GeonamesUtilities.SetPoolExecutable()
+    pool = multiprocessing.Pool(processes, GeonamesParser.InitWorker, (plan,))
+    try:
+        pending = collections.deque()
+        for chunk in chunks:
+            pending.append((chunk, pool.apply_async(GeonamesParser.ParseChunk, ((chunk[2], chunk[3]),))))
+            if len(pending) >= processes * chunksInFlight:
+                chunk, result = pending.popleft()
+                yield chunk, result.get()
+        while pending:
+            chunk, result = pending.popleft()
+            yield chunk, result.get()
+        pool.close()
+    except:
+        pool.terminate()
+        raise
+    finally:
+        pool.join()
+
+## ======================================================
+## Load checkpoint
+## ======================================================
+
+def CheckpointPath(featClass, geonameFilePath):
+    '''
+    Returns the path of the checkpoint file of loading the geoname file into
+    the feature class, in the scratch folder, named from a hash of the
+    feature class, the file and its size and modification time
+    '''
+    status = os.stat(geonameFilePath)
+    signature = [str(featClass), os.path.abspath(geonameFilePath), status.st_size, status.st_mtime]
+    signature = hashlib.md5(json.dumps(signature).encode('utf-8')).hexdigest()
+    return os.path.join(arcpy.env.scratchFolder, "LoadGeonames_{0}.json".format(signature))
+
+def ReadCheckpoint(path):
+    '''
+    Returns the checkpoint at path: {"featClass": the feature class,
+    "offset": byte offset after the last committed chunk, "lineCount": its
+    last line number, "lastOID": object id of the last committed row}, None
+    if there isn't one (or it can't be read)
+    '''
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, 'r') as checkpointFile:
+            return json.load(checkpointFile)
+    except (IOError, ValueError):
+        return None
+
+def WriteCheckpoint(path, checkpoint):
+    with open(path, 'w') as checkpointFile:
+        json.dump(checkpoint, checkpointFile)
+
+def RemoveCheckpoint(path):
+    if os.path.exists(path):
+        os.remove(path)
+
+def HasCheckpoint(featClass):
+    '''
+    True if there is an unfinished load of a geonames file into the feature
+    class (of any file, Check Input doesn't know which file is loaded)
+    '''
+    for path in glob.glob(os.path.join(arcpy.env.scratchFolder, "LoadGeonames_*.json")):
+        checkpoint = ReadCheckpoint(path)
+        if checkpoint is not None and checkpoint.get("featClass") == str(featClass):
+            return True
+    return False
+
+def LastOID(featClass):
+    ''' Highest object id of the feature class, None if it is empty '''
+    with arcpy.da.SearchCursor(featClass, ["OID@"]) as rows:
+        return max([row[0] for row in rows] or [None])
+
+def DeleteRowsAfter(featClass, oid):
+    '''
+    Deletes the rows of the feature class with an object id above oid (all rows if oid is None)
+    '''
+    where = None
+    if oid is not None:
+        where = "{0} > {1}".format(arcpy.AddFieldDelimiters(featClass, arcpy.Describe(featClass).OIDFieldName), oid)
+    with arcpy.da.UpdateCursor(featClass, ["OID@"], where) as cursor:
+        for row in cursor:
+            cursor.deleteRow()
+
+def LoadGeonames(featClass, geonameFilePath, countryCodeTable, admin1CodeTable, featureCodeTable):
+    '''
+    Loads the geoname text file into the feature class, returns the number of lines read.
+    The file is loaded in chunks of lines, each inserted with its own cursor and then
+    recorded in a checkpoint file, so a failed load run again picks up after the last
+    loaded chunk. Otherwise the feature class has to be empty
+    '''
+    # Open geoname file
+    arcpy.AddMessage("- Opening geoname file " + geonameFilePath + "...")
+    with GeonamesParser.GeonameFile(geonameFilePath) as fileGeoname:
+
+        # Get list of fields in geoname file
+        fileFieldList = fileGeoname.header
+
+        # Build the load plan once: target field, converter and derived
+        # field lookups of each column
+        plan = MakeLoadPlan(featClass, fileFieldList, countryCodeTable, admin1CodeTable, featureCodeTable)
+
+        # Pick up after the chunks a failed load of the same file committed,
+        # dropping any rows of the chunk it was loading
+        checkpointPath = CheckpointPath(featClass, geonameFilePath)
+        checkpoint = ReadCheckpoint(checkpointPath)
+        if checkpoint is not None:
+            arcpy.AddMessage("- Resuming the previous load of this file from line " + str(checkpoint["lineCount"] + 1) +
+                             " (byte " + str(checkpoint["offset"]) + " of " + str(fileGeoname.size) + ")...")
+            DeleteRowsAfter(featClass, checkpoint["lastOID"])
+        else:
+            # Check Input lets features through if there is a checkpoint of
+            # this feature class, it may be of another file
+            if LastOID(featClass) is not None:
+                raise ValueError("Input feature class " + featClass + " has features, and there is no " \
+                                 "unfinished load of " + geonameFilePath + " into it to resume")
+            checkpoint = {"featClass": str(featClass), "offset": fileGeoname.dataOffset, "lineCount": 1, "lastOID": None}
+            WriteCheckpoint(checkpointPath, checkpoint)
+        lineCount = checkpoint["lineCount"]
+
+        # ======================================================
+        # Loop through geonames file and insert features
+        # ======================================================
+        # With the Parallel Processing Factor environment set, chunks are
+        # parsed by worker processes while this process inserts them
+        arcpy.AddMessage("- Creating features (report progress every " + str(reportNum) + " features)...")
+        processes = GeonamesUtilities.ProcessCount(arcpy.env.parallelProcessingFactor)
+        if processes > 1:
+            arcpy.AddMessage("Using {0} processes.".format(processes))
+        arcpy.SetProgressor("step", "Loading " + geonameFilePath + "...", 0, 100, 1)
+        chunks = fileGeoname.Chunks(checkpoint["offset"], lineCount + 1, chunkBytes)
+        for chunk, rows in ParseChunks(plan, chunks, processes):
+            # the rows of a chunk are committed when its cursor is closed
+            with arcpy.da.InsertCursor(featClass, plan.fields) as cursor:
+                lineCount, lastOID = InsertRows(cursor, rows, lineCount, checkpoint["lastOID"])
+            checkpoint = {"featClass": str(featClass), "offset": chunk[1], "lineCount": lineCount, "lastOID": lastOID}
+            WriteCheckpoint(checkpointPath, checkpoint)
+            arcpy.SetProgressorPosition(int(100 * chunk[1] / fileGeoname.size))
+        arcpy.ResetProgressor()
+        RemoveCheckpoint(checkpointPath)
+
+        return lineCount
+
+if __name__ == '__main__':
+
+    ## ======================================================
+    ## Read in parameters
+    ## ======================================================
+    featClass = arcpy.GetParameterAsText(0)
+    geonameFilePath = arcpy.GetParameterAsText(1)
+    countryCodeTable = arcpy.GetParameterAsText(2)
+    admin1CodeTable = arcpy.GetParameterAsText(3)
+    featureCodeTable = arcpy.GetParameterAsText(4)
+
+    try:
+        lineCount = LoadGeonames(featClass, geonameFilePath, countryCodeTable, admin1CodeTable, featureCodeTable)
+
+        # Set Output parameter (required so that script 
+        # tool output can be connected to other model tools)
+        arcpy.SetParameter(5, featClass)
+        arcpy.AddMessage("Completed, " + str(lineCount) + " records completed")
+
+    except:
+
+        # Get the traceback object
+        tb = sys.exc_info()[2]
+        tbinfo = traceback.format_tb(tb)[0]
+
+        # Concatenate information together concerning the error into a message string
+        pymsg = "PYTHON ERRORS:\nTraceback info:\n" + tbinfo + "\nError Info:\n" + str(sys.exc_info()[1])
+        msgs = "ArcPy ERRORS:\n" + arcpy.GetMessages() + "\n"
+
+        # Return python error messages for use in script tool or Python Window
+        arcpy.AddError(pymsg)
+        arcpy.AddError(msgs)
@@ -0,0 +1,191 @@
+#------------------------------------------------------------------------------
+# Copyright 2015 Esri
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#------------------------------------------------------------------------------
+# Updates a feature class loaded with Load Geonames File from a newer
+# geonames file: only the names that are new, changed (by MODIFY_DATE or
+# NM_MODIFY_DATE) or no longer in the file are inserted, updated or deleted.
+#
+# Run it with the Update Geonames From File tool of the
+# "Geonames Update Tools.pyt" Python toolbox (for ArcMap and ArcGIS Pro), or
+# as a script tool with the parameters of LoadGeonames.py: feature class,
+# geonames file, country code, primary admin code and feature code tables,
+# and a derived output feature class (parameter 5).
+#------------------------------------------------------------------------------
+# Import ArcPy site-package and os modules
+#
+import arcpy 
+import os
+import sys, traceback
+
+import GeonamesParser
+import GeonamesUtilities
+import LoadGeonames
+
+# Number of rows inserted, updated or deleted with one cursor
+batchSize = 1000
+
+## ======================================================
+## Apply the changes in batches
+## ======================================================
+
+def OIDWhereClause(featClass, oids):
+    ''' Where clause selecting the object ids of the feature class '''
+    oidField = arcpy.AddFieldDelimiters(featClass, arcpy.Describe(featClass).OIDFieldName)
+    return "{0} IN ({1})".format(oidField, ",".join(str(oid) for oid in oids))
+
+def InsertBatch(featClass, fields, rows):
+    ''' Inserts (line number, values) rows, returns the number inserted '''
+    count = 0
+    with arcpy.da.InsertCursor(featClass, fields) as cursor:
+        for lineNumber, values in rows:
+            try:
+                cursor.insertRow(values)
+                count = count + 1
+            except:
+                arcpy.AddWarning("Error inserting row: " + str(lineNumber))
+    return count
+
+def UpdateBatch(featClass, fields, rows):
+    ''' Updates the rows of an object id to (line number, values) dictionary, returns the number updated '''
+    count = 0
+    with arcpy.da.UpdateCursor(featClass, ["OID@"] + fields, OIDWhereClause(featClass, sorted(rows))) as cursor:
+        for row in cursor:
+            lineNumber, values = rows[row[0]]
+            try:
+                cursor.updateRow([row[0]] + list(values))
+                count = count + 1
+            except:
+                arcpy.AddWarning("Error updating row: " + str(lineNumber))
+    return count
+
+def DeleteBatch(featClass, oids):
+    ''' Deletes the rows of the object ids, returns the number deleted '''
+    count = 0
+    with arcpy.da.UpdateCursor(featClass, ["OID@"], OIDWhereClause(featClass, oids)) as cursor:
+        for row in cursor:
+            cursor.deleteRow()
+            count = count + 1
+    return count
+
+def UpdateGeonames(featClass, geonameFilePath, countryCodeTable, admin1CodeTable, featureCodeTable):
+    '''
+    Updates the feature class from the geoname text file, returns the
+    numbers of rows inserted, updated, deleted and unchanged
+    '''
+    # Open geoname file
+    arcpy.AddMessage("- Opening geoname file " + geonameFilePath + "...")
+    with GeonamesParser.GeonameFile(geonameFilePath) as fileGeoname:
+
+        plan = LoadGeonames.MakeLoadPlan(featClass, fileGeoname.header,
+                                         countryCodeTable, admin1CodeTable, featureCodeTable)
+
+        # ======================================================
+        # Index the feature class by UFI and UNI
+        # ======================================================
+        arcpy.AddMessage("- Indexing feature class " + featClass + "...")
+        with arcpy.da.SearchCursor(featClass, GeonamesParser.Delta.IndexFields(plan)) as rows:
+            delta = GeonamesParser.Delta(plan, rows)
+        arcpy.AddMessage("\t" + str(len(delta.index)) + " names indexed")
+
+        # ======================================================
+        # Compare the geonames file and insert or update the changed names
+        # ======================================================
+        arcpy.AddMessage("- Comparing geonames file (report progress every " + str(LoadGeonames.reportNum) + " lines)...")
+        inserted = updated = unchanged = 0
+        inserts = []
+        updates = {}
+        processes = GeonamesUtilities.ProcessCount(arcpy.env.parallelProcessingFactor)
+        if processes > 1:
+            arcpy.AddMessage("Using {0} processes.".format(processes))
+        chunks = fileGeoname.Chunks(fileGeoname.dataOffset, 2, LoadGeonames.chunkBytes)
+        for chunk, rows in LoadGeonames.ParseChunks(plan, chunks, processes):
+            for lineNumber, values, warnings, key in rows:
+                for warning in warnings:
+                    arcpy.AddWarning(warning)
+                if values is None:
+                    # the name of the line is left as it is, not deleted
+                    arcpy.AddWarning("Error inserting row: " + str(lineNumber))
+                    delta.Keep(key)
+                    continue
+                action, oid = delta.Compare(values)
+                if action == GeonamesParser.INSERT:
+                    inserts.append((lineNumber, values))
+                elif action == GeonamesParser.UPDATE:
+                    updates[oid] = (lineNumber, values)
+                else:
+                    unchanged = unchanged + 1
+                if lineNumber % LoadGeonames.reportNum == 0:
+                    arcpy.AddMessage("\tComparing line number: " + str(lineNumber))
+
+            # Apply the changes found so far in batches
+            if len(inserts) >= batchSize:
+                inserted = inserted + InsertBatch(featClass, plan.fields, inserts)
+                inserts = []
+            if len(updates) >= batchSize:
+                updated = updated + UpdateBatch(featClass, plan.fields, updates)
+                updates = {}
+        if inserts:
+            inserted = inserted + InsertBatch(featClass, plan.fields, inserts)
+        if updates:
+            updated = updated + UpdateBatch(featClass, plan.fields, updates)
+
+        # ======================================================
+        # Delete the names that are no longer in the file
+        # ======================================================
+        if delta.duplicates:
+            arcpy.AddWarning("Warning: " + str(len(delta.duplicates)) + " features are copies of names " \
+                             "loaded more than once, and are deleted")
+        if delta.unreadKeys:
+            arcpy.AddWarning("Warning: Names no longer in the file are not deleted, because lines of the " \
+                             "file have no readable UFI and UNI")
+        deletes = delta.Deletes()
+        deleted = 0
+        for start in range(0, len(deletes), batchSize):
+            deleted = deleted + DeleteBatch(featClass, deletes[start:start + batchSize])
+
+        arcpy.AddMessage("- " + str(inserted) + " features inserted, " + str(updated) + " updated, " +
+                         str(deleted) + " deleted, " + str(unchanged) + " unchanged")
+        return inserted, updated, deleted, unchanged
+
+if __name__ == '__main__':
+
+    ## ======================================================
+    ## Read in parameters
+    ## ======================================================
+    featClass = arcpy.GetParameterAsText(0)
+    geonameFilePath = arcpy.GetParameterAsText(1)
+    countryCodeTable = arcpy.GetParameterAsText(2)
+    admin1CodeTable = arcpy.GetParameterAsText(3)
+    featureCodeTable = arcpy.GetParameterAsText(4)
+
+    try:
+        UpdateGeonames(featClass, geonameFilePath, countryCodeTable, admin1CodeTable, featureCodeTable)
+
+        # Set Output parameter (required so that script 
+        # tool output can be connected to other model tools)
+        arcpy.SetParameter(5, featClass)
+
+    except:
+
+        # Get the traceback object
+        tb = sys.exc_info()[2]
+        tbinfo = traceback.format_tb(tb)[0]
+
+        # Concatenate information together concerning the error into a message string
+        pymsg = "PYTHON ERRORS:\nTraceback info:\n" + tbinfo + "\nError Info:\n" + str(sys.exc_info()[1])
+        msgs = "ArcPy ERRORS:\n" + arcpy.GetMessages() + "\n"
+
+        # Return python error messages for use in script tool or Python Window
+        arcpy.AddError(pymsg)
+        arcpy.AddError(msgs)
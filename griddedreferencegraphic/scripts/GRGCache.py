@@ -0,0 +1,223 @@
+# coding: utf-8
+'''
+------------------------------------------------------------------------------
+ Copyright 2017 Esri
+ Licensed under the Apache License, Version 2.0 (the "License");
+ you may not use this file except in compliance with the License.
+ You may obtain a copy of the License at
+   http://www.apache.org/licenses/LICENSE-2.0
+ Unless required by applicable law or agreed to in writing, software
+ distributed under the License is distributed on an "AS IS" BASIS,
+ WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+ See the License for the specific language governing permissions and
+ limitations under the License.
+------------------------------------------------------------------------------
+ ==================================================
+ GRGCache.py
+ --------------------------------------------------
+ requirements: Python 2.7 or Python 3.5+
+ author: ArcGIS Solutions
+ contact: support@esri.com
+ company: Esri
+ ==================================================
+ description:
+ On disk cache of GRG results, so a GRG made again from the same inputs
+ can be written without computing its cells and labels.
+ Entries are content addressed: the key is a hash of the normalized
+ inputs (AOI geometry, cell size, label style, start position, ...) and
+ the value the cells and labels of the grid, packed and compressed.
+ Entries hold only numbers and text (no pickles), as the cache folder may
+ be shared, and an entry that can't be decoded is a cache miss.
+ The cache is bounded in size, and evicts the least recently used entries.
+ Does not use arcpy.
+ ==================================================
+'''
+
+import os
+import array
+import errno
+import hashlib
+import json
+import numbers
+import struct
+import zlib
+
+# Bump when the grid or the entry format changes, so old entries are not used
+CACHE_VERSION = 2
+
+# Entry header: version, number of cells, bytes of corner coordinates
+HEADER = struct.Struct("<III")
+
+# Bytes of the four (x, y) corners of a cell
+CELL_BYTES = 8 * array.array('d').itemsize
+
+# Default bound on the size of all the entries in a cache folder
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+# Coordinates and cell sizes are compared to this many decimal places
+KEY_DECIMALS = 6
+
+ENTRY_EXTENSION = ".grg"
+
+
+def _normalize(value):
+    ''' Stable text for a (nested) input value, for hashing '''
+    if isinstance(value, (list, tuple)):
+        return "(" + ",".join(_normalize(item) for item in value) + ")"
+    if value is None or isinstance(value, bool):
+        return repr(value)
+    if isinstance(value, numbers.Real):
+        return repr(round(float(value), KEY_DECIMALS) + 0.0)
+    return repr(str(value))
+
+
+def CacheKey(*inputs):
+    '''
+    Hex digest of the normalized inputs. Numbers are compared as floats
+    rounded to KEY_DECIMALS places, so 100 and 100.0 give the same key.
+    '''
+    text = _normalize((CACHE_VERSION,) + inputs)
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+def PackCells(cells):
+    '''
+    Compact bytes for a sequence of (ring, label) cells, where each ring is a
+    closed list of (x, y). Only the four corners of each ring are kept.
+    The compressed entry is the HEADER, the corners as doubles and the
+    labels as a JSON list.
+    '''
+    coordinates = array.array('d')
+    labels = []
+    for ring, label in cells:
+        for x, y in ring[0:4]:
+            coordinates.append(x)
+            coordinates.append(y)
+        labels.append(label)
+    packed = coordinates.tobytes() if hasattr(coordinates, "tobytes") else coordinates.tostring()
+    header = HEADER.pack(CACHE_VERSION, len(labels), len(packed))
+    return zlib.compress(header + packed + json.dumps(labels).encode("utf-8"))
+
+
+def UnpackCells(data):
+    '''
+    (ring, label) cells packed by PackCells. Raises ValueError if data is
+    not a valid entry of this CACHE_VERSION.
+    '''
+    try:
+        data = zlib.decompress(data)
+        version, count, size = HEADER.unpack(data[:HEADER.size])
+    except (zlib.error, struct.error) as error:
+        raise ValueError("Invalid GRG cache entry: {0}".format(error))
+    if version != CACHE_VERSION:
+        raise ValueError("GRG cache entry version {0} is not {1}".format(version, CACHE_VERSION))
+    if size != count * CELL_BYTES or len(data) < HEADER.size + size:
+        raise ValueError("GRG cache entry has {0} bytes of corners for {1} cells".format(size, count))
+    packed = data[HEADER.size:HEADER.size + size]
+    labels = json.loads(data[HEADER.size + size:].decode("utf-8"))
+    if (not isinstance(labels, list) or len(labels) != count or
+            not all(isinstance(label, (type(u""), str)) for label in labels)):
+        raise ValueError("GRG cache entry does not have {0} labels".format(count))
+    coordinates = array.array('d')
+    if hasattr(coordinates, "frombytes"):
+        coordinates.frombytes(packed)
+    else:
+        coordinates.fromstring(packed)
+    cells = []
+    for index, label in enumerate(labels):
+        corners = coordinates[index * 8:(index + 1) * 8]
+        ring = [(corners[i], corners[i + 1]) for i in range(0, 8, 2)]
+        ring.append(ring[0])
+        cells.append((ring, label))
+    return cells
+
+
+class GRGCache(object):
+    '''
+    Folder of cached GRG cells, one file per key. The modification time of
+    an entry is its last use, which orders entries for eviction.
+    '''
+
+    def __init__(self, folder, maxBytes=DEFAULT_MAX_BYTES):
+        self.folder = folder
+        self.maxBytes = maxBytes
+
+    def _path(self, key):
+        return os.path.join(self.folder, key + ENTRY_EXTENSION)
+
+    def Get(self, key):
+        ''' Cached (ring, label) cells for key, or None if not cached '''
+        path = self._path(key)
+        try:
+            with open(path, "rb") as entry:
+                cells = UnpackCells(entry.read())
+        except (IOError, OSError):
+            return None
+        except ValueError:
+            # invalid or out of date entry, drop it
+            self._remove(path)
+            return None
+        try:
+            os.utime(path, None)
+        except OSError:
+            pass
+        return cells
+
+    def Put(self, key, cells):
+        '''
+        Cache a sequence of (ring, label) cells under key, and evict least
+        recently used entries to keep the cache within maxBytes.
+        Returns the cells as a list.
+        '''
+        cells = list(cells)
+        data = PackCells(cells)
+        if len(data) > self.maxBytes:
+            return cells
+        try:
+            os.makedirs(self.folder)
+        except OSError as error:
+            if error.errno != errno.EEXIST:
+                raise
+        path = self._path(key)
+        temporary = "{0}.{1}.tmp".format(path, os.getpid())
+        with open(temporary, "wb") as entry:
+            entry.write(data)
+        # another process may have written the same entry, which is as good
+        self._remove(path)
+        os.rename(temporary, path)
+        self.Evict()
+        return cells
+
+    def Entries(self):
+        ''' (last used time, size, path) of the entries, least recently used first '''
+        entries = []
+        if not os.path.isdir(self.folder):
+            return entries
+        for name in os.listdir(self.folder):
+            if not name.endswith(ENTRY_EXTENSION):
+                continue
+            path = os.path.join(self.folder, name)
+            try:
+                status = os.stat(path)
+            except OSError:
+                continue
+            entries.append((status.st_mtime, status.st_size, path))
+        entries.sort()
+        return entries
+
+    def Evict(self):
+        ''' Remove least recently used entries until the cache is within maxBytes '''
+        entries = self.Entries()
+        total = sum(size for used, size, path in entries)
+        for used, size, path in entries:
+            if total <= self.maxBytes:
+                break
+            self._remove(path)
+            total -= size
+        return total
+
+    def _remove(self, path):
+        try:
+            os.remove(path)
+        except OSError:
+            pass
@@ -0,0 +1,377 @@
+# coding: utf-8
+'''
+------------------------------------------------------------------------------
+ Copyright 2017 Esri
+ Licensed under the Apache License, Version 2.0 (the "License");
+ you may not use this file except in compliance with the License.
+ You may obtain a copy of the License at
+   http://www.apache.org/licenses/LICENSE-2.0
+ Unless required by applicable law or agreed to in writing, software
+ distributed under the License is distributed on an "AS IS" BASIS,
+ WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+ See the License for the specific language governing permissions and
+ limitations under the License.
+------------------------------------------------------------------------------
+ ==================================================
+ GRGGrid.py
+ --------------------------------------------------
+ requirements: Python 2.7 or Python 3.5+, NumPy (installed with ArcGIS)
+ author: ArcGIS Solutions
+ contact: support@esri.com
+ company: Esri
+ ==================================================
+ description:
+ Grid engine for Gridded Reference Graphics (GRG).
+ Computes the cell rectangles of a GRG and their labels directly from
+ the grid origin, cell size, cell counts and label start position, in
+ labelling order, so GRGUtilities can write a whole grid with a single
+ insert cursor instead of CreateFishnet, Sort and an update cursor.
+ Labels are computed in closed form from a cell's row and column, so
+ they do not depend on the order the cells are visited in. Rotated
+ grids are rotated by one precomputed rotation matrix applied to the
+ grid corners before the cells are written.
+ Does not use arcpy.
+ ==================================================
+'''
+
+import math
+import multiprocessing
+import numpy
+
+# Label start positions, as (rows counted from the top, columns counted from the right)
+START_POSITIONS = {"Upper-Left": (True, False),
+                   "Upper-Right": (True, True),
+                   "Lower-Left": (False, False),
+                   "Lower-Right": (False, True)}
+
+
+def ColumnLetters(index):
+    '''
+    Spreadsheet style letters for a 0 based index: 0 -> A, 25 -> Z, 26 -> AA, ...
+    '''
+    letters = ''
+    index = int(index)
+    while index >= 0:
+        letters = chr(index % 26 + ord('A')) + letters
+        index = index // 26 - 1
+    return letters
+
+
+def _labelIndexes(rows, columns, labelStartPos):
+    '''
+    The row and column indexes, counted from the label start position, of the
+    grid rows (from the bottom) and grid columns (from the left), as arrays
+    '''
+    fromTop, fromRight = START_POSITIONS[labelStartPos]
+    labelRows = numpy.arange(int(rows))
+    labelColumns = numpy.arange(int(columns))
+    if fromTop:
+        labelRows = labelRows[::-1]
+    if fromRight:
+        labelColumns = labelColumns[::-1]
+    return labelRows, labelColumns
+
+
+def GridLabel(row, column, rows, columns, labelStartPos, labelStyle, labelSeperator):
+    '''
+    Label of the cell at grid row and column (0 based, counted from the lower
+    left cell) of a grid of rows x columns cells:
+    Alpha-Numeric - letters of the row and number of the column, i.e. "B3"
+    Alpha-Alpha   - letters of the row and of the column, i.e. "B-C"
+    Numeric       - cell number, counted row by row, i.e. "6"
+    where rows and columns are counted from the label start position.
+    '''
+    fromTop, fromRight = START_POSITIONS[labelStartPos]
+    if fromTop:
+        row = int(rows) - 1 - row
+    if fromRight:
+        column = int(columns) - 1 - column
+    if labelStyle == "Alpha-Numeric":
+        return ColumnLetters(row) + str(column + 1)
+    elif labelStyle == "Alpha-Alpha":
+        return ColumnLetters(row) + labelSeperator + ColumnLetters(column)
+    elif labelStyle == "Numeric":
+        return str(row * int(columns) + column + 1)
+    return None
+
+
+def GridLabels(rows, columns, labelStartPos, labelStyle, labelSeperator):
+    '''
+    Batch form of GridLabel, for every cell of a grid of rows x columns cells.
+    Returns a list of rows, from the bottom, each a list of labels from the left,
+    so the label of grid row r and column c is GridLabels(...)[r][c].
+    The row and column parts of the labels are only computed once each.
+    '''
+    labelRows, labelColumns = _labelIndexes(rows, columns, labelStartPos)
+    if labelStyle == "Numeric":
+        numbers = labelRows[:, None] * int(columns) + labelColumns[None, :] + 1
+        return numbers.astype(str).tolist()
+    rowParts = numpy.array([ColumnLetters(row) for row in labelRows.tolist()], dtype=object)
+    if labelStyle == "Alpha-Numeric":
+        columnParts = [str(column + 1) for column in labelColumns.tolist()]
+    elif labelStyle == "Alpha-Alpha":
+        columnParts = [labelSeperator + ColumnLetters(column) for column in labelColumns.tolist()]
+    else:
+        return [[None] * int(columns) for row in range(0, int(rows))]
+    return (rowParts[:, None] + numpy.array(columnParts, dtype=object)[None, :]).tolist()
+
+
+def RotationMatrix(angle):
+    '''
+    Matrix ((a, b), (c, d)) that rotates (x, y) offsets clockwise (like
+    Rotate_management) by angle degrees: (a * x + b * y, c * x + d * y)
+    '''
+    radians = math.radians(float(angle))
+    cos = math.cos(radians)
+    sin = math.sin(radians)
+    return ((cos, sin), (-sin, cos))
+
+
+def _axisCells(origin, xAxis, yAxis, cellWidth, cellHeight, rows, columns, labelStartPos):
+    '''
+    Yields (row, column, ring) for the cells of a grid whose lower left corner is
+    origin and whose rows and columns run along the unit vectors yAxis and xAxis
+    (see GridCells). The corner of grid column c and row r is the sum of a column
+    term and a row term, so the axes are only applied once per grid line.
+    '''
+    rows = int(rows)
+    columns = int(columns)
+    fromTop, fromRight = START_POSITIONS[labelStartPos]
+    originX, originY = float(origin[0]), float(origin[1])
+    columnXs = [originX + float(cellWidth) * i * xAxis[0] for i in range(0, columns + 1)]
+    columnYs = [originY + float(cellWidth) * i * xAxis[1] for i in range(0, columns + 1)]
+    rowXs = [float(cellHeight) * i * yAxis[0] for i in range(0, rows + 1)]
+    rowYs = [float(cellHeight) * i * yAxis[1] for i in range(0, rows + 1)]
+    for row in range(0, rows):
+        gridRow = rows - 1 - row if fromTop else row
+        bottomX, bottomY = rowXs[gridRow], rowYs[gridRow]
+        topX, topY = rowXs[gridRow + 1], rowYs[gridRow + 1]
+        for column in range(0, columns):
+            gridColumn = columns - 1 - column if fromRight else column
+            leftX, leftY = columnXs[gridColumn], columnYs[gridColumn]
+            rightX, rightY = columnXs[gridColumn + 1], columnYs[gridColumn + 1]
+            lowerLeft = (leftX + bottomX, leftY + bottomY)
+            yield gridRow, gridColumn, [lowerLeft,
+                                        (leftX + topX, leftY + topY),
+                                        (rightX + topX, rightY + topY),
+                                        (rightX + bottomX, rightY + bottomY),
+                                        lowerLeft]
+
+
+def GridCells(originX, originY, cellWidth, cellHeight, rows, columns, labelStartPos, angle=0, pivot=None):
+    '''
+    Yields (row, column, ring) for every cell of a grid of rows x columns
+    cells whose lower left corner is (originX, originY), in labelling order:
+    row by row away from the start position, and along each row away from
+    the start side. row and column are the 0 based grid row and column,
+    counted from the lower left cell. ring is the closed list of (x, y)
+    cell corners, clockwise from the lower left corner.
+    If angle is not 0, the grid is rotated clockwise by angle degrees about
+    pivot, an (x, y) tuple (default: the origin).
+    '''
+    if not angle:
+        return _axisCells((originX, originY), (1.0, 0.0), (0.0, 1.0),
+                          cellWidth, cellHeight, rows, columns, labelStartPos)
+    if pivot is None:
+        pivot = (originX, originY)
+    pivotX, pivotY = float(pivot[0]), float(pivot[1])
+    (a, b), (c, d) = RotationMatrix(angle)
+    origin = (pivotX + a * (originX - pivotX) + b * (originY - pivotY),
+              pivotY + c * (originX - pivotX) + d * (originY - pivotY))
+    return _axisCells(origin, (a, c), (b, d), cellWidth, cellHeight, rows, columns, labelStartPos)
+
+
+def ConvexHull(points):
+    '''
+    Convex hull of a sequence of (x, y) points (monotone chain), as a list of
+    its corners, counterclockwise, without the closing point
+    '''
+    points = sorted(set((float(x), float(y)) for x, y in points))
+    if len(points) <= 2:
+        return points
+
+    def turn(o, a, b):
+        return (a[0] - o[0]) * (b[1] - o[1]) - (a[1] - o[1]) * (b[0] - o[0])
+
+    lower = []
+    for point in points:
+        while len(lower) >= 2 and turn(lower[-2], lower[-1], point) <= 0:
+            lower.pop()
+        lower.append(point)
+    upper = []
+    for point in reversed(points):
+        while len(upper) >= 2 and turn(upper[-2], upper[-1], point) <= 0:
+            upper.pop()
+        upper.append(point)
+    return lower[:-1] + upper[:-1]
+
+
+def MinimumBoundingRectangle(points):
+    '''
+    Minimum area rectangle enclosing a sequence of (x, y) points, found with
+    rotating calipers over their convex hull: one side of the rectangle is on a
+    hull edge, and the hull points touching the other three sides only move
+    forward as the edges are visited, so the search is linear in the hull size.
+    Returns the four corners, counterclockwise.
+    '''
+    hull = ConvexHull(points)
+    if not hull:
+        raise ValueError("No points to bound")
+    if len(hull) == 1:
+        return hull * 4
+    if len(hull) == 2:
+        return [hull[0], hull[1], hull[1], hull[0]]
+
+    count = len(hull)
+    best = None
+    right = top = left = None
+    for i in range(0, count):
+        p, q = hull[i], hull[(i + 1) % count]
+        length = math.hypot(q[0] - p[0], q[1] - p[1])
+        if length == 0:
+            continue
+        ux, uy = (q[0] - p[0]) / length, (q[1] - p[1]) / length
+        along = lambda index: hull[index % count][0] * ux + hull[index % count][1] * uy
+        across = lambda index: hull[index % count][0] * -uy + hull[index % count][1] * ux
+
+        if right is None:
+            right = i + 1
+        right = max(right, i + 1)
+        while along(right + 1) > along(right) and right < i + count:
+            right += 1
+        if top is None:
+            top = right
+        top = max(top, right)
+        while across(top + 1) > across(top) and top < i + count:
+            top += 1
+        if left is None:
+            left = top
+        left = max(left, top)
+        while along(left + 1) < along(left) and left < i + count + count:
+            left += 1
+
+        minAlong, maxAlong = along(left), along(right)
+        minAcross, maxAcross = across(i), across(top)
+        area = (maxAlong - minAlong) * (maxAcross - minAcross)
+        if best is None or area < best[0]:
+            best = (area, ux, uy, minAlong, maxAlong, minAcross, maxAcross)
+
+    area, ux, uy, minAlong, maxAlong, minAcross, maxAcross = best
+    corner = lambda a, b: (a * ux - b * uy, a * uy + b * ux)
+    return [corner(minAlong, minAcross), corner(maxAlong, minAcross),
+            corner(maxAlong, maxAcross), corner(minAlong, maxAcross)]
+
+
+def RectangleGrid(corners, cellWidth, cellHeight):
+    '''
+    Grid covering a (rotated) rectangle, such as a minimum bounding rectangle,
+    as (origin, xAxis, yAxis, rows, columns) for GridCellsOnAxes.
+    The grid is upright: its x axis is the side of the rectangle closest to
+    east (within 45 degrees), its y axis points north of it, and its origin
+    is the lower left corner in that frame.
+    '''
+    sides = [(corners[1][0] - corners[0][0], corners[1][1] - corners[0][1]),
+             (corners[2][0] - corners[1][0], corners[2][1] - corners[1][1])]
+    xAxis = None
+    for dx, dy in sides:
+        length = math.hypot(dx, dy)
+        if length == 0:
+            continue
+        # either direction of the side, whichever is closest to east
+        for ux, uy in ((dx / length, dy / length), (-dx / length, -dy / length)):
+            if ux > 0 and abs(uy) <= ux + 1e-12 and (xAxis is None or ux > xAxis[0]):
+                xAxis = (ux, uy)
+    if xAxis is None:
+        xAxis = (1.0, 0.0)
+    yAxis = (-xAxis[1], xAxis[0])
+
+    alongs = [x * xAxis[0] + y * xAxis[1] for x, y in corners]
+    acrosses = [x * yAxis[0] + y * yAxis[1] for x, y in corners]
+    minAlong, minAcross = min(alongs), min(acrosses)
+    origin = (minAlong * xAxis[0] + minAcross * yAxis[0], minAlong * xAxis[1] + minAcross * yAxis[1])
+    width = max(alongs) - minAlong
+    height = max(acrosses) - minAcross
+    columns = max(1, int(math.ceil(round(width / float(cellWidth), 9))))
+    rows = max(1, int(math.ceil(round(height / float(cellHeight), 9))))
+    return origin, xAxis, yAxis, rows, columns
+
+
+def AreaGrid(points, cellWidth, cellHeight):
+    '''
+    Upright grid (see RectangleGrid) over the minimum bounding rectangle of the
+    (x, y) vertices of an area, as (origin, xAxis, yAxis, rows, columns)
+    '''
+    return RectangleGrid(MinimumBoundingRectangle(points), cellWidth, cellHeight)
+
+
+def GridCellsOnAxes(origin, xAxis, yAxis, cellWidth, cellHeight, rows, columns, labelStartPos):
+    '''
+    GridCells for a grid whose lower left corner is origin, with rows along the
+    unit vector yAxis and columns along the unit vector xAxis (see AreaGrid)
+    '''
+    return _axisCells(origin, xAxis, yAxis, cellWidth, cellHeight, rows, columns, labelStartPos)
+
+
+def GridLabelledCells(originX, originY, cellWidth, cellHeight, rows, columns,
+                      labelStartPos, labelStyle, labelSeperator, angle=0, pivot=None):
+    '''
+    Yields (ring, label) for every cell of the grid, in labelling order (see GridCells)
+    '''
+    labels = GridLabels(rows, columns, labelStartPos, labelStyle, labelSeperator)
+    for row, column, ring in GridCells(originX, originY, cellWidth, cellHeight, rows, columns,
+                                       labelStartPos, angle, pivot):
+        yield ring, labels[row][column]
+
+
+def AreaGridTask(task):
+    '''
+    Cells of the GRG of one area, as a list of (ring, label, aoiId) in labelling
+    order. task is a (aoiId, points, cellWidth, cellHeight, labelStartPos,
+    labelStyle, labelSeperator) tuple, where points are the (x, y) vertices of
+    the area (see AreaGrid), so it can be sent to a worker process.
+    '''
+    aoiId, points, cellWidth, cellHeight, labelStartPos, labelStyle, labelSeperator = task
+    origin, xAxis, yAxis, rows, columns = AreaGrid(points, cellWidth, cellHeight)
+    labels = GridLabels(rows, columns, labelStartPos, labelStyle, labelSeperator)
+    return [(ring, labels[row][column], aoiId) for row, column, ring in
+            GridCellsOnAxes(origin, xAxis, yAxis, cellWidth, cellHeight, rows, columns, labelStartPos)]
+
+
+def PointGridTask(task):
+    '''
+    Cells of the GRG centered on one point, as a list of (ring, label, aoiId) in
+    labelling order. task is a (aoiId, x, y, rows, columns, cellWidth, cellHeight,
+    labelStartPos, labelStyle, labelSeperator, angle) tuple, so it can be sent to
+    a worker process. The grid is rotated clockwise by angle degrees about the point.
+    '''
+    aoiId, x, y, rows, columns, cellWidth, cellHeight, labelStartPos, labelStyle, labelSeperator, angle = task
+    left = x - float(cellWidth) * float(columns) / 2.0
+    bottom = y - float(cellHeight) * float(rows) / 2.0
+    return [(ring, label, aoiId) for ring, label in
+            GridLabelledCells(left, bottom, cellWidth, cellHeight, rows, columns,
+                              labelStartPos, labelStyle, labelSeperator, angle, (x, y))]
+
+
+def RunGridTasks(worker, tasks, processes):
+    '''
+    Yields worker(task) for each of the tasks (i.e. AreaGridTask or
+    PointGridTask), in order. The tasks are run on a pool of up to processes
+    worker processes if that is more than one.
+    '''
+    tasks = list(tasks)
+    processes = min(processes, len(tasks))
+    if processes <= 1:
+        for task in tasks:
+            yield worker(task)
+        return
+
+    pool = multiprocessing.Pool(processes)
+    try:
+        for result in pool.imap(worker, tasks, max(1, len(tasks) // (processes * 4))):
+            yield result
+        pool.close()
+    except:
+        pool.terminate()
+        raise
+    finally:
+        pool.join()
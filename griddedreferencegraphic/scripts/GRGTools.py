@@ -33,12 +33,25 @@ import arcpy
 
 try:
     from . import Utilities
-    from . import GRGUtilities
-    from . import RefGrid
 except ImportError:
     import Utilities
-    import GRGUtilities
-    import RefGrid
+
+# GRGUtilities and RefGrid (and numpy, multiprocessing, etc. that they import)
+# are only needed to run a tool, so they are imported on first use instead of
+# when the toolbox is opened. Python keeps the imported modules for the process.
+def _GRGUtilities():
+    try:
+        from . import GRGUtilities
+    except ImportError:
+        import GRGUtilities
+    return GRGUtilities
+
+def _RefGrid():
+    try:
+        from . import RefGrid
+    except ImportError:
+        import RefGrid
+    return RefGrid
 
 class CreateGRGFromArea(object):
     '''
@@ -151,6 +164,14 @@ class CreateGRGFromArea(object):
         output_features.symbology = os.path.join(os.path.dirname(os.path.dirname(__file__)),
                                                  "layers", "GRG.lyr")
 
+        result_cache_folder = arcpy.Parameter(name='result_cache_folder',
+                                              displayName='Result Cache Folder',
+                                              direction='Input',
+                                              datatype='DEFolder',
+                                              parameterType='Optional',
+                                              enabled=True,
+                                              multiValue=False)
+
         return [input_area_features,
                 cell_width,
                 cell_height,
@@ -158,7 +179,8 @@ class CreateGRGFromArea(object):
                 label_start_position,
                 label_type,
                 label_seperator,
-                output_features]
+                output_features,
+                result_cache_folder]
 
     def updateParameters(self, parameters):
         '''
@@ -180,14 +202,15 @@ class CreateGRGFromArea(object):
     def execute(self, parameters, messages):
         ''' execute for toolbox'''
         #arcpy.AddError("Not built yet.")
-        out_grg = GRGUtilities.GRGFromArea(parameters[0].value,
-                                           parameters[1].value,
-                                           parameters[2].value,
-                                           parameters[3].value,
-                                           parameters[4].value,
-                                           parameters[5].value,
-                                           parameters[6].value,
-                                           parameters[7].value)
+        out_grg = _GRGUtilities().GRGFromArea(parameters[0].value,
+                                              parameters[1].value,
+                                              parameters[2].value,
+                                              parameters[3].value,
+                                              parameters[4].value,
+                                              parameters[5].value,
+                                              parameters[6].value,
+                                              parameters[7].value,
+                                              parameters[8].valueAsText)
         return out_grg
 
 class CreateGRGFromPoint(object):
@@ -326,6 +349,14 @@ class CreateGRGFromPoint(object):
         output_features.symbology = os.path.join(os.path.dirname(os.path.dirname(__file__)),
                                                  "layers", "GRG.lyr")
 
+        result_cache_folder = arcpy.Parameter(name='result_cache_folder',
+                                              displayName='Result Cache Folder',
+                                              direction='Input',
+                                              datatype='DEFolder',
+                                              parameterType='Optional',
+                                              enabled=True,
+                                              multiValue=False)
+
         return [input_start_location,
                 horizontal_cells,
                 vertical_cells,
@@ -336,7 +367,8 @@ class CreateGRGFromPoint(object):
                 label_type,
                 label_seperator,
                 grid_angle,
-                output_features]
+                output_features,
+                result_cache_folder]
 
     def updateParameters(self, parameters):
         '''
@@ -372,12 +404,13 @@ class CreateGRGFromPoint(object):
         labelSeparator    = parameters[8].value #Labeling Seperator
         gridRotationAngle = parameters[9].value #Grid Angle
         output            = parameters[10].valueAsText  #Output
+        cacheFolder       = parameters[11].valueAsText  #Result Cache Folder
 
-        out_grg = GRGUtilities.GRGFromPoint(pointTargets, \
+        out_grg = _GRGUtilities().GRGFromPoint(pointTargets, \
                 rows, cols, \
                 cellWidth, cellHeight, cellUnits, \
                 labelStart, labelStyle, labelSeparator, gridRotationAngle, \
-                output)
+                output, cacheFolder)
 
         return out_grg
 
@@ -385,6 +418,10 @@ class CreateReferenceSystemGRGFromArea(object):
     '''
     Build polygon features of MGRS or USNG gridded reference graphics.
     '''
+    # the last grid estimate made by updateMessages, with the input area,
+    # grid size and densification tolerance it was made for
+    _estimate = (None, None)
+
     def __init__(self):
         ''' Define Reference Grid From Area constructor '''
         self.label = "Create Reference System GRG From Area"
@@ -400,6 +437,9 @@ class CreateReferenceSystemGRGFromArea(object):
                               "USNG"]
         self.LARGE_GRID_OPTIONS = ["NO_LARGE_GRIDS",
                                    "ALLOW_LARGE_GRIDS"]
+        self.PARTITION_OPTIONS = ["NO_PARTITIONS",
+                                  "PARTITION_BY_GRID_ZONE",
+                                  "PARTITION_BY_100K_SQUARE"]
 
     def getParameterInfo(self):
         '''
@@ -462,11 +502,43 @@ class CreateReferenceSystemGRGFromArea(object):
         large_grid_handling.filter.list = self.LARGE_GRID_OPTIONS
         large_grid_handling.value = large_grid_handling.filter.list[0]
 
+        output_partitioning = arcpy.Parameter(name='output_partitioning',
+                                           displayName='Output Partitioning',
+                                           direction='Input',
+                                           datatype='GPString',
+                                           parameterType='Optional',
+                                           enabled=True,
+                                           multiValue=False)
+        output_partitioning.filter.type = 'ValueList'
+        output_partitioning.filter.list = self.PARTITION_OPTIONS
+        output_partitioning.value = output_partitioning.filter.list[0]
+
+        densify_tolerance = arcpy.Parameter(name='densify_tolerance',
+                                            displayName='Densification Tolerance (meters)',
+                                            direction='Input',
+                                            datatype='GPDouble',
+                                            parameterType='Optional',
+                                            enabled=True,
+                                            multiValue=False)
+
+        resume_previous_run = arcpy.Parameter(name='resume_previous_run',
+                                              displayName='Resume Previous Run',
+                                              direction='Input',
+                                              datatype='GPBoolean',
+                                              parameterType='Optional',
+                                              enabled=True,
+                                              multiValue=False)
+        resume_previous_run.filter.list = ['RESUME', 'NO_RESUME']
+        resume_previous_run.value = False
+
         return [input_area_features,
                 input_grid_reference_system,
                 grid_square_size,
                 output_grid_features,
-                large_grid_handling]
+                large_grid_handling,
+                output_partitioning,
+                densify_tolerance,
+                resume_previous_run]
 
     def updateParameters(self, parameters):
         '''
@@ -482,6 +554,35 @@ class CreateReferenceSystemGRGFromArea(object):
         Modify the messages created by internal validation for each tool
         parameter.  This method is called after internal validation
         '''
+        # a resumed run writes to the existing output of the previous run, it
+        # doesn't need the Overwrite Outputs option
+        if parameters[7].value and parameters[3].value and arcpy.Exists(parameters[3].valueAsText):
+            parameters[3].clearMessage()
+
+        # predict the size of the grid, so large grids are reported before the tool runs.
+        # Reading the input area is slow, so the grid is only estimated again when the
+        # input area, grid size or densification tolerance has changed
+        if parameters[0].value and parameters[2].value and not parameters[0].hasError():
+            refGrid = _RefGrid()
+            estimateParameters = [parameters[0], parameters[2], parameters[6]]
+            key = tuple(parameter.valueAsText for parameter in estimateParameters)
+            changed = any(parameter.altered and not parameter.hasBeenValidated for parameter in estimateParameters)
+            if changed or CreateReferenceSystemGRGFromArea._estimate[0] != key:
+                try:
+                    estimate = refGrid.EstimateGrid(parameters[0].value,
+                                                    parameters[2].valueAsText,
+                                                    parameters[6].value)
+                except Exception:
+                    # the input area can't be read yet, the tool checks it again when it runs
+                    estimate = None
+                CreateReferenceSystemGRGFromArea._estimate = (key, estimate)
+            estimate = CreateReferenceSystemGRGFromArea._estimate[1]
+            allowLargeGrids = parameters[4].valueAsText == "ALLOW_LARGE_GRIDS"
+            largeGrid = refGrid.LargeGridMessage(estimate, parameters[2].valueAsText, allowLargeGrids)
+            if largeGrid and not allowLargeGrids:
+                parameters[2].setErrorMessage(largeGrid)
+            elif largeGrid:
+                parameters[2].setWarningMessage(largeGrid)
         return
 
     def isLicensed(self):
@@ -491,10 +592,13 @@ class CreateReferenceSystemGRGFromArea(object):
     def execute(self, parameters, messages):
         ''' execute for toolbox'''
 
-        RG = RefGrid.ReferenceGrid(parameters[0].value,
-                                   parameters[1].value,
-                                   parameters[2].value,
-                                   parameters[4].value)
+        RG = _RefGrid().ReferenceGrid(parameters[0].value,
+                                     parameters[1].value,
+                                     parameters[2].value,
+                                     parameters[4].value,
+                                     parameters[5].value,
+                                     parameters[6].value,
+                                     parameters[7].value)
         out_grid = RG.Build(parameters[3].value)
         return out_grid
 
@@ -507,8 +611,11 @@ class NumberFeatures(object):
         Number Features constructor
         '''
         self.label = "Number Features"
-        self.description = "Number input point features within a selected area."
+        self.description = "Number input point features within a selected area, in rows from the top left unless another Numbering Order is chosen."
         self.category = "Gridded Reference Graphic"
+        self.NUMBERING_ORDER_OPTIONS = ["Row-Major",
+                                        "Hilbert",
+                                        "Nearest-Neighbor"]
 
     def getParameterInfo(self):
         '''
@@ -561,10 +668,31 @@ class NumberFeatures(object):
         output_features.symbology = os.path.join(os.path.dirname(os.path.dirname(__file__)),
                                                  "layers", layerFile)
 
+        numbering_order = arcpy.Parameter(name='numbering_order',
+                                          displayName='Numbering Order',
+                                          direction='Input',
+                                          datatype='GPString',
+                                          parameterType='Optional',
+                                          enabled=True,
+                                          multiValue=False)
+        numbering_order.filter.type = 'ValueList'
+        numbering_order.filter.list = self.NUMBERING_ORDER_OPTIONS
+        numbering_order.value = numbering_order.filter.list[0]
+
+        row_tolerance = arcpy.Parameter(name='row_tolerance',
+                                        displayName='Row Tolerance (map units)',
+                                        direction='Input',
+                                        datatype='GPDouble',
+                                        parameterType='Optional',
+                                        enabled=True,
+                                        multiValue=False)
+
         return [input_area_features,
                 input_number_features,
                 field_to_number,
-                output_features]
+                output_features,
+                numbering_order,
+                row_tolerance]
 
     def updateParameters(self, parameters):
         '''
@@ -590,11 +718,15 @@ class NumberFeatures(object):
         pointFeatures  = parameters[1].value
         numberingField = parameters[2].value
         outputFeatureClass = parameters[3].value
+        numberingOrder = parameters[4].valueAsText
+        rowTolerance = parameters[5].value
 
-        output_fc = GRGUtilities.NumberFeatures(areaToNumber,
+        output_fc = _GRGUtilities().NumberFeatures(areaToNumber,
                         pointFeatures,
                         numberingField,
-                        outputFeatureClass)
+                        outputFeatureClass,
+                        numberingOrder,
+                        rowTolerance)
 
         return output_fc
 
@@ -36,6 +36,9 @@ import traceback
 import arcpy
 from arcpy import env
 from . import Utilities
+from . import GRGGrid
+from . import GRGCache
+from . import NumberingOrder
 
 DEBUG = True
 appEnvironment = None
@@ -87,206 +90,83 @@ def findLayerByName(layerName):
 
 def ColIdxToXlName_CanvasAreaGRG(index):
     ''' Converts an index into a letter, labeled like excel columns, A to Z, AA to ZZ, etc.'''
-    ordA = ord('A')
-    ordZ = ord('Z')
-    len = ordZ - ordA + 1
-    s = ""
-    while(int(index) >= 0):
-        s = chr(int(index) % len + ordA) + s
-        index = math.floor(int(index) / len) - 1
-    return s
+    return GRGGrid.ColumnLetters(index)
 
 
 def ColIdxToXlName_PointTargetGRG(index):
     ''' Converts an index into a letter, labeled like excel columns, A to Z, AA to ZZ, etc. '''
     if index < 1:
         raise ValueError("Index is too small")
-    result = ""
-    while True:
-        if index > 26:
-            index, r = divmod(index - 1, 26)
-            result = chr(r + ord('A')) + result
-        else:
-            return chr(index + ord('A') - 1) + result
-
-
-'''
-Sample adapted/taken from: https://github.com/usgs/arcgis-sample/blob/master/scripts/RotateFeatureClass.py
-License: Public Domain: https://github.com/usgs/arcgis-sample/blob/master/LICENSE.txt
-'''
-def RotateFeatureClass(inputFC, outputFC,
-                       angle=0, pivot_point=None):
-    """Rotate Feature Class
-
-    inputFC     Input features
-    outputFC    Output feature class
-    angle       Angle to rotate, in degrees
-    pivot_point X,Y coordinates (as space-separated string)
-                Default is lower-left of inputFC
-
-    As the output feature class no longer has a "real" xy locations,
-    after rotation, it no coordinate system defined.
-    """
-
-
-    def RotateXY(x, y, xc=0, yc=0, angle=0, units="DEGREES"):
-        """Rotate an xy cooordinate about a specified origin
-        x,y      xy coordinates
-        xc,yc   center of rotation
-        angle   angle
-        units    "DEGREES" (default) or "RADIANS"
-        """
-        x = x - xc
-        y = y - yc
-        # make angle clockwise (like Rotate_management)
-        angle = angle * -1
-        if units == "DEGREES":
-            angle = math.radians(angle)
-        xr = (x * math.cos(angle)) - (y * math.sin(angle)) + xc
-        yr = (x * math.sin(angle)) + (y * math.cos(angle)) + yc
-        return xr, yr
-
-    # temp names for cleanup
-    env_file = None
-    lyrFC, lyrTmp = [None] * 2  # layers
-    tmpFC  = None # temp dataset
-
-    try:
-        # process parameters
-        try:
-            xcen, ycen = [float(xy) for xy in pivot_point.split()]
-            pivot_point = xcen, ycen
-        except:
-            # if pivot point was not specified, get it from
-            # the lower-left corner of the feature class
-            ext = arcpy.Describe(inputFC).extent
-            xcen, ycen  = ext.XMin, ext.YMin
-            pivot_point = xcen, ycen
-
-        angle = float(angle)
-
-        # set up environment
-        env_file = arcpy.CreateScratchName("xxenv",".xml","file",
-                                           os.environ["TEMP"])
-        arcpy.gp.SaveSettings(env_file)
-
-        WKS = env.workspace
-        if not WKS:
-            if os.path.dirname(outputFC):
-                WKS = os.path.dirname(outputFC)
-            else:
-                WKS = os.path.dirname(
-                    arcpy.Describe(inputFC).catalogPath)
-        env.workspace = env.scratchWorkspace = WKS
-
-        # Disable any GP environment clips
-        arcpy.ClearEnvironment("extent")
-
-        # get feature class properties
-        lyrFC = 'lyrFC'
-        arcpy.MakeFeatureLayer_management(inputFC, lyrFC)
-        dFC = arcpy.Describe(lyrFC)
-        shpField = dFC.shapeFieldName
-        shpType = dFC.shapeType
-
-        # create temp feature class
-        tmpFC = arcpy.CreateScratchName("xxfc", "", "featureclass")
-
-        # Create Feature Class using inputFC as template (so will have "Grid" field)
-        arcpy.CreateFeatureclass_management(os.path.dirname(tmpFC),
-                                            os.path.basename(tmpFC),
-                                            shpType,
-                                            inputFC)
-        lyrTmp = 'lyrTmp'
-        arcpy.MakeFeatureLayer_management(tmpFC, lyrTmp)
-
-        ## WORKAROUND: removed below because it was creating a schema lock until Pro/arcpy exited
-        ## set up grid field
-        #gridField = "Grid"
-        #arcpy.AddField_management(lyrTmp, gridField, "TEXT")
-        #arcpy.DeleteField_management(lyrTmp, 'ID')
-
-        # rotate the feature class coordinates for each feature, and each feature part
-
-        # open read and write cursors
-        updateFields = ['SHAPE@','Grid']
-        arcpy.AddMessage('Rotating temporary dataset')
-
-        parts = arcpy.Array()
-        rings = arcpy.Array()
-        ring = arcpy.Array()
-
-        with arcpy.da.SearchCursor(lyrFC, updateFields) as inRows,\
-          arcpy.da.InsertCursor(lyrTmp, updateFields) as outRows:
-            for inRow in inRows:
-                shp = inRow[0] # SHAPE
-                p = 0
-                for part in shp:
-                    for pnt in part:
-                        if pnt:
-                            x, y = RotateXY(pnt.X, pnt.Y, xcen, ycen, angle)
-                            ring.add(arcpy.Point(x, y, pnt.ID))
-                        else:
-                            # if we have a ring, save it
-                            if len(ring) > 0:
-                                rings.add(ring)
-                                ring.removeAll()
-                    # we have our last ring, add it
-                    rings.add(ring)
-                    ring.removeAll()
-                    # if only one, remove nesting
-                    if len(rings) == 1: rings = rings.getObject(0)
-                    parts.add(rings)
-                    rings.removeAll()
-                    p += 1
-
-                # if only one, remove nesting
-                if len(parts) == 1: parts = parts.getObject(0)
-                if dFC.shapeType == "Polyline":
-                    shp = arcpy.Polyline(parts)
-                else:
-                    shp = arcpy.Polygon(parts)
-                parts.removeAll()
-
-                gridValue = inRow[1] # GRID string
-                outRows.insertRow([shp, gridValue])  # write row to output
-
-        arcpy.AddMessage('Merging temporary, rotated dataset with output')
-        env.qualifiedFieldNames = False
-        arcpy.Merge_management(lyrTmp, outputFC)
-
-    except MsgError as xmsg:
-        arcpy.AddError(str(xmsg))
-    except arcpy.ExecuteError:
-        tbinfo = traceback.format_tb(sys.exc_info()[2])[0]
-        arcpy.AddError(tbinfo.strip())
-        arcpy.AddError(arcpy.GetMessages())
-        numMsg = arcpy.GetMessageCount()
-        for i in range(0, numMsg):
-            arcpy.AddReturnMessage(i)
-    except Exception as xmsg:
-        tbinfo = traceback.format_tb(sys.exc_info()[2])[0]
-        arcpy.AddError(tbinfo + str(xmsg))
-    finally:
-        # reset environment
-        if env_file: arcpy.gp.LoadSettings(env_file)
-        # Clean up temp files
-        for f in [lyrFC, lyrTmp, tmpFC, env_file]:
-            try:
-                if f and arcpy.Exists(f) :
-                    arcpy.Delete_management(f)
-            except:
-                pass
-
-        # return pivot point
-        try:
-            pivot_point = "{0} {1}".format(*pivot_point)
-        except:
-            pivot_point = None
-
-        return pivot_point
-
-    # END RotateFeatureClass
+    return GRGGrid.ColumnLetters(index - 1)
+
+
+# Meters per cell unit
+CELL_UNITS_TO_METERS = {"Meters": 1.0,
+                        "Feet": 1.0 / 3.2808,
+                        "Kilometers": 1000.0,
+                        "Miles": 1609.344,
+                        "Yards": 0.9144,
+                        "Nautical Miles": 1852.0}
+
+def CellSizeInMeters(cellWidth, cellHeight, cellUnits):
+    ''' Converts the cell width and height from cell units to meters '''
+    factor = CELL_UNITS_TO_METERS.get(cellUnits, 1.0)
+    return float(cellWidth) * factor, float(cellHeight) * factor
+
+def GeometryVertices(geometry):
+    ''' (x, y) coordinates of all the vertices of a geometry '''
+    if geometry is None:
+        return []
+    if geometry.type == "point":
+        return [(geometry.firstPoint.X, geometry.firstPoint.Y)]
+    if geometry.type == "multipoint":
+        return [(point.X, point.Y) for point in geometry if point]
+    return [(point.X, point.Y) for part in geometry for point in part if point]
+
+def CachedGridCells(cacheFolder, keyInputs, makeCells):
+    '''
+    (ring, label) cells of a GRG from the result cache in cacheFolder, if the
+    same keyInputs were cached before, otherwise from makeCells(), and cached.
+    Without a cacheFolder the cells are just made.
+    '''
+    if not cacheFolder:
+        return makeCells()
+    cache = GRGCache.GRGCache(str(cacheFolder))
+    key = GRGCache.CacheKey(*keyInputs)
+    cells = cache.Get(key)
+    if cells is not None:
+        arcpy.AddMessage("Writing {0} cells from the GRG cache".format(len(cells)))
+        return cells
+    return cache.Put(key, makeCells())
+
+def CreateGridFeatureClass(featureClass, spatialReference, aoiIdField=None):
+    '''
+    Create an empty polygon feature class, with a Grid label field, for GRG cells,
+    and an AOI id field for the cells of batches of GRGs
+    '''
+    outPath, outName = os.path.split(featureClass)
+    arcpy.CreateFeatureclass_management(outPath, outName, "POLYGON", spatial_reference=spatialReference)
+    arcpy.AddField_management(featureClass, "Grid", "TEXT")
+    if aoiIdField:
+        arcpy.AddField_management(featureClass, aoiIdField, "TEXT")
+    return featureClass
+
+def WriteGridCells(featureClass, cells, spatialReference, fields=None):
+    '''
+    Insert (ring, label) GRG cells into featureClass with a single insert cursor,
+    or (ring, label, value, ...) cells when fields names the fields after Grid
+    '''
+    array = arcpy.Array()
+    point = arcpy.Point()
+    with arcpy.da.InsertCursor(featureClass, ["SHAPE@", "Grid"] + list(fields or [])) as cursor:
+        for cell in cells:
+            for x, y in cell[0]:
+                point.X = x
+                point.Y = y
+                array.add(point)
+            cursor.insertRow([arcpy.Polygon(array, spatialReference)] + list(cell[1:]))
+            array.removeAll()
+    return featureClass
 
 def GRGFromArea(AOI,
                 cellWidth,
@@ -295,252 +175,59 @@ def GRGFromArea(AOI,
                 labelStartPos,
                 labelStyle,
                 labelSeperator,
-                outputFeatureClass):
-    '''Create Gridded Reference Graphic (GRG) from area input.'''
+                outputFeatureClass,
+                cacheFolder=None):
+    '''
+    Create Gridded Reference Graphic (GRG) from area input.
+    With a cacheFolder, the cells are written from the GRG result cache
+    when the same GRG was made before.
+    '''
 
-    fishnet = os.path.join("in_memory", "fishnet")
     DEBUG = True
-    # GLOBALS
-    mxd = None
-    df = None
-    aprx = None
-    mapList = None
-    scratch = None
-    fc_WM = None
 
     try:
-        #UPDATE
+        # The application is probed once per process (see Utilities.GetApplication),
+        # the current project or map document is not needed to create the grid
         appEnvironment = Utilities.GetApplication()
         if DEBUG == True: arcpy.AddMessage("App environment: " + appEnvironment)
 
-        fc = os.path.join("in_memory", "AOI")
-        arcpy.CopyFeatures_management(AOI, fc)
-
-        if appEnvironment == "ARCGIS_PRO":
-            from arcpy import mp
-            aprx = arcpy.mp.ArcGISProject("CURRENT")
-            mapList = aprx.listMaps()[0]
-        #else: #Update for automated test
-        if appEnvironment == "ARCMAP":
-            from arcpy import mapping
-            mxd = arcpy.mapping.MapDocument('CURRENT')
-            df = arcpy.mapping.ListDataFrames(mxd)[0]
-
         arcpy.env.overwriteOutput = True
-        if arcpy.env.scratchWorkspace:
-            scratch = arcpy.env.scratchWorkspace
-        else:
-            scratch = r"%scratchGDB%"
-
-        #If AOI is not in WebMercator, re-project to it
-        if arcpy.Describe(AOI).spatialReference.name != "WGS_1984_Web_Mercator_Auxiliary_Sphere":
-            fc_WM = os.path.join(scratch, "AOI_WM")
-            outCS = arcpy.SpatialReference(3857) #the code for WGS84 Web Mercator
-            arcpy.Project_management(fc, fc_WM, outCS)
-            fc = fc_WM
 
-        # From the template extent, create a polygon that we can project into a localized World Azimuthal Equidistan
-        if DEBUG == True: arcpy.AddMessage("Getting extent info...")
+        cellWidth, cellHeight = CellSizeInMeters(cellWidth, cellHeight, cellUnits)
 
         '''
-        ' If cell units are feet convert to meters
-        '''
-        if (cellUnits == "Feet"):
-            cellWidth = float(cellWidth) / 3.2808
-            cellHeight = float(cellHeight) / 3.2808
-
-        '''
-        ' If cell units are kilometers convert to meters
-        '''
-        if (cellUnits == "Kilometers"):
-            cellWidth = float(cellWidth) * 1000
-            cellHeight = float(cellHeight) * 1000
-
-        '''
-        ' If cell units are miles convert to meters
-        '''
-        if (cellUnits == "Miles"):
-            cellWidth = float(cellWidth) * 1609.344
-            cellHeight = float(cellHeight) * 1609.344
-
-        '''
-        ' If cell units are yards convert to meters
-        '''
-        if (cellUnits == "Yards"):
-            cellWidth = float(cellWidth) * 0.9144
-            cellHeight = float(cellHeight) * 0.9144
-
-        '''
-        ' If cell units are Nautical Miles convert to meters
-        '''
-        if (cellUnits == "Nautical Miles"):
-            cellWidth = float(cellWidth) * 1852
-            cellHeight = float(cellHeight) * 1852
-
-        '''
-        ' create a minimum bounding rectangle around the AOI
-        ' The use of the MBG_FIELDS option in MinimumBoundingGeometry_management
-        ' tool also creates a field that has the shape orientation
+        ' Read the AOI vertices, projected to Web Mercator in memory by the cursor,
+        ' and find the minimum bounding rectangle around them with rotating calipers
         '''
         arcpy.AddMessage("Getting Minimum Bounding Geometry that fits the Area of Interest")
-        minBound = os.path.join("in_memory","minBound")
-        arcpy.MinimumBoundingGeometry_management(fc, minBound, 'RECTANGLE_BY_AREA','#','#','MBG_FIELDS')
-
-        '''
-        ' Extract the minimum bounding rectangle orienatation angle to a variable
-        '''
-        for row in arcpy.da.SearchCursor(minBound,["MBG_Orientation","MBG_LENGTH","MBG_WIDTH"]):
-            orientation = row[0]
-            arcpy.AddMessage("Orientation Angle: {0}".format(str(orientation)))
-            if(orientation >= 45 and orientation <= 135):
-                horizontalCells = math.ceil(row[1]/float(cellWidth))
-                verticalCells = math.ceil(row[2]/float(cellHeight))
-            else:
-                verticalCells = math.ceil(row[1]/float(cellWidth))
-                horizontalCells = math.ceil(row[2]/float(cellHeight))
+        spatialReference = arcpy.SpatialReference(3857) #the code for WGS84 Web Mercator
+        with arcpy.da.SearchCursor(AOI, ["SHAPE@"], spatial_reference=spatialReference) as cursor:
+            points = [point for row in cursor for point in GeometryVertices(row[0])]
+        if not points:
+            raise Exception("The input area must contain at least one feature.")
+
+        def makeCells():
+            origin, xAxis, yAxis, verticalCells, horizontalCells = GRGGrid.AreaGrid(points, cellWidth, cellHeight)
+            arcpy.AddMessage("Orientation Angle: {0}".format(str(math.degrees(math.atan2(xAxis[0], xAxis[1])))))
             arcpy.AddMessage('Creating Grid {0} x {1}'.format(horizontalCells,verticalCells))
 
-        arcpy.AddMessage(labelStartPos)
-        '''
-        ' Set up labeling depending on start position
-        '''
-        labelNumber = 0
-        letterIndex = 0
-        secondLetterIndex = 0
-
-        if labelStartPos == "Upper-Left":
-            letterIndex = verticalCells - 1
-            secondLetterIndex = -1
-            if labelStyle != 'Numeric':
-                labelNumber = 0
-            else:
-                labelNumber = (verticalCells - 1) * horizontalCells
-        elif labelStartPos == "Upper-Right":
-            letterIndex = verticalCells - 1
-            secondLetterIndex = horizontalCells
-            if labelStyle != 'Numeric':
-                labelNumber = horizontalCells + 1
-            else:
-                labelNumber = (verticalCells * horizontalCells) + 1
-        elif labelStartPos == "Lower-Right":
-            letterIndex = 0
-            secondLetterIndex = horizontalCells
-            labelNumber = horizontalCells + 1
-        elif labelStartPos == "Lower-Left":
-            letterIndex = 0
-            secondLetterIndex = -1
-            labelNumber = 0
+            arcpy.AddMessage(labelStartPos)
 
-        '''
-        ' Explode the minimum bounding rectangle to points
-        '''
-        with arcpy.da.SearchCursor(minBound, 'SHAPE@XY', explode_to_points=True) as cursor:
-            pts = [r[0] for r in cursor][0:4]
+            '''
+            ' Create the grid cells over the rectangle, labeled from their row and column
+            '''
+            arcpy.AddMessage("Creating Fishnet Grid...")
+            labels = GRGGrid.GridLabels(verticalCells, horizontalCells, labelStartPos, labelStyle, labelSeperator)
+            return ((ring, labels[row][column]) for row, column, ring in
+                    GRGGrid.GridCellsOnAxes(origin, xAxis, yAxis, cellWidth, cellHeight,
+                                            verticalCells, horizontalCells, labelStartPos))
 
-        '''
-        ' Because the fishnet tool always creates a non rotated fishnet before it applies
-        ' its rotation we need to determine what the opposite point location would be if the
-        ' minimum polygon was not rotated
-        '''
-        if orientation < 45:
-            angle = math.radians(orientation)
-            x = float(pts[2][0]) - float(pts[0][0])
-            y = float(pts[2][1]) - float(pts[0][1])
-            xr = (x * math.cos(angle)) - (y * math.sin(angle)) + float(pts[0][0])
-            yr = (x * math.sin(angle)) + (y * math.cos(angle)) + float(pts[0][1])
-            origin = str(pts[0][0]) + ' ' + str(pts[0][1])
-            yaxis =  str(pts[1][0]) + ' ' + str(pts[1][1])
-        elif orientation >= 45 and orientation <= 135:
-            angle = math.radians((90 - orientation) * -1)
-            x = float(pts[1][0]) - float(pts[3][0])
-            y = float(pts[1][1]) - float(pts[3][1])
-            xr = (x * math.cos(angle)) - (y * math.sin(angle)) + float(pts[3][0])
-            yr = (x * math.sin(angle)) + (y * math.cos(angle)) + float(pts[3][1])
-            origin = str(pts[3][0]) + ' ' + str(pts[3][1])
-            yaxis =  str(pts[0][0]) + ' ' + str(pts[0][1])
-        else:
-            angle = math.radians((180 - orientation) * -1)
-            x = float(pts[0][0]) - float(pts[2][0])
-            y = float(pts[0][1]) - float(pts[2][1])
-            xr = (x * math.cos(angle)) - (y * math.sin(angle)) + float(pts[2][0])
-            yr = (x * math.sin(angle)) + (y * math.cos(angle)) + float(pts[2][1])
-            origin = str(pts[2][0]) + ' ' + str(pts[2][1])
-            yaxis =  str(pts[3][0]) + ' ' + str(pts[3][1])
-
-        oppositeCorner = str(xr) + " " + str(yr)
-
-        '''
-        ' Now use the CreateFishnet_management tool to create the desired grid
-        '''
-        arcpy.AddMessage("Creating Fishnet Grid...")
-        arcpy.CreateFishnet_management(fishnet, origin, yaxis, str(cellWidth), str(cellHeight), 0, 0, oppositeCorner, "NO_LABELS", fc, "POLYGON")
-
-        '''
-        ' Add a field which will be used to add the grid labels
-        '''
-        arcpy.AddMessage("Adding field for labeling the grid")
-        gridField = "Grid"
-        arcpy.AddField_management(fishnet, gridField, "TEXT")
-
-        '''
-        ' Loop through features and label
-        '''
-
-        with arcpy.da.UpdateCursor(fishnet, ['OID','Grid']) as cursor:
-            verticalCount = 0
-            horizontalCount = 0
-            for row in cursor:
-                if labelStartPos == "Lower-Left" or labelStartPos == 'Upper-Left':
-                    labelNumber = labelNumber + 1
-                    secondLetterIndex = secondLetterIndex + 1
-                else:
-                    labelNumber = labelNumber - 1
-                    secondLetterIndex = secondLetterIndex - 1
-
-                letter = ColIdxToXlName_CanvasAreaGRG(int(letterIndex))
-                secondLetter = ColIdxToXlName_CanvasAreaGRG(int(secondLetterIndex))
-
-                if (labelStyle == "Alpha-Numeric"):
-                    row[1] = letter + str(int(labelNumber))
-                elif (labelStyle == "Alpha-Alpha"):
-                    row[1] = letter + labelSeperator + secondLetter
-                elif (labelStyle == "Numeric"):
-                    row[1] = labelNumber
-
-                cursor.updateRow(row)
-
-                horizontalCount = horizontalCount + 1
-
-                if horizontalCount >= horizontalCells:
-                    horizontalCount = 0
-                    verticalCount = verticalCount + 1
-                    if labelStartPos == "Upper-Left":
-                        letterIndex = letterIndex - 1
-                        secondLetterIndex = -1
-                        if labelStyle != 'Numeric':
-                            labelNumber = 0
-                        else:
-                            labelNumber = (verticalCells - (verticalCount + 1)) * horizontalCells
-                    elif labelStartPos == "Upper-Right":
-                        letterIndex = letterIndex - 1
-                        secondLetterIndex = horizontalCells
-                        if labelStyle != 'Numeric':
-                            labelNumber = horizontalCells + 1
-                    elif labelStartPos == "Lower-Right":
-                        letterIndex = letterIndex + 1
-                        secondLetterIndex = horizontalCells
-                        if labelStyle != 'Numeric':
-                            labelNumber = horizontalCells + 1
-                        else:
-                            labelNumber = ((verticalCount + 1) * horizontalCells) + 1
-                    elif labelStartPos == "Lower-Left":
-                        letterIndex = letterIndex + 1
-                        secondLetterIndex = -1
-                        if labelStyle != 'Numeric':
-                            labelNumber = 0
-
-        arcpy.CopyFeatures_management(fishnet, outputFeatureClass)
-        arcpy.Delete_management(fishnet)
+        cells = CachedGridCells(cacheFolder,
+                                ("Area", points, cellWidth, cellHeight,
+                                 labelStartPos, labelStyle, labelSeperator),
+                                makeCells)
+        CreateGridFeatureClass(str(outputFeatureClass), spatialReference)
+        WriteGridCells(str(outputFeatureClass), cells, spatialReference)
 
         # Get and label the output feature
         #TODO: Update once applying symbology in Pro is fixed.
@@ -579,13 +266,6 @@ def GRGFromArea(AOI,
         print(pymsg + "\n")
         print(msgs)
 
-    finally:
-        try:
-            if arcpy.Exists(os.path.join(scratch, "AOI_WM")):
-                arcpy.Delete_management(fc_WM)
-        except:
-            pass
-
 def GRGFromPoint(starting_point,
                  horizontal_cells,
                  vertical_cells,
@@ -596,8 +276,13 @@ def GRGFromPoint(starting_point,
                  label_style,
                  labelSeperator,
                  gridAngle,
-                 output_feature_class):
-    ''' Create Gridded Reference Graphic (GRG) from point input.'''
+                 output_feature_class,
+                 cacheFolder=None):
+    '''
+    Create Gridded Reference Graphic (GRG) from point input.
+    With a cacheFolder, the cells are written from the GRG result cache
+    when the same GRG was made before.
+    '''
 
 
     targetPointOrigin = starting_point
@@ -611,27 +296,15 @@ def GRGFromPoint(starting_point,
     rotation = gridAngle
     outputFeatureClass = output_feature_class
 
-    tempOutput = os.path.join("in_memory", "tempFishnetGrid")
     DEBUG = True
-    mxd = None
-    df, aprx = None, None
-    point_WM = None
-    scratch = None
 
     try:
-        #UPDATE
+        # The application is probed once per process (see Utilities.GetApplication),
+        # the current project or map document is not needed to create the grid
         appEnvironment = Utilities.GetApplication()
         if DEBUG == True: arcpy.AddMessage("App environment: " + appEnvironment)
 
-        if appEnvironment == "ARCGIS_PRO":
-            from arcpy import mp
-            aprx = arcpy.mp.ArcGISProject("CURRENT")
-            mapList = aprx.listMaps()[0]
-        elif appEnvironment == "ARCMAP":
-            from arcpy import mapping
-            mxd = arcpy.mapping.MapDocument('CURRENT')
-            df = arcpy.mapping.ListDataFrames(mxd)[0]
-        else:
+        if appEnvironment not in [Utilities.PLATFORM_PRO, Utilities.PLATFORM_DESKTOP]:
             if DEBUG == True: arcpy.AddMessage("Non-map application...")
 
         numberOfFeatures = arcpy.GetCount_management(targetPointOrigin)
@@ -642,62 +315,19 @@ def GRGFromPoint(starting_point,
             arcpy.AddMessage("More than one feature detected for the start location, last feature entered will be used.")
 
         arcpy.env.overwriteOutput = True
-        if arcpy.env.scratchWorkspace:
-            scratch = arcpy.env.scratchWorkspace
-        else:
-            scratch = r"%scratchGDB%"
-
-        #If starting point is not in WebMercator, re-project to it
-        if arcpy.Describe(targetPointOrigin).spatialReference.name != "WGS_1984_Web_Mercator_Auxiliary_Sphere":
-            point_WM = os.path.join(scratch, "GRG_POINT_WM")
-            outCS = arcpy.SpatialReference(3857) #the code for WGS84 Web Mercator
-            arcpy.Project_management(targetPointOrigin, point_WM, outCS)
-            targetPointOrigin = point_WM
-            arcpy.AddMessage("Projected starting point to Web Mercator.")
-
-        '''
-        ' If cell units are feet convert to meters
-        '''
-        if (cellUnits == "Feet"):
-            cellWidth = float(cellWidth) / 3.2808
-            cellHeight = float(cellHeight) / 3.2808
-
-        '''
-        ' If cell units are kilometers convert to meters
-        '''
-        if (cellUnits == "Kilometers"):
-            cellWidth = float(cellWidth) * 1000
-            cellHeight = float(cellHeight) * 1000
-
-        '''
-        ' If cell units are miles convert to meters
-        '''
-        if (cellUnits == "Miles"):
-            cellWidth = float(cellWidth) * 1609.344
-            cellHeight = float(cellHeight) * 1609.344
-
-        '''
-        ' If cell units are yards convert to meters
-        '''
-        if (cellUnits == "Yards"):
-            cellWidth = float(cellWidth) * 0.9144
-            cellHeight = float(cellHeight) * 0.9144
-
-        '''
-        ' If cell units are Nautical Miles convert to meters
-        '''
-        if (cellUnits == "Nautical Miles"):
-            cellWidth = float(cellWidth) * 1852
-            cellHeight = float(cellHeight) * 1852
 
+        cellWidth, cellHeight = CellSizeInMeters(cellWidth, cellHeight, cellUnits)
 
-        # Get the coordinates of the point inputExtentDrawnFromMap.
-        rows = arcpy.SearchCursor(targetPointOrigin)
-        extent = None
-        for row in rows:
-            shape = row.getValue("SHAPE")
-            extent = shape.extent
-        pointExtents = str.split(str(extent))
+        # Get the coordinates of the point inputExtentDrawnFromMap,
+        # projected to Web Mercator in memory by the cursor if needed
+        spatialReference = arcpy.Describe(targetPointOrigin).spatialReference
+        if spatialReference.name != "WGS_1984_Web_Mercator_Auxiliary_Sphere":
+            spatialReference = arcpy.SpatialReference(3857) #the code for WGS84 Web Mercator
+            arcpy.AddMessage("Projecting starting point to Web Mercator.")
+        pointExtents = None
+        with arcpy.da.SearchCursor(targetPointOrigin, ["SHAPE@XY"], spatial_reference=spatialReference) as rows:
+            for row in rows:
+                pointExtents = [str(row[0][0]), str(row[0][1])]
 
         ''' This seemed to be shifting the grid when it was not required so commented out
 
@@ -726,82 +356,29 @@ def GRGFromPoint(starting_point,
 
         '''
 
-        # From the template extent, get the origin, y axis, and opposite corner coordinates
-        rightCorner =  float(pointExtents[0]) + ((float(cellWidth) * float(numberCellsVert)) /2.0)
+        # From the template extent, get the origin (lower left corner) of the grid
         leftCorner = float(pointExtents[0]) - ((float(cellWidth) * float(numberCellsVert)) /2.0)
-        topCorner = float(pointExtents[1]) + ((float(cellHeight) * float(numberCellsHo)) /2.0)
         bottomCorner = float(pointExtents[1]) - ((float(cellHeight) * float(numberCellsHo)) /2.0)
-        originCoordinate = str(leftCorner) + " " + str(bottomCorner)
-        yAxisCoordinate = str(leftCorner) + " " + str(bottomCorner + 10)
-        oppCornerCoordinate = str(rightCorner) + " " + str(topCorner)
-        fullExtent = str(leftCorner) + " " + str(bottomCorner) + " " + str(rightCorner) + " " + str(topCorner)
-
-        # Set the start position for labeling
-        startPos = None
-        if (labelStartPos == "Upper-Right"):
-            startPos = "UR"
-        elif (labelStartPos == "Upper-Left"):
-            startPos = "UL"
-        elif (labelStartPos == "Lower-Left"):
-            startPos = "LL"
-        elif (labelStartPos == "Lower-Right"):
-            startPos = "LR"
 
         arcpy.AddMessage("Creating Fishnet Grid")
-        env.outputCoordinateSystem = arcpy.Describe(targetPointOrigin).spatialReference
-
-        arcpy.CreateFishnet_management(tempOutput, originCoordinate, yAxisCoordinate, 0, 0, str(numberCellsHo), str(numberCellsVert), oppCornerCoordinate, "NO_LABELS", fullExtent, "POLYGON")
-
-        # Sort the grid upper left to lower right, and delete the in memory one
-        arcpy.AddMessage("Sorting the grid for labeling")
-        tempSort = os.path.join("in_memory", "tempSort")
-        arcpy.Sort_management(tempOutput, tempSort, [["Shape", "ASCENDING"]], startPos)
-        # arcpy.Delete_management("in_memory") #Not sure why we are trying to delete in_memory
-
-        # Add a field which will be used to add the grid labels
-        arcpy.AddMessage("Adding field for labeling the grid")
-        gridField = "Grid"
-        arcpy.AddField_management(tempSort, gridField, "TEXT")
-
-        # Number the fields
-        arcpy.AddMessage("Numbering the grids")
-        letterIndex = 1
-        secondLetterIndex = 1
-        letter = 'A'
-        secondLetter = 'A'
-        number = 1
-        lastY = -9999
-        cursor = arcpy.UpdateCursor(tempSort)
-        for row in cursor:
-            yPoint = row.getValue("SHAPE").firstPoint.Y
-            if (lastY != yPoint) and (lastY != -9999):
-                letterIndex += 1
-                letter = ColIdxToXlName_PointTargetGRG(letterIndex)
-                if (labelStyle != "Numeric"):
-                    number = 1
-                secondLetter = 'A'
-                secondLetterIndex = 1
-            lastY = yPoint
-
-            if (labelStyle == "Alpha-Numeric"):
-                row.setValue(gridField, str(letter) + str(number))
-            elif (labelStyle == "Alpha-Alpha"):
-                row.setValue(gridField, str(letter) + labelSeperator + str(secondLetter))
-            elif (labelStyle == "Numeric"):
-                row.setValue(gridField, str(number))
-
-            cursor.updateRow(row)
-            number += 1
-            secondLetterIndex += 1
-            secondLetter = ColIdxToXlName_PointTargetGRG(secondLetterIndex)
-
-        # Rotate the shape, if needed.
+        env.outputCoordinateSystem = spatialReference
+
+        # Rotate the shape, if needed, about the start point as the cells are computed
         if (rotation != 0):
             arcpy.AddMessage("Rotating the grid")
-            RotateFeatureClass(tempSort, outputFeatureClass, rotation, pointExtents[0] + " " + pointExtents[1])
-        else:
-            arcpy.CopyFeatures_management(tempSort, outputFeatureClass)
-        arcpy.Delete_management(tempSort)
+
+        # Compute the cells and their labels in labeling order, from the label start position
+        pivot = (float(pointExtents[0]), float(pointExtents[1]))
+        cells = CachedGridCells(cacheFolder,
+                                ("Point", spatialReference.name, pivot, numberCellsHo, numberCellsVert,
+                                 cellWidth, cellHeight, labelStartPos, labelStyle, labelSeperator, float(rotation)),
+                                lambda: GRGGrid.GridLabelledCells(leftCorner, bottomCorner, cellWidth, cellHeight,
+                                                                  numberCellsHo, numberCellsVert,
+                                                                  labelStartPos, labelStyle, labelSeperator,
+                                                                  float(rotation), pivot))
+
+        CreateGridFeatureClass(outputFeatureClass, spatialReference)
+        WriteGridCells(outputFeatureClass, cells, spatialReference)
 
         # Get and label the output feature
         #UPDATE
@@ -841,32 +418,191 @@ def GRGFromPoint(starting_point,
         print(pymsg + "\n")
         print(msgs)
 
-    finally:
-        try:
-            if arcpy.Exists(os.path.join(scratch, "GRG_POINT_WM")):
-                arcpy.Delete_management(point_WM)
-        except:
-            pass
+# Field of batch GRG outputs identifying the area or point of each cell
+AOI_ID_FIELD = "AOI_ID"
+
+def RunGridTasks(worker, tasks):
+    '''
+    Yields worker(task) for each of the GRGGrid tasks, in order (see
+    GRGGrid.RunGridTasks). The tasks are run on a pool of worker processes when
+    the Parallel Processing Factor environment is set to more than one process.
+    '''
+    processes = Utilities.ProcessCount(arcpy.env.parallelProcessingFactor)
+    if processes > 1:
+        Utilities.SetPoolExecutable()
+    return GRGGrid.RunGridTasks(worker, tasks, processes)
+
+
+def GRGFromAreas(AOIs,
+                 aoiIdField,
+                 cellWidth,
+                 cellHeight,
+                 cellUnits,
+                 labelStartPos,
+                 labelStyle,
+                 labelSeperator,
+                 outputFeatureClass):
+    '''
+    Create a Gridded Reference Graphic (GRG) for each area of a feature class,
+    all written to one output with the aoiIdField value (default: object ID)
+    of each area in the AOI_ID field.
+    The area vertices are projected in memory as they are read, and the minimum
+    bounding rectangles and grids are computed on a pool of worker processes.
+    '''
+    try:
+        appEnvironment = Utilities.GetApplication()
+        if DEBUG == True: arcpy.AddMessage("App environment: " + appEnvironment)
+
+        arcpy.env.overwriteOutput = True
+        cellWidth, cellHeight = CellSizeInMeters(cellWidth, cellHeight, cellUnits)
+
+        spatialReference = arcpy.SpatialReference(3857) #the code for WGS84 Web Mercator
+        tasks = []
+        idField = aoiIdField if aoiIdField else "OID@"
+        with arcpy.da.SearchCursor(AOIs, [idField, "SHAPE@"], spatial_reference=spatialReference) as cursor:
+            for row in cursor:
+                points = GeometryVertices(row[1])
+                if points:
+                    tasks.append((str(row[0]), points, cellWidth, cellHeight,
+                                  labelStartPos, labelStyle, labelSeperator))
+        if not tasks:
+            raise Exception("The input areas must contain at least one feature.")
+
+        arcpy.AddMessage("Creating {0} grids".format(len(tasks)))
+        CreateGridFeatureClass(outputFeatureClass, spatialReference, AOI_ID_FIELD)
+        cells = (cell for cells in RunGridTasks(GRGGrid.AreaGridTask, tasks) for cell in cells)
+        WriteGridCells(outputFeatureClass, cells, spatialReference, [AOI_ID_FIELD])
+
+        return outputFeatureClass
+
+    except arcpy.ExecuteError:
+        # Get the tool error messages
+        msgs = arcpy.GetMessages()
+        arcpy.AddError(msgs)
+        print(msgs)
+
+    except:
+        # Get the traceback object
+        tb = sys.exc_info()[2]
+        tbinfo = traceback.format_tb(tb)[0]
+
+        # Concatenate information together concerning the error into a message string
+        pymsg = "PYTHON ERRORS:\nTraceback info:\n" + tbinfo + "\nError Info:\n" + str(sys.exc_info()[1])
+        msgs = "ArcPy ERRORS:\n" + arcpy.GetMessages() + "\n"
+
+        # Return python error messages for use in script tool or Python Window
+        arcpy.AddError(pymsg)
+        arcpy.AddError(msgs)
+
+        # Print Python error messages for use in Python / Python Window
+        print(pymsg + "\n")
+        print(msgs)
+
+def GRGFromPoints(starting_points,
+                  aoiIdField,
+                  horizontal_cells,
+                  vertical_cells,
+                  cell_width,
+                  cell_height,
+                  cell_units,
+                  label_start_position,
+                  label_style,
+                  labelSeperator,
+                  gridAngle,
+                  output_feature_class):
+    '''
+    Create a Gridded Reference Graphic (GRG) centered on each point of a feature
+    class, all written to one output with the aoiIdField value (default: object ID)
+    of each point in the AOI_ID field.
+    The points are projected in memory as they are read, and the grids are
+    computed on a pool of worker processes.
+    '''
+    try:
+        appEnvironment = Utilities.GetApplication()
+        if DEBUG == True: arcpy.AddMessage("App environment: " + appEnvironment)
+
+        arcpy.env.overwriteOutput = True
+        cellWidth, cellHeight = CellSizeInMeters(cell_width, cell_height, cell_units)
+
+        spatialReference = arcpy.SpatialReference(3857) #the code for WGS84 Web Mercator
+        tasks = []
+        idField = aoiIdField if aoiIdField else "OID@"
+        with arcpy.da.SearchCursor(starting_points, [idField, "SHAPE@XY"], spatial_reference=spatialReference) as cursor:
+            for row in cursor:
+                tasks.append((str(row[0]), row[1][0], row[1][1], horizontal_cells, vertical_cells,
+                              cellWidth, cellHeight, label_start_position, label_style, labelSeperator,
+                              float(gridAngle or 0)))
+        if not tasks:
+            raise Exception("The input start locations must contain at least one feature.")
+
+        arcpy.AddMessage("Creating {0} grids".format(len(tasks)))
+        CreateGridFeatureClass(output_feature_class, spatialReference, AOI_ID_FIELD)
+        cells = (cell for cells in RunGridTasks(GRGGrid.PointGridTask, tasks) for cell in cells)
+        WriteGridCells(output_feature_class, cells, spatialReference, [AOI_ID_FIELD])
+
+        return output_feature_class
+
+    except arcpy.ExecuteError:
+        # Get the tool error messages
+        msgs = arcpy.GetMessages()
+        arcpy.AddError(msgs)
+        print(msgs)
+
+    except:
+        # Get the traceback object
+        tb = sys.exc_info()[2]
+        tbinfo = traceback.format_tb(tb)[0]
+
+        # Concatenate information together concerning the error into a message string
+        pymsg = "PYTHON ERRORS:\nTraceback info:\n" + tbinfo + "\nError Info:\n" + str(sys.exc_info()[1])
+        msgs = "ArcPy ERRORS:\n" + arcpy.GetMessages() + "\n"
+
+        # Return python error messages for use in script tool or Python Window
+        arcpy.AddError(pymsg)
+        arcpy.AddError(msgs)
+
+        # Print Python error messages for use in Python / Python Window
+        print(pymsg + "\n")
+        print(msgs)
+
+def NumberFeaturesInOrder(features, numberingField, numberingOrder=NumberingOrder.ORDER_ROW_MAJOR, rowTolerance=None):
+    '''
+    Number features (the selected ones, for a layer) from 1, in the order of the
+    NumberingOrder strategy, with one search cursor and one update cursor pass
+    '''
+    with arcpy.da.SearchCursor(features, ["OID@", "SHAPE@XY"]) as cursor:
+        points = [(row[0], row[1][0], row[1][1]) for row in cursor if row[1] and row[1][0] is not None]
+
+    order = NumberingOrder.NumberingOrder(points, numberingOrder, rowTolerance)
+    numbers = dict((oid, number) for number, oid in enumerate(order, 1))
+
+    with arcpy.da.UpdateCursor(features, ["OID@", numberingField]) as cursor:
+        for row in cursor:
+            if row[0] in numbers:
+                row[1] = numbers[row[0]]
+                cursor.updateRow(row)
+    return len(numbers)
 
 def NumberFeatures(areaToNumber,
                     pointFeatures,
                     numberingField,
-                    outputFeatureClass):
+                    outputFeatureClass,
+                    numberingOrder=NumberingOrder.ORDER_ROW_MAJOR,
+                    rowTolerance=None):
+
+        # Numbering Order is optional, number in rows when it is cleared
+        numberingOrder = numberingOrder if numberingOrder else NumberingOrder.ORDER_ROW_MAJOR
 
         descPointFeatures = arcpy.Describe(pointFeatures)
         arcpy.AddMessage("pointFeatures: {0}".format(descPointFeatures.catalogPath))
 
-        # If no output FC is specified, then set it a temporary one, as this will be copied to the input and then deleted.
+        # If no output FC is specified, then the input features are numbered in place.
         overwriteFC = False
         if not outputFeatureClass:
-            DEFAULT_OUTPUT_LOCATION = r'%scratchGDB%\tempSortedPoints'
-            outputFeatureClass = DEFAULT_OUTPUT_LOCATION
             overwriteFC = True
         else:
-            descOutputFeatureClass = arcpy.Describe(outputFeatureClass)
-            arcpy.AddMessage("outputFeatureClass: {0}".format(descOutputFeatureClass.catalogPath))
+            arcpy.AddMessage("outputFeatureClass: {0}".format(outputFeatureClass))
 
-        # Sort layer by upper right across and then down spatially
         areaToNumberInMemory = os.path.join("in_memory","areaToNumber")
         arcpy.CopyFeatures_management(areaToNumber, areaToNumberInMemory)
         areaToNumber = areaToNumberInMemory
@@ -921,66 +657,44 @@ def NumberFeatures(areaToNumber,
             if DEBUG == True:
                 arcpy.AddMessage("Selected " + str(arcpy.GetCount_management(pointFeatureName).getOutput(0)) + " points")
 
-            arcpy.AddMessage("Sorting the selected points geographically, left to right, top to bottom")
-            arcpy.Sort_management(pointFeatureName, outputFeatureClass, [["Shape", "ASCENDING"]])
+            # Copy the selected features to the output, or number them in place in the input
+            if (overwriteFC):
+                desc = arcpy.Describe(pointFeatures)
+                if hasattr(desc, "layer"):
+                    overwriteFC = desc.layer.catalogPath
+                else:
+                    overwriteFC = desc.catalogPath
+                fieldsFC = overwriteFC
+                numberFeatures = pointFeatureName
+            else:
+                arcpy.CopyFeatures_management(pointFeatureName, outputFeatureClass)
+                fieldsFC = outputFeatureClass
+                numberFeatures = outputFeatureClass
 
             #global numberingField
             if numberingField is None or numberingField == "":
-                fnames = [field.name for field in arcpy.ListFields(outputFeatureClass)]
+                fnames = [field.name for field in arcpy.ListFields(fieldsFC)]
                 addfield = "Number"
                 if addfield in fnames:
                     arcpy.AddMessage("Number field is already used")
                     numberingField = "Number"
                 else:
-                    arcpy.AddMessage("Add One")
                     arcpy.AddMessage("Adding Number field because no input field was given")
-                    arcpy.AddField_management(outputFeatureClass,"Number","SHORT")
+                    arcpy.AddField_management(fieldsFC,"Number","SHORT")
                     numberingField = "Number"
-            else:
-                pass
 
             # Number the fields
-            arcpy.AddMessage("Numbering the fields")
-            i = 1
-            cursor = arcpy.UpdateCursor(outputFeatureClass) # Object: Error in parsing arguments for UpdateCursor
-            for row in cursor:
-                row.setValue(numberingField, i)
-                cursor.updateRow(row)
-                i += 1
+            arcpy.AddMessage("Numbering the selected features in {0} order".format(numberingOrder))
+            count = NumberFeaturesInOrder(numberFeatures, str(numberingField), numberingOrder, rowTolerance)
+            if DEBUG == True:
+                arcpy.AddMessage("Numbered " + str(count) + " features")
+
             # Clear the selection
             arcpy.AddMessage("Clearing the selection")
             arcpy.SelectLayerByAttribute_management(pointFeatureName, "CLEAR_SELECTION")
 
-            # Overwrite the Input Point Features, and then delete the temporary output feature class
             targetLayerName = ""
             if (overwriteFC):
-                arcpy.AddMessage("Copying the features to the input, and then deleting the temporary feature class")
-                desc = arcpy.Describe(pointFeatures)
-                if hasattr(desc, "layer"):
-                    overwriteFC = desc.layer.catalogPath
-                else:
-                    overwriteFC = desc.catalogPath
-
-                arcpy.AddMessage("what is the numberingField: " + str(numberingField))
-                addfield = "Number"
-                fnames1 = [field.name for field in arcpy.ListFields(overwriteFC)]
-                if addfield in fnames1:
-                    arcpy.AddMessage("Number field is already used")
-                else:
-                    arcpy.AddMessage("Adding Number field to overwriteFC due to no input field")
-                    arcpy.AddField_management(overwriteFC,"Number")
-                    arcpy.AddMessage("Added Number field to overwriteFC")
-
-                fields = (str(numberingField), "SHAPE@")
-
-                overwriteCursor = arcpy.da.UpdateCursor(overwriteFC, fields)
-                for overwriteRow in overwriteCursor:
-                    sortedPointsCursor = arcpy.da.SearchCursor(outputFeatureClass, fields)
-                    for sortedRow in sortedPointsCursor:
-                        if sortedRow[1].equals(overwriteRow[1]):
-                            overwriteRow[0] = sortedRow[0]
-                    overwriteCursor.updateRow(overwriteRow)
-                arcpy.Delete_management(outputFeatureClass)
                 targetLayerName = pointFeatureName
             else:
                 targetLayerName = os.path.basename(str(outputFeatureClass))
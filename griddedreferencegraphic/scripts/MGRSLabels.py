@@ -0,0 +1,139 @@
+# coding: utf-8
+'''
+------------------------------------------------------------------------------
+ Copyright 2017 Esri
+ Licensed under the Apache License, Version 2.0 (the "License");
+ you may not use this file except in compliance with the License.
+ You may obtain a copy of the License at
+   http://www.apache.org/licenses/LICENSE-2.0
+ Unless required by applicable law or agreed to in writing, software
+ distributed under the License is distributed on an "AS IS" BASIS,
+ WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+ See the License for the specific language governing permissions and
+ limitations under the License.
+------------------------------------------------------------------------------
+ ==================================================
+ MGRSLabels.py
+ --------------------------------------------------
+ requirements: Python 2.7 or Python 3.5+, NumPy (installed with ArcGIS)
+ author: ArcGIS Solutions
+ contact: support@esri.com
+ company: Esri
+ ==================================================
+ description:
+ Table driven MGRS labels for RefGrid.
+ The 100k square identification letters of the six MGRS letter sets
+ are precomputed into lookup tables, and the numeric (easting and
+ northing) parts of the labels are formatted from integers through
+ tables of zero padded digit strings, so grid cells can be labelled
+ in batches without any per cell string padding or branching.
+ ==================================================
+'''
+
+import numpy
+
+# The six 100k square identification letter sets, as (column letters, row letters).
+# Set 1 is used by zones 1, 7, 13, ..., set 2 by zones 2, 8, 14, ..., etc.
+LETTER_SETS = [("ABCDEFGH", "ABCDEFGHJKLMNPQRSTUV"),
+               ("JKLMNPQR", "FGHJKLMNPQRSTUVABCDE"),
+               ("STUVWXYZ", "ABCDEFGHJKLMNPQRSTUV"),
+               ("ABCDEFGH", "FGHJKLMNPQRSTUVABCDE"),
+               ("JKLMNPQR", "ABCDEFGHJKLMNPQRSTUV"),
+               ("STUVWXYZ", "FGHJKLMNPQRSTUVABCDE")]
+
+# Number of digits of each of the easting and northing parts of a label, per grid interval
+SUFFIX_WIDTHS = {10000: 1, 1000: 2, 100: 3, 10: 4, 1: 5}
+
+
+def _letterTable():
+    '''
+    Two letter square identifications, indexed by [zone number % 6][column % 8][row % 20],
+    where column and row are the number of whole 100k meters of the easting and northing.
+    The first column of a zone (easting 100000-199999) takes the first column letter.
+    '''
+    table = []
+    for zoneIndex in range(0, 6):
+        columnLetters, rowLetters = LETTER_SETS[(zoneIndex - 1) % 6]
+        table.append([[columnLetters[(column - 1) % 8] + rowLetters[row] for row in range(0, 20)]
+                      for column in range(0, 8)])
+    return table
+
+_LETTERS = _letterTable()
+
+# Zero padded digit strings, per suffix width (built when first used, see suffixDigits)
+_suffixDigits = {}
+
+
+def gridLetters(zoneNum, easting, northing):
+    '''
+    Retrieve the square identification (two-character letter code) for a
+    given coordinate pair (meters, northing with the false northing
+    applied in the southern hemisphere) and zone
+    '''
+    column = max(0, int(round(easting)) // 100000)
+    row = max(0, int(round(northing)) // 100000)
+    return _LETTERS[int(zoneNum) % 6][column % 8][row % 20]
+
+
+def gridLettersBatch(zoneNums, eastings, northings):
+    '''
+    Batch form of gridLetters, for arrays (broadcast against each other)
+    of zone numbers, eastings and northings.
+    Returns a list of the square identifications, flattened in C order.
+    '''
+    zoneNums, eastings, northings = numpy.broadcast_arrays(numpy.asarray(zoneNums),
+                                                           numpy.asarray(eastings, dtype=numpy.float64),
+                                                           numpy.asarray(northings, dtype=numpy.float64))
+    zoneIndexes = (zoneNums.astype(numpy.int64) % 6).ravel().tolist()
+    columns = (numpy.maximum(0, numpy.floor(numpy.round(eastings) / 100000)).astype(numpy.int64) % 8).ravel().tolist()
+    rows = (numpy.maximum(0, numpy.floor(numpy.round(northings) / 100000)).astype(numpy.int64) % 20).ravel().tolist()
+    return [_LETTERS[z][c][r] for z, c, r in zip(zoneIndexes, columns, rows)]
+
+
+def suffixDigits(interval):
+    '''
+    Returns the zero padded strings of the numbers 0 to the number of
+    cells along a 100k square of this interval (i.e. "00" to "99" for 1000)
+    '''
+    width = SUFFIX_WIDTHS[int(interval)]
+    digits = _suffixDigits.get(width)
+    if digits is None:
+        digits = ["{0:0{1}d}".format(number, width) for number in range(0, 10 ** width)]
+        _suffixDigits[width] = digits
+    return digits
+
+
+def eastingSuffixes(eastings, interval):
+    '''
+    The easting parts of the labels of cells of size interval, for a
+    sequence of cell eastings (meters)
+    '''
+    digits = suffixDigits(interval)
+    interval = int(interval)
+    return [digits[(int(e) % 100000) // interval] for e in eastings]
+
+
+def northingSuffixes(northings, interval):
+    '''
+    The northing parts of the labels of cells of size interval, for a
+    sequence of cell northings (meters, NEGATIVE in the southern hemisphere)
+    '''
+    digits = suffixDigits(interval)
+    interval = int(interval)
+    return [digits[((int(n) + 10000000) if n < 0 else int(n)) % 100000 // interval] for n in northings]
+
+
+def cellLabels(squareLabel, eastings, northings, interval):
+    '''
+    Batch labels of cells of size interval in one 100k square, i.e. "18SVE1234".
+    eastings and northings are arrays (broadcast against each other) of the
+    cell south west corners, in meters. Returns a list flattened in C order.
+    '''
+    eastings, northings = numpy.broadcast_arrays(numpy.asarray(eastings), numpy.asarray(northings))
+    digits = suffixDigits(interval)
+    interval = int(interval)
+    eastings = eastings.astype(numpy.int64)
+    northings = northings.astype(numpy.int64)
+    xs = ((eastings % 100000) // interval).ravel().tolist()
+    ys = ((numpy.where(northings < 0, northings + 10000000, northings) % 100000) // interval).ravel().tolist()
+    return [squareLabel + digits[x] + digits[y] for x, y in zip(xs, ys)]
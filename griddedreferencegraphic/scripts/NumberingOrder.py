@@ -0,0 +1,201 @@
+# coding: utf-8
+'''
+------------------------------------------------------------------------------
+ Copyright 2017 Esri
+ Licensed under the Apache License, Version 2.0 (the "License");
+ you may not use this file except in compliance with the License.
+ You may obtain a copy of the License at
+   http://www.apache.org/licenses/LICENSE-2.0
+ Unless required by applicable law or agreed to in writing, software
+ distributed under the License is distributed on an "AS IS" BASIS,
+ WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+ See the License for the specific language governing permissions and
+ limitations under the License.
+------------------------------------------------------------------------------
+ ==================================================
+ NumberingOrder.py
+ --------------------------------------------------
+ requirements: Python 2.7 or Python 3.5+
+ author: ArcGIS Solutions
+ contact: support@esri.com
+ company: Esri
+ ==================================================
+ description:
+ In memory spatial ordering of features for Number Features.
+ Each ordering strategy takes a list of (key, x, y) tuples, one per
+ feature, and returns the keys (i.e. object IDs) in numbering order,
+ so features can be numbered in a single update cursor pass without
+ sorting them into an intermediate dataset.
+ Does not use arcpy.
+ ==================================================
+'''
+
+import math
+
+ORDER_ROW_MAJOR = "Row-Major"
+ORDER_HILBERT = "Hilbert"
+ORDER_NEAREST_NEIGHBOR = "Nearest-Neighbor"
+
+# Number of bits per axis of the Hilbert curve cells
+HILBERT_BITS = 16
+
+
+def RowMajorOrder(points, tolerance=None):
+    '''
+    Rows from top to bottom, and left to right along each row.
+    Points whose y is within a band of height tolerance (from the top
+    point) are in the same row; without a tolerance each distinct y is
+    a row of its own.
+    '''
+    if not points:
+        return []
+    if tolerance:
+        top = max(y for key, x, y in points)
+        rowKey = lambda point: (int(math.floor((top - point[2]) / tolerance)), point[1])
+    else:
+        rowKey = lambda point: (-point[2], point[1])
+    return [point[0] for point in sorted(points, key=rowKey)]
+
+
+def _hilbertIndex(x, y, bits):
+    '''
+    Distance along a Hilbert curve of 2^bits x 2^bits cells of the cell (x, y)
+    '''
+    index = 0
+    side = 1 << bits
+    s = side >> 1
+    while s > 0:
+        rx = 1 if (x & s) else 0
+        ry = 1 if (y & s) else 0
+        index += s * s * ((3 * rx) ^ ry)
+        # rotate the quadrant so the curve is continuous
+        if ry == 0:
+            if rx == 1:
+                x = side - 1 - x
+                y = side - 1 - y
+            x, y = y, x
+        s >>= 1
+    return index
+
+
+def HilbertOrder(points, tolerance=None):
+    '''
+    Order along a Hilbert curve over the extent of the points, starting in the
+    lower left corner. Points that are close together are numbered close together.
+    '''
+    if not points:
+        return []
+    xmin = min(x for key, x, y in points)
+    ymin = min(y for key, x, y in points)
+    size = max(max(x for key, x, y in points) - xmin, max(y for key, x, y in points) - ymin)
+    cells = (1 << HILBERT_BITS) - 1
+    scale = cells / size if size > 0 else 0.0
+    indexed = [(_hilbertIndex(int((x - xmin) * scale), int((y - ymin) * scale), HILBERT_BITS), i)
+               for i, (key, x, y) in enumerate(points)]
+    indexed.sort()
+    return [points[i][0] for hilbert, i in indexed]
+
+
+# Points per leaf of the nearest neighbor search tree
+KD_LEAF_SIZE = 8
+
+
+def _buildKDTree(points, indices, parent, nodes, leafOf):
+    '''
+    Adds the node of a k-d tree over the points of indices (and its children)
+    to nodes, splitting the wider side of their extent at the median.
+    A node is [xmin, ymin, xmax, ymax, points left, parent, children, leaf indices].
+    Returns the index of the node
+    '''
+    xs = [points[i][1] for i in indices]
+    ys = [points[i][2] for i in indices]
+    node = len(nodes)
+    nodes.append([min(xs), min(ys), max(xs), max(ys), len(indices), parent, None, None])
+    if len(indices) <= KD_LEAF_SIZE:
+        nodes[node][7] = set(indices)
+        for i in indices:
+            leafOf[i] = node
+        return node
+    axis = 1 if nodes[node][2] - nodes[node][0] >= nodes[node][3] - nodes[node][1] else 2
+    indices = sorted(indices, key=lambda i: points[i][axis])
+    middle = len(indices) // 2
+    nodes[node][6] = (_buildKDTree(points, indices[:middle], node, nodes, leafOf),
+                      _buildKDTree(points, indices[middle:], node, nodes, leafOf))
+    return node
+
+
+def _boxDistance(node, x, y):
+    ''' Squared distance from (x, y) to the extent of a k-d tree node '''
+    dx = max(node[0] - x, 0.0, x - node[2])
+    dy = max(node[1] - y, 0.0, y - node[3])
+    return dx * dx + dy * dy
+
+
+def NearestNeighborOrder(points, tolerance=None):
+    '''
+    Path that starts at the first point in row-major order (the upper left)
+    and always steps to the nearest point not yet numbered (the first one of
+    equally near points). The points not yet numbered are searched in a k-d
+    tree that keeps the number of points left under each node, so numbered
+    points, and emptied parts of the tree, are skipped whatever the layout
+    (sparse or clustered) of the points.
+    '''
+    if not points:
+        return []
+    nodes = []
+    leafOf = [None] * len(points)
+    _buildKDTree(points, list(range(0, len(points))), None, nodes, leafOf)
+
+    byKey = dict((point[0], i) for i, point in enumerate(points))
+    current = byKey[RowMajorOrder(points)[0]]
+    order = []
+    while True:
+        key, x, y = points[current]
+        order.append(key)
+        # remove the point from its leaf, and from the counts up to the root
+        node = leafOf[current]
+        nodes[node][7].discard(current)
+        while node is not None:
+            nodes[node][4] -= 1
+            node = nodes[node][5]
+        if nodes[0][4] == 0:
+            return order
+
+        best = [None, None]
+        stack = [0]
+        while stack:
+            node = nodes[stack.pop()]
+            if node[4] == 0:
+                continue
+            if best[0] is not None and _boxDistance(node, x, y) > best[1]:
+                continue
+            if node[7] is not None:
+                for i in node[7]:
+                    distance = (points[i][1] - x) ** 2 + (points[i][2] - y) ** 2
+                    if best[0] is None or distance < best[1] or (distance == best[1] and i < best[0]):
+                        best = [i, distance]
+                continue
+            # search the nearer child first (it is popped first)
+            first, second = node[6]
+            if _boxDistance(nodes[first], x, y) > _boxDistance(nodes[second], x, y):
+                first, second = second, first
+            stack.append(second)
+            stack.append(first)
+        current = best[0]
+
+
+ORDERS = {ORDER_ROW_MAJOR: RowMajorOrder,
+          ORDER_HILBERT: HilbertOrder,
+          ORDER_NEAREST_NEIGHBOR: NearestNeighborOrder}
+
+
+def NumberingOrder(points, order=ORDER_ROW_MAJOR, tolerance=None):
+    '''
+    Keys of points, a list of (key, x, y), in the numbering order of the
+    named ordering strategy (one of ORDERS, Row-Major if there is no order)
+    '''
+    if not order:
+        order = ORDER_ROW_MAJOR
+    if order not in ORDERS:
+        raise ValueError("Unknown numbering order: {0}".format(order))
+    return ORDERS[order](points, tolerance)
@@ -5,11 +5,42 @@ RefGrid.py
 import re
 import os
 import math
+import itertools
+import multiprocessing
+import numpy
 import arcpy
 
+try:
+  from . import Utilities
+  from . import UTMProjection
+  from . import RefGridCells
+  from . import RefGridCheckpoint
+  from . import RefGridZones
+  from . import MGRSLabels
+except ImportError:
+  import Utilities
+  import UTMProjection
+  import RefGridCells
+  import RefGridCheckpoint
+  import RefGridZones
+  import MGRSLabels
+
 #self.inputArea = arcpy.GetParameterAsText(0)
 
 GRID_FIELD_NAME = "Grid"
+PARTITION_FIELD_NAME = "Partition"
+CELLS_FIELD_NAME = "Cells"
+
+# Grids with more (estimated) cells than this are large grids, which are only
+# built with ALLOW_LARGE_GRIDS. Grid zones and 100k squares are never large.
+LARGE_GRID_CELLS = 2000
+LARGE_GRID_SIZES = ['10000M_GRID', '1000M_GRID', '100M_GRID', '10M_GRID']
+
+# Cell classifications, w.r.t. a grid zone or the AOI
+_CELL_OUTSIDE = RefGridCells.CELL_OUTSIDE
+_CELL_BOUNDARY = RefGridCells.CELL_BOUNDARY
+_CELL_INSIDE = RefGridCells.CELL_INSIDE
+
 class ReferenceGrid(object):
   '''
   '''
@@ -22,7 +53,7 @@ class ReferenceGrid(object):
   DEBUG = False
   GRID_FIELD_NAME = "Grid"
 
-  def __init__(self, input_area, grid_type, grid_square_size, large_grid_handling='ALLOW_LARGE_GRIDS'):
+  def __init__(self, input_area, grid_type, grid_square_size, large_grid_handling='ALLOW_LARGE_GRIDS', output_partitioning='NO_PARTITIONS', densify_tolerance=None, resume_previous_run=False):
     '''
     Reference Grid Constructor
     '''
@@ -32,6 +63,12 @@ class ReferenceGrid(object):
     self.allowLargeGrids = False
     if large_grid_handling == 'ALLOW_LARGE_GRIDS':
       self.allowLargeGrids = True
+    self.partitioning = output_partitioning if output_partitioning else 'NO_PARTITIONS'
+    # maximum distance (meters) of the cell edges from the true grid lines,
+    # None keeps the fixed 25k m densification of the 100k squares
+    self.densifyTolerance = float(densify_tolerance) if densify_tolerance else None
+    # continue the unfinished previous run of the same build, see Build
+    self.resume = bool(resume_previous_run)
     
     return
   
@@ -63,27 +100,71 @@ class ReferenceGrid(object):
       features = _createFC(out_features, "POLYGON", sr_wgs_84)
       arcpy.AddField_management(features, GRID_FIELD_NAME,"text") 
       with arcpy.da.InsertCursor(features, ['SHAPE@',GRID_FIELD_NAME]) as cursor:
-        for i in range(0,len(sq)):
-          cursor.insertRow([sq[i]['clippedPolygon'],
-                            sq[i][GRID_FIELD_NAME]])  
+        for square in sq:
+          cursor.insertRow([square['clippedPolygon'],
+                            square[GRID_FIELD_NAME]])  
       return features
 
-    def _largeGridWarning(area, value):
-      return "Area ({0}) exceeds large grid value for {1}. Proceeding with grid construction.".format(area, value)
-    
-    def _largeGridError(area, value):
-      return "Area ({0}) exceeds large grid value for {1}. Use a smaller Input Area or choose a larger Grid Size.".format(area, value)
-      
+    def _buildPartitions(out_features, cells, labelKey):
+      '''
+      Writes the cells into one feature class per grid zone or per 100k square
+      (self.partitioning), in the workspace of out_features and named after it
+      (i.e. output_grid_18SVE). out_features is the index of the partitions:
+      the extent, name and number of cells of each one. Each partition is written,
+      and added to the index (and the checkpoint), before the next one is started,
+      so the finished partitions are kept if the run stops.
+      '''
+      workspace = os.path.dirname(out_features)
+      baseName, extension = os.path.splitext(os.path.basename(out_features))
+      if resume:
+        # drop the index rows of partitions that were not checkpointed
+        index = out_features
+        _deleteRowsAfter(index, outputState["lastOID"])
+      else:
+        index = _createFC(out_features, "POLYGON", sr_wgs_84)
+        arcpy.AddField_management(index, GRID_FIELD_NAME, "TEXT")
+        arcpy.AddField_management(index, PARTITION_FIELD_NAME, "TEXT")
+        arcpy.AddField_management(index, CELLS_FIELD_NAME, "LONG")
+
+      partitionCount = 0
+      # cells come grouped by 100k square, and the squares grouped by grid zone
+      for key, partitionCells in itertools.groupby(cells, checkpointKey):
+        name = arcpy.ValidateTableName("{0}_{1}".format(baseName, key), workspace) + extension
+        partition = os.path.join(workspace, name)
+        _createFC(partition, "POLYGON", sr_wgs_84)
+        arcpy.AddField_management(partition, GRID_FIELD_NAME, "TEXT")
+        cellCount = 0
+        firstOID = None
+        lastOID = None
+        with arcpy.da.InsertCursor(partition, ['SHAPE@', GRID_FIELD_NAME]) as cursor:
+          for cell in partitionCells:
+            lastOID = cursor.insertRow([cell['clippedPolygon'], cell[labelKey]])
+            if firstOID is None:
+              firstOID = lastOID
+            cellCount += 1
+
+        with arcpy.da.InsertCursor(index, ['SHAPE@', GRID_FIELD_NAME, PARTITION_FIELD_NAME, CELLS_FIELD_NAME]) as cursor:
+          indexOID = cursor.insertRow([arcpy.Describe(partition).extent.polygon, key, name, cellCount])
+        finished[key] = [firstOID, lastOID]
+        RefGridCheckpoint.RecordOutput(checkpoint, 1, indexOID, key)
+        RefGridCheckpoint.WriteCheckpoint(checkpointPath, checkpoint)
+        partitionCount += 1
+        arcpy.AddMessage("Created partition {0} ({1} grid squares).".format(name, cellCount))
+
+      RefGridCheckpoint.RemoveCheckpoint(checkpointPath)
+      arcpy.AddMessage("Created {0} partitions.".format(partitionCount))
+      return index
+
     def checkPolarRegion(inputFeature):
       ''' checks if the input feature class overlaps with the polar regions'''
-      sr = arcpy.SpatialReference(4326)
+      sr = _spatialReference()
       
       # A list of features and coordinate pairs
       polarNorth = [[-180,84],[-180,90],[180,90],[180,84],[-180,84]]
       polarSouth = [[-180,-90],[-180,-80],[180,-80],[180,-90],[-180,-90]]
       
-      northPoly = arcpy.Polygon(arcpy.Array([arcpy.Point(*coords) for coords in polarNorth]),sr)
-      southPoly = arcpy.Polygon(arcpy.Array([arcpy.Point(*coords) for coords in polarSouth]),sr)
+      northPoly = _buildPolygon(polarNorth)
+      southPoly = _buildPolygon(polarSouth)
       
       outsideNorthPolar = northPoly.disjoint(inputFeature.projectAs(sr))
       outsideSouthPolar = southPoly.disjoint(inputFeature.projectAs(sr))
@@ -94,113 +175,280 @@ class ReferenceGrid(object):
 
     out_features = out_features.value
     arcpy.env.overwriteOutput = True
-    extent_area = arcpy.Describe(self.inputArea).extent.polygon.area
-    if self.DEBUG:
-      arcpy.AddMessage("extent_area: {}".format(extent_area))
-      arcpy.AddMessage("self.gridSize: {}".format(self.gridSize))
-      arcpy.AddMessage("self.GRID_SIZE_LOOKUP.keys(): {}".format(self.GRID_SIZE_LOOKUP.keys()))
-
-    if self.allowLargeGrids is False:
-      if   extent_area > 200000.0 and self.gridSize == '10M_GRID':
-        arcpy.AddError(_largeGridError(extent_area, self.gridSize))
-        return None
-      elif extent_area > 20000000.0 and self.gridSize == '100M_GRID':
-        arcpy.AddError(_largeGridError(extent_area, self.gridSize))
-        return None
-      elif extent_area > 2000000000.0 and self.gridSize == '1000M_GRID':
-        arcpy.AddError(_largeGridError(extent_area, self.gridSize))
-        return None
-      elif extent_area > 200000000000.0 and self.gridSize == '10000M_GRID':
-        arcpy.AddError(_largeGridError(extent_area, self.gridSize))
-        return None
-      else:
-        pass # fall through condition, nothing to do here
-    else:
-      if   extent_area > 200000.0 and self.gridSize == '10M_GRID':
-          arcpy.AddWarning(_largeGridWarning(extent_area, self.gridSize))
-      elif extent_area > 20000000.0 and self.gridSize == '100M_GRID':
-          arcpy.AddWarning(_largeGridWarning(extent_area, self.gridSize))
-      elif extent_area > 2000000000.0 and self.gridSize == '1000M_GRID':
-          arcpy.AddWarning(_largeGridWarning(extent_area, self.gridSize))
-      elif extent_area > 200000000000.0 and self.gridSize == '10000M_GRID':
-          arcpy.AddWarning(_largeGridWarning(extent_area, self.gridSize))
-      else:
-          arcpy.AddMessage("Creating Grid zones/latitude bands...")
 
     #sr_nad_27 = arcpy.SpatialReference(4267) #GCS_North_American_1927
     #sr_nad_83 = arcpy.SpatialReference(4269) #GCS_North_American_1983
     #sr_nad_83_harn = arcpy.SpatialReference(4152) #GCS_North_American_1983_HARN
-    sr_wgs_84 = arcpy.SpatialReference(4326)
+    sr_wgs_84 = _spatialReference()
     
 
     AOIPoly = arcpy.Describe(self.inputArea).extent.polygon.projectAs(sr_wgs_84)
     
     checkPolarRegion(AOIPoly)
 
-    #create an in memory feature class for the grid zones
-    gridZones = _createFC(r"in_memory\GridZones", "POLYGON", sr_wgs_84)
-    arcpy.AddField_management(gridZones, GRID_FIELD_NAME,"TEXT")
-    arcpy.AddField_management(gridZones,'utmZone',"SHORT")
-    arcpy.AddField_management(gridZones,'utmBand',"TEXT")
-    with arcpy.da.InsertCursor(gridZones, ['SHAPE@', GRID_FIELD_NAME,'utmZone','utmBand']) as cursor:
-      zonesDictionary = _ZonesDictionary()
-      for i in zonesDictionary:
-        cursor.insertRow([zonesDictionary[i]['polygon'],
-                          zonesDictionary[i]['id'],
-                          zonesDictionary[i]['utmZone'],
-                          zonesDictionary[i]['latitudeZone']])
-
-    #create a utm zone feature class by dissolving the grid zones by there utm zone number
-    utmZones = arcpy.Dissolve_management(gridZones, r"in_memory\disslove",["utmZone"])
-
-    #select the grid zones that intersect with the input extent
-    arcpy.MakeFeatureLayer_management(gridZones, "gridZones_lyr")
-    Selection = arcpy.SelectLayerByLocation_management("gridZones_lyr", "INTERSECT", self.inputArea)
+    inputGeometries = []
+    with arcpy.da.SearchCursor(self.inputArea, ['SHAPE@'], spatial_reference=sr_wgs_84) as cursor:
+      for row in cursor:
+        if row[0]:
+          inputGeometries.append(row[0])
+
+    # predict the size of the grid, from the zones the input area crosses,
+    # its shape and the densification, to stop (or warn about) large grids
+    estimate = _estimateGrid(inputGeometries if inputGeometries else [AOIPoly], self.gridSize, self.densifyTolerance)
+    arcpy.AddMessage("Estimated grid: {0}".format(EstimateText(estimate)))
+    if self.DEBUG:
+      arcpy.AddMessage("estimate: {}".format(estimate))
+      arcpy.AddMessage("self.gridSize: {}".format(self.gridSize))
+
+    largeGrid = LargeGridMessage(estimate, self.gridSize, self.allowLargeGrids)
+    if largeGrid and self.allowLargeGrids is False:
+      arcpy.AddError(largeGrid)
+      return None
+    elif largeGrid:
+      arcpy.AddWarning(largeGrid)
+    else:
+      arcpy.AddMessage("Creating Grid zones/latitude bands...")
+
+    # find the grid zones that intersect the input area from the static grid zone
+    # index, only the few zones whose bounds overlap the input features are
+    # tested against the features themselves
+    gridZones = _FindGridZones(inputGeometries if inputGeometries else [AOIPoly])
+
     if self.gridSize == 'GRID_ZONE_DESIGNATOR':
-      arcpy.CopyFeatures_management(Selection, out_features)
-      arcpy.DeleteField_management(out_features,['utmZone','utmBand'])
-      return out_features
-    #else:
-      #arcpy.CopyFeatures_management(Selection, r"in_memory\Selected")
+      output = _createFC(out_features, "POLYGON", sr_wgs_84)
+      arcpy.AddField_management(output, GRID_FIELD_NAME,"TEXT")
+      with arcpy.da.InsertCursor(output, ['SHAPE@', GRID_FIELD_NAME]) as cursor:
+        for gridZone in gridZones:
+          cursor.insertRow([gridZone['polygon'], gridZone['id']])
+      return output
+
+    # the output is written, and checkpointed, one 100k square (or one partition)
+    # at a time. The checkpoint of an unfinished run of the same build lists the
+    # squares/partitions that run finished, with their output object id range,
+    # and the rows of the output (or partition index) so far. A re-run with
+    # resume_previous_run picks up after those, if the output still holds
+    # those rows (it wasn't overwritten or replaced since).
+    if self.partitioning == 'PARTITION_BY_GRID_ZONE':
+      # the 100k square label minus its two letters (i.e. 18SVE -> 18S)
+      checkpointKey = lambda cell: cell[GRID_FIELD_NAME][:-2]
+    else:
+      checkpointKey = lambda cell: cell[GRID_FIELD_NAME]
+    checkpointPath = RefGridCheckpoint.CheckpointPath(arcpy.env.scratchFolder, [out_features, self.gridType, self.gridSize, self.partitioning, self.densifyTolerance] +
+                                     [geometry.JSON for geometry in inputGeometries])
+    checkpoint = None
+    if self.resume:
+      checkpoint = RefGridCheckpoint.ReadCheckpoint(checkpointPath)
+      if checkpoint is None:
+        arcpy.AddWarning("There is no unfinished previous run of this grid to resume, building the whole grid.")
+      elif not _checkpointMatchesOutput(out_features, checkpoint, GRID_FIELD_NAME):
+        arcpy.AddWarning("{0} does not hold the grid squares of the previous run of this grid (it was overwritten or replaced), building the whole grid.".format(out_features))
+        checkpoint = None
+    resume = checkpoint is not None
+    if not resume:
+      checkpoint = RefGridCheckpoint.NewCheckpoint()
+    finished = checkpoint["finished"]
+    outputState = checkpoint["output"]
 
     # create 100k squares for the input self.inputArea
     arcpy.AddMessage('Creating 100k grid squares...')
-    sq = _processZonePolygons(Selection, AOIPoly)
+    aoi = _AOIInfo(AOIPoly)
+    sq = _processZonePolygons(gridZones, aoi, self.gridSize == '100000M_GRID', self.densifyTolerance)
+    if resume:
+      arcpy.AddMessage("Resuming the previous run of this grid, {0} finished grid squares/partitions are kept.".format(len(finished)))
+      sq = (square for square in sq if checkpointKey(square) not in finished)
 
     if self.gridSize == '100000M_GRID':
+      if self.partitioning != 'NO_PARTITIONS':
+        return _buildPartitions(out_features, sq, GRID_FIELD_NAME)
       return _buildHundredGrid(out_features, sq)
-    else:
-      sq100k = _buildHundredGrid(r"in_memory\sq100k", sq)
 
     # only if not 100K
+    # the 100k squares are refined lazily, depth first, and each final
+    # cell is written as soon as it is created, so nothing but the
+    # current branch of squares is held in memory
+    # with the Parallel Processing Factor environment set, the cells are
+    # computed by a pool of worker processes
     arcpy.AddMessage("Creating sub 100K grid squares...")
-    testValue = self.GRID_SIZE_LOOKUP[self.gridSize]
-    currentValue = 10000
-    while currentValue >= testValue:
-      polys = []
-      for i in range(0,len(sq)):
-        polys = polys + _handleGridSquares(sq[i], currentValue, AOIPoly)
-      sq = []
-      sq = sq + polys
-      currentValue = currentValue / 10
-
-    output = _createFC(out_features, "POLYGON", sr_wgs_84)
-    arcpy.AddField_management(output,GRID_FIELD_NAME,"text") 
-    with arcpy.da.InsertCursor(output, ['SHAPE@',GRID_FIELD_NAME]) as cursor:
-      for i in range(0,len(polys)):
-        cursor.insertRow([polys[i]['clippedPolygon'],
-                          polys[i]['text']])
+    processes = Utilities.ProcessCount(arcpy.env.parallelProcessingFactor)
+    if processes > 1:
+      arcpy.AddMessage("Using {0} processes.".format(processes))
+      cells = _iterGridSquaresParallel(sq, self.GRID_SIZE_LOOKUP[self.gridSize], aoi, processes, self.densifyTolerance)
+    else:
+      cells = _iterGridSquares(sq, 10000, self.GRID_SIZE_LOOKUP[self.gridSize], aoi, self.densifyTolerance)
+    if self.partitioning != 'NO_PARTITIONS':
+      return _buildPartitions(out_features, cells, "text")
+
+    if resume:
+      # drop any rows written after the last checkpointed square
+      output = out_features
+      _deleteRowsAfter(output, outputState["lastOID"])
+    else:
+      output = _createFC(out_features, "POLYGON", sr_wgs_84)
+      arcpy.AddField_management(output,GRID_FIELD_NAME,"text") 
+    cellCount = 0
+    for square, squareCells in itertools.groupby(cells, checkpointKey):
+      firstOID = None
+      lastOID = None
+      squareCount = 0
+      lastLabel = None
+      with arcpy.da.InsertCursor(output, ['SHAPE@',GRID_FIELD_NAME]) as cursor:
+        for cell in squareCells:
+          lastOID = cursor.insertRow([cell['clippedPolygon'],
+                                      cell['text']])
+          if firstOID is None:
+            firstOID = lastOID
+          squareCount += 1
+          lastLabel = cell['text']
+      cellCount += squareCount
+      finished[square] = [firstOID, lastOID]
+      RefGridCheckpoint.RecordOutput(checkpoint, squareCount, lastOID, lastLabel)
+      RefGridCheckpoint.WriteCheckpoint(checkpointPath, checkpoint)
+    RefGridCheckpoint.RemoveCheckpoint(checkpointPath)
+    arcpy.AddMessage("Created {0} grid squares.".format(cellCount))
                           
     return output
 
 
+def EstimateGrid(input_area, grid_size, densify_tolerance=None):
+  '''
+  Predicts the size of the grid ReferenceGrid would build for the input area
+  (see RefGridCells.estimateGrid), None if the input area has no features
+  '''
+  geometries = []
+  with arcpy.da.SearchCursor(input_area, ['SHAPE@'], spatial_reference=_spatialReference()) as cursor:
+    for row in cursor:
+      if row[0]:
+        geometries.append(row[0])
+  if not geometries:
+    return None
+  return _estimateGrid(geometries, grid_size, float(densify_tolerance) if densify_tolerance else None)
+
+def _estimateGrid(geometries, gridSize, tolerance=None):
+  '''
+  Estimate for WGS84 geometries, from the zones of the static grid zone index
+  that their extent touches. Build grids the whole extent of the input area,
+  not just the parts its features cover, so the whole extent is estimated
+  '''
+  xmin = min(geometry.extent.XMin for geometry in geometries)
+  ymin = min(geometry.extent.YMin for geometry in geometries)
+  xmax = max(geometry.extent.XMax for geometry in geometries)
+  ymax = max(geometry.extent.YMax for geometry in geometries)
+
+  zoneIndex = RefGridZones.GridZoneIndex()
+  zones = []
+  for index in RefGridZones.GridZoneIndexLookup(xmin, ymin, xmax, ymax):
+    zones.append((int(_ZONE_ID_PATTERN.match(zoneIndex["ids"][index]).group(1)),
+                  tuple(zoneIndex["bounds"][index].tolist())))
+  return RefGridCells.estimateGrid((xmin, ymin, xmax, ymax), zones,
+                                   ReferenceGrid.GRID_SIZE_LOOKUP[gridSize], tolerance)
+
+def EstimateText(estimate):
+  '''
+  Readable summary of a grid estimate
+  '''
+  size = float(estimate['bytes'])
+  for units in ['bytes', 'KB', 'MB', 'GB']:
+    if size < 1024 or units == 'GB':
+      break
+    size /= 1024
+  seconds = estimate['seconds']
+  if seconds < 60:
+    duration = "{0:.0f} seconds".format(seconds)
+  elif seconds < 3600:
+    duration = "{0:.1f} minutes".format(seconds / 60)
+  else:
+    duration = "{0:.1f} hours".format(seconds / 3600)
+  return "about {0:,} cells in {1} grid zone{2}, {3:,} vertices, {4:.1f} {5}, {6} to build".format(
+    estimate['cells'], estimate['zones'], "" if estimate['zones'] == 1 else "s",
+    estimate['vertices'], size, units, duration)
+
+def LargeGridMessage(estimate, gridSize, allowLargeGrids):
+  '''
+  Returns the message for a large grid estimate (see LARGE_GRID_CELLS),
+  None if the grid isn't large
+  '''
+  if gridSize not in LARGE_GRID_SIZES or estimate is None or estimate['cells'] <= LARGE_GRID_CELLS:
+    return None
+  if allowLargeGrids:
+    return "Grid of {0} exceeds large grid value for {1} ({2:,} cells). Proceeding with grid construction.".format(
+      EstimateText(estimate), gridSize, LARGE_GRID_CELLS)
+  return "Grid of {0} exceeds large grid value for {1} ({2:,} cells). Use a smaller Input Area or choose a larger Grid Size.".format(
+    EstimateText(estimate), gridSize, LARGE_GRID_CELLS)
+
+def _checkpointMatchesOutput(table, checkpoint, labelField):
+  '''
+  Returns True if table holds the rows recorded in the checkpoint
+  (see RefGridCheckpoint.MatchesOutput)
+  '''
+  if not arcpy.Exists(table):
+    return False
+  if labelField not in [field.name for field in arcpy.ListFields(table)]:
+    return False
+  with arcpy.da.SearchCursor(table, ['OID@', labelField]) as cursor:
+    return RefGridCheckpoint.MatchesOutput(checkpoint, cursor)
+
+
+def _deleteRowsAfter(table, oid):
+  '''
+  Deletes the rows of table with an object id above oid
+  '''
+  where = "{0} > {1}".format(arcpy.AddFieldDelimiters(table, arcpy.Describe(table).OIDFieldName), oid)
+  with arcpy.da.UpdateCursor(table, ['OID@'], where) as cursor:
+    for row in cursor:
+      cursor.deleteRow()
+
+
+# Shared objects used to build all the polygons, see _GeometryBuilder
+_geometryBuilder = None
+
+def _GeometryBuilder():
+  '''
+  Returns the objects used to build the RefGrid polygons, created once per process:
+  {"spatialReference": the WGS84 spatial reference,
+   "array": arcpy.Array buffer,
+   "point": arcpy.Point buffer}
+  '''
+  global _geometryBuilder
+  if _geometryBuilder is None:
+    _geometryBuilder = {"spatialReference": arcpy.SpatialReference(4326),
+                        "array": arcpy.Array(),
+                        "point": arcpy.Point()}
+  return _geometryBuilder
+
+
+def _spatialReference():
+  '''
+  Returns the shared WGS84 spatial reference
+  '''
+  return _GeometryBuilder()["spatialReference"]
+
+
+def _buildPolygon(coordinates):
+  '''
+  Builds a WGS84 polygon from a sequence of [x, y] coordinates.
+  The polygon copies the coordinates, so the same Point and Array
+  buffers are refilled for every polygon.
+  '''
+  builder = _GeometryBuilder()
+  array = builder["array"]
+  point = builder["point"]
+  array.removeAll()
+  for x, y in coordinates:
+    point.X = x
+    point.Y = y
+    array.add(point)
+  return arcpy.Polygon(array, builder["spatialReference"])
+
+
+# parses a grid zone id (i.e. "12S" would parse to ['12', 'S'])
+_ZONE_ID_PATTERN = re.compile("([0-9]+)([a-zA-Z]+)")
+
 def _NonPolarGridZone(args):
   # parse and set the UTM zone and latitude zone from the id
   # (i.e. "12S" would parse to ['12', 'S'])  
-  r = re.compile("([0-9]+)([a-zA-Z]+)")
-  m = r.match(args['id'])  
+  m = _ZONE_ID_PATTERN.match(args['id'])  
   id = args['id']
-  utmZone = m.group(1)
+  utmZone = int(m.group(1))
   latitudeZone = m.group(2)
   
   feature_info = [[args['xmin'], args['ymin']],
@@ -209,291 +457,327 @@ def _NonPolarGridZone(args):
                   [args['xmax'], args['ymin']],
                   [args['xmin'], args['ymin']]]
   
-  polygon = arcpy.Polygon(arcpy.Array([arcpy.Point(*coords) for coords in feature_info]),arcpy.SpatialReference(4326))
+  polygon = _buildPolygon(feature_info)
   
-  npgz = {"id": id,"utmZone": utmZone,"latitudeZone": latitudeZone,"polygon": polygon}
+  npgz = {"id": id,
+          "utmZone": utmZone,
+          "latitudeZone": latitudeZone,
+          "polygon": polygon,
+          "extent": (args['xmin'], args['ymin'], args['xmax'], args['ymax'])}
   
   return npgz
 
 
-def _ZonesDictionary():
+def _GridZone(index):
   '''
-  The zonesDictionary object has 1197 unique keys (one for eqch MGRS grid zone).
-  Rather than load it through a single, large json text file, we build it here programmatically, one time, on the client
+  Returns the NonPolarGridZone object for the zone at a position in the grid zone index
   '''
-  
-  #Per MGRS definition, these are the valid grid zone letters
-  # A,B,Y,Z reserved for north and south polar regions as UPS
-  zoneLetters = ['C','D','E','F','G','H','J','K','L','M','N','P','Q','R','S','T','U','V','W','X']
+  zoneIndex = RefGridZones.GridZoneIndex()
+  xmin, ymin, xmax, ymax = zoneIndex["bounds"][index].tolist()
+  return _NonPolarGridZone({"xmin": xmin,"ymin": ymin,"xmax": xmax,"ymax": ymax,"id": zoneIndex["ids"][index]})
 
-  # A dictionary object containing all MGRS zones (excluding any zones that don't exist)
-  # this is the object that will be returned (i.e. set as the _ZonesDictionary)
-  zonesDictionary = {}
 
-  def ltrZoneToExtent(zoneNum, zoneLtrIndex):
-    '''
-    Returns the NonPolarGridZone object for the zone.
-    NOTE: This is only used during the initial creation of '_ZonesDictionary' object
-    @param  {Number zoneNum The MGRS grid zone number
-    @param  {Number zoneLtrIndex
-    The index of the MGRS grid zone letter (w.r.t. the zoneLetters object)
-    @return {module:mgrs-utils~NonPolarGridZone  The NonPolarGridZone object
-    @private
-    '''    
-    zoneLtr = zoneLetters[zoneLtrIndex]
-    zoneId = str(zoneNum) + zoneLtr
-
-    #There are several unique MGRS zones which don't follow the standard convention,
-    #they are defined here:
-    if zoneId == "32X" or zoneId == "34X" or zoneId == "36X":
-      #Per the MGRS definition, these zones don't exist
-      return
-    elif zoneId == "31V":
-      #unique sized zone
-      nonPolarGridZoneArgs = {"xmin": 0,"ymin": 56,"xmax": 3,"ymax": 64,"id": zoneId}
-    elif zoneId == "32V":
-      #unique sized zone
-      nonPolarGridZoneArgs = {"xmin": 3,"ymin": 56,"xmax": 12,"ymax": 64,"id": zoneId}
-    elif zoneId == "31X":
-      #unique sized zone
-      nonPolarGridZoneArgs = {"xmin": 0,"ymin": 72,"xmax": 9,"ymax": 84,"id": zoneId}
-    elif zoneId == "33X":
-      #unique sized zone
-      nonPolarGridZoneArgs = {"xmin": 9,"ymin": 72,"xmax": 21,"ymax": 84,"id": zoneId}
-    elif zoneId == "35X":
-      #unique sized zone
-      nonPolarGridZoneArgs = {"xmin": 21,"ymin": 72,"xmax": 33,"ymax": 84,"id": zoneId}
-    elif zoneId == "37X":
-      #unique sized zone
-      nonPolarGridZoneArgs = {"xmin": 33,"ymin": 72,"xmax": 42,"ymax": 84,"id": zoneId}
-    else:
-      #These are the default zones that do follow the standard MGRS convention:
-      #Compute the extent attributes of the zone
-      xmin = (zoneNum - 1) * 6 - 180
-      xmax = zoneNum * 6 - 180
-      ymin = zoneLtrIndex * 8 + -80
-      ymax = (zoneLtrIndex + 1) * 8  + -80
-
-      #Fix special cases where the numbers need to be adjusted
-      #exactly 180 or -180 causes problems, changes it to something close
-      xmin = 179.99999999 if xmin == 180 else xmin
-      xmin = -179.99999999 if xmin == -180 else xmin;
-      xmax = 179.99999999 if xmax == 180 else xmax;
-      xmax = -179.99999999 if xmax == -180 else xmax;
-      if (ymax == 80):
-        #the top row of MGRS grid zones is taller than most, in order to extent to N84°
-        ymax  =  84
-
-      nonPolarGridZoneArgs = {"xmin": xmin,"ymin": ymin,"xmax": xmax,"ymax": ymax,"id": zoneId}
-    
-    #return nonPolarGridZoneArgs
-    return _NonPolarGridZone(nonPolarGridZoneArgs)
-  
+def _FindGridZones(geometries):
   '''
-  Loop through all possible zone number/letter combinations,
-  building the NonPolarGridZone object for each
+  Returns the NonPolarGridZone objects (in zone index order) of the grid zones
+  that intersect any of the WGS84 geometries
   '''
-  for zoneNum in range(1,61):
-    for zoneLtr in range(0,len(zoneLetters)):
-      nonPolarGridZone = ltrZoneToExtent(zoneNum, zoneLtr)
-      if nonPolarGridZone:
-        zonesDictionary[nonPolarGridZone["id"]] = nonPolarGridZone       
-        
+  gridZones = {}
+  def intersects(index, geometry):
+    if index not in gridZones:
+      gridZones[index] = _GridZone(index)
+    return not gridZones[index]['polygon'].disjoint(geometry)
+
+  def extent(geometry):
+    return (geometry.extent.XMin, geometry.extent.YMin, geometry.extent.XMax, geometry.extent.YMax)
+
+  return [gridZones[index] for index in RefGridZones.FindGridZones(geometries, extent, intersects)]
+
+
+def _ZonesDictionary():
+  '''
+  The zonesDictionary object has 1197 unique keys (one for eqch MGRS grid zone).
+  Rather than load it through a single, large json text file, we build it here from the static grid zone index
+  '''
+  zonesDictionary = {}
+  for index in range(0, len(RefGridZones.GridZoneIndex()["ids"])):
+    nonPolarGridZone = _GridZone(index)
+    zonesDictionary[nonPolarGridZone["id"]] = nonPolarGridZone
   return zonesDictionary
 
    
-def _processZonePolygons(visibleGridZones, extent):
+def _AOIInfo(AOI):
+  '''
+  Returns the AOI polygon with the extents used to classify cells against it.
+  The AOI is only known to cover its whole extent when it is an axis aligned
+  rectangle in WGS84 (i.e. the input extent was in a geographic or Mercator
+  coordinate system), otherwise cells within the extent remain boundary cells.
+  '''
+  extent = AOI.extent
+  bounds = (extent.XMin, extent.YMin, extent.XMax, extent.YMax)
+  extentArea = (extent.XMax - extent.XMin) * (extent.YMax - extent.YMin)
+  isRectangle = extentArea > 0 and abs(AOI.area - extentArea) <= extentArea * 1e-9
+  return {"polygon": AOI,
+          "extent": bounds,
+          "inner": bounds if isRectangle else None}
+
+
+_classifyExtents = RefGridCells.classifyExtents
+
+
+def _processZonePolygons(visibleGridZones, aoi, buildGeometry=True, tolerance=None):
   '''
-  Processes an array of visible grid zone and hands them off to the appropriate handler(s)
+  Processes an array of visible grid zone and hands them off to the appropriate handler(s),
+  yielding the 100k squares of each zone as they are created
   '''   
-  polys = []
-  fields = ['SHAPE@', GRID_FIELD_NAME,'utmZone','utmBand']
-  
-  with arcpy.da.SearchCursor(visibleGridZones, fields) as cursor:
-    for row in cursor:
-      gridZoneExtent = row[0].extent    
-      lowerLeftUtm = _LLtoUTM(gridZoneExtent.YMin, gridZoneExtent.XMin, row[2], row[3])
-      lowerRightUtm = _LLtoUTM(gridZoneExtent.YMin, gridZoneExtent.XMax, row[2], row[3])
-      upperRightUtm = _LLtoUTM(gridZoneExtent.YMax, gridZoneExtent.XMax, row[2], row[3])
-      upperLeftUtm = _LLtoUTM(gridZoneExtent.YMax, gridZoneExtent.XMin, row[2], row[3])
-      
-      # using the UTM coordinates, find the min/max values
-      # (index 0 of a UTM point is easting, 1 is northing)  
-      
-      minEasting = min(lowerLeftUtm[0],lowerRightUtm[0], upperRightUtm[0], upperLeftUtm[0])
-      maxEasting = max(lowerLeftUtm[0],lowerRightUtm[0], upperRightUtm[0], upperLeftUtm[0])
-      minNorthing = min(lowerLeftUtm[1],lowerRightUtm[1], upperRightUtm[1], upperLeftUtm[1]) 
-      maxNorthing = max(lowerLeftUtm[1],lowerRightUtm[1], upperRightUtm[1], upperLeftUtm[1])
-      
-      handlerArgs = {"minE": minEasting,
-                      "maxE": maxEasting,
-                      "minN": minNorthing,
-                      "maxN": maxNorthing,
-                      "utmZone": row[2],
-                      "latitudeZone": row[3],
-                      "polygon": row[0]}                     
-      
-      polys = polys + _handle100kGrids(handlerArgs, extent)
-  return polys
+  for gridZone in visibleGridZones:
+    xmin, ymin, xmax, ymax = gridZone['extent']
+    # project all four corners of the grid zone in one call
+    cornerEastings, cornerNorthings = UTMProjection.LLtoUTM([ymin, ymin, ymax, ymax],
+                                                           [xmin, xmax, xmax, xmin],
+                                                           gridZone['utmZone'])
+    
+    # using the UTM coordinates, find the min/max values
+    handlerArgs = {"minE": float(cornerEastings.min()),
+                    "maxE": float(cornerEastings.max()),
+                    "minN": float(cornerNorthings.min()),
+                    "maxN": float(cornerNorthings.max()),
+                    "utmZone": gridZone['utmZone'],
+                    "latitudeZone": gridZone['latitudeZone'],
+                    "polygon": gridZone['polygon'],
+                    "extent": gridZone['extent']}
+    
+    for square in _handle100kGrids(handlerArgs, aoi, buildGeometry, tolerance):
+      yield square
 
 
-def _handle100kGrids(args, AOI):
+def _handle100kGrids(args, aoi, buildGeometry=True, tolerance=None):
   '''
   Creates 100K meter grids
+  Each square is first classified from its bounds against the grid zone and
+  the AOI, the polygon intersect/disjoint tests are only run for boundary
+  squares. If buildGeometry is False (the squares will only be refined further)
+  no polygons are built at all.
+  With a tolerance (meters) the square polygons are densified adaptively
+  (see RefGridCells.densifyEdge) instead of every 25k m.
   '''
   zonePolygon = args['polygon']
+  zoneExtent = args['extent']
   utmZone = args['utmZone']
   latitudeZone = args['latitudeZone']
   minE = args['minE']
   maxE = args['maxE']
   minN = args['minN']
   maxN = args['maxN']
-  poly100k = [];
+
+  # the 100k squares are densified every 25k m (since the edges
+  # will appear to be curved on the map), so project the whole
+  # 25k m lattice covering the zone in a single batch
+  step = 25000
+  startN = int(math.floor(minN / 100000) * 100000)
+  endN = int(math.ceil(maxN / 100000) * 100000)
+  startE = int(math.floor(minE / 100000) * 100000)
+  endE = int(math.ceil(maxE / 100000) * 100000)
+  nodeN = numpy.arange(startN, endN + step, step, dtype=numpy.float64)
+  nodeE = numpy.arange(startE, endE + step, step, dtype=numpy.float64)
+  lats, lons = UTMProjection.UTMtoLL(nodeN[:, None], nodeE[None, :], utmZone)
+  lats = lats.tolist()
+  lons = lons.tolist()
+
+  # the letters of all the 100k squares of the zone, labelled from their centers
+  # (southern hemisphere northings with the false northing)
+  squareN = numpy.arange(startN, endN, 100000) + 50000
+  squareE = numpy.arange(startE, endE, 100000) + 50000
+  squareLetters = MGRSLabels.gridLettersBatch(utmZone,
+                                              squareE[None, :],
+                                              numpy.where(squareN < 0, squareN + 10000000, squareN)[:, None])
+  squareColumns = len(squareE)
 
   # Loop through northings, starting at the increment just south of minN
   # go through each increment of 100K meters, until maxN is reached
-  for n in range(int(math.floor(minN / 100000) * 100000), int(math.ceil(maxN / 100000) * 100000), 100000):
+  for n in range(startN, endN, 100000):
     # Loop through eastings, starting at the increment just west of minE
     # go through each increment of 100K meters, until maxE is reached
-    for e in range(int(math.floor(minE / 100000) * 100000), int(math.ceil(maxE / 100000) * 100000), 100000):
+    for e in range(startE, endE, 100000):
       # For each 100k increment of n & e, build a 100k by 100k grid polygon,
       # used for labeling and border graphics
 
-      # find the label of the 100K grid
-      text = "{0}{1}{2}".format(utmZone,latitudeZone, _findGridLetters(utmZone, 10000000 + (n + 50000) if (n + 50000) < 0 else  n + 50000, e + 50000))
-      
-      # Build the 100k grid boundary
+      # Build the 100k grid boundary from the lattice, starting at the
+      # bottom left corner and working clockwise:
+      # bottom left -> top left -> top right -> bottom right -> bottom left
+      row = (n - startN) // step
+      col = (e - startE) // step
       ring = []
-      
-      # start at the bottom left corner, and work north to
-      # the top left corner (in 25k m increments)
-      # this is a faster way of densifying the line, since it
-      # will appear to be curved on the map
-      
-      for i in range(n, n + 100000, 25000):
-        pt = _UTMtoLL(i, e, utmZone)
-        if i == n:
-          BL = arcpy.PointGeometry(arcpy.Point(pt['lon'], pt['lat']),arcpy.SpatialReference(4326))
-        ring.append([pt['lon'], pt['lat']])
-      
-      
-      # continue adding points to the polygon, working from the
-      # top left to top right corner 
-      
-      for i in range(e, e + 100000, 25000):
-        pt = _UTMtoLL(n + 100000, i, utmZone)
-        ring.append([pt['lon'], pt['lat']])
+      for i in range(0, 4):
+        ring.append([lons[row + i][col], lats[row + i][col]])
+      for i in range(0, 4):
+        ring.append([lons[row + 4][col + i], lats[row + 4][col + i]])
+      for i in range(0, 4):
+        ring.append([lons[row + 4 - i][col + 4], lats[row + 4 - i][col + 4]])
+      for i in range(0, 4):
+        ring.append([lons[row][col + 4 - i], lats[row][col + 4 - i]])
+
+      # classify the square from the bounds of its (densified) boundary
+      ringLons = [pt[0] for pt in ring]
+      ringLats = [pt[1] for pt in ring]
+      bounds = (min(ringLons), min(ringLats), max(ringLons), max(ringLats))
+      zoneState = _classifyExtents(*bounds, region=zoneExtent, inner=zoneExtent)
+      if zoneState == _CELL_OUTSIDE:
+        continue
+      aoiState = _classifyExtents(*bounds, region=aoi['extent'], inner=aoi['inner'])
+      if aoiState == _CELL_OUTSIDE:
+        continue
 
-      # continue adding points to the polygon, working from the
-      # top right to bottom right corner
-      
-      for i in range(n + 100000, n , -25000):
-        pt = _UTMtoLL(i, e + 100000, utmZone);
-        ring.append([pt['lon'], pt['lat']]);
-      
-      BR = arcpy.PointGeometry(arcpy.Point(pt['lon'], pt['lat']),arcpy.SpatialReference(4326))      
-      # continue adding points to the polygon, working from
-      # the bottom right to the bottom left corner (to close the polygon)
-      
-      for i in range(e + 100000, e, -25000):
-        pt = _UTMtoLL(n, i, utmZone)
-        ring.append([pt['lon'], pt['lat']])
+      clippedPolygon = None
+      polygon = None
+      if buildGeometry:
+        if tolerance is not None:
+          # only keep the vertices needed to stay within the tolerance
+          ring = RefGridCells.densifyRing([(e, n), (e, n + 100000), (e + 100000, n + 100000), (e + 100000, n)],
+                                          [ring[0], ring[4], ring[8], ring[12]],
+                                          utmZone, tolerance)
+
+        # create the polygon, from the ring created above
+        polygon = _buildPolygon(ring)
+
+        # now that the 100k grid polygon exists, clip it by the grid zone polygon
+        # (unless it is entirely inside the zone)
+        if zoneState == _CELL_INSIDE:
+          clippedPolygon = polygon
+        else:
+          clippedPolygon = polygon.intersect(zonePolygon,4)      
+                
+        # after being clipped above, they may no longer exist
+        # (i.e. they were not within the bounds of the zone)
+        # if this is the case, skip the rest and move on to the next increment of n or e
+        if not clippedPolygon:
+          continue
+        
+        # now check the clipped polygon touches the AOI drawn
+        if aoiState != _CELL_INSIDE and aoi['polygon'].disjoint(polygon):
+          continue
 
-      # create the polygon, from the ring created above
-      polygon = arcpy.Polygon(arcpy.Array([arcpy.Point(*coords) for coords in ring]),arcpy.SpatialReference(4326))
-      
-      # we need to rotate the drawn extent to match the angle of the grid (so that we can square the grid off)
-      angle = BL.angleAndDistanceTo(BR)
-      #arcpy.AddMessage(angle)  
+      # find the label of the 100K grid
+      text = "{0}{1}{2}".format(utmZone, latitudeZone,
+                                squareLetters[((n - startN) // 100000) * squareColumns + (e - startE) // 100000])
+
+      gridPolygon = {"clippedPolygon": clippedPolygon,
+                        "unclippedPolygon": polygon,
+                        "xmin": e,
+                        "ymin": n,
+                        "xmax": (e + 100000),
+                        "ymax": (n + 100000),
+                        "utmZone": utmZone,
+                        "latitudeZone": latitudeZone,
+                        "zonePolygon": zonePolygon,
+                        "zoneExtent": zoneExtent,
+                        "insideZone": zoneState == _CELL_INSIDE,
+                        "insideAOI": aoiState == _CELL_INSIDE,
+                        GRID_FIELD_NAME: text}
+        
+      yield gridPolygon
 
-      # now that the 100k grid polygon exists, clip it by the grid zone polygon
-      clippedPolygon = polygon.intersect(zonePolygon,4)      
-                
-      # after being clipped above, they may no longer exist
-      # (i.e. they were not within the bounds of the zone)
-      # if this is the case, skip the rest and move on to the next increment of n or e
+
+def _iterGridSquares(squares, interval, finalInterval, aoi, tolerance=None):
+  '''
+  Lazily refines each square, depth first, from interval down to finalInterval.
+  Only the cells of finalInterval are yielded, in the same order a level by level
+  refinement of all the squares would produce them.
+  '''
+  for square in squares:
+    for cell in _handleGridSquares(square, interval, aoi, interval <= finalInterval, tolerance):
+      if interval > finalInterval:
+        for subCell in _iterGridSquares([cell], interval // 10, finalInterval, aoi, tolerance):
+          yield subCell
+      else:
+        yield cell
+
+
+def _handleGridSquares(poly, interval, aoi, buildGeometry=True, tolerance=None):
+  '''
+  This method is similar in nature to the 'handle100kGrids' method.
+  The cells of the square are enumerated and classified by
+  RefGridCells.squareCells and yielded one at a time.
+  Polygons are only built when buildGeometry is True (the final grid size),
+  intermediate cells only carry their bounds. The final cells are densified
+  to the tolerance (meters), if there is one.
+  '''
+  zonePolygon = poly['zonePolygon']
+  for cell in RefGridCells.squareCells(poly, interval, aoi['extent'], aoi['inner'], tolerance if buildGeometry else None):
+    clippedPolygon = None
+    polygon = None
+    if buildGeometry:
+      clippedPolygon, polygon = _cellPolygons(cell['ring'], cell['zoneState'], cell['aoiState'], zonePolygon, aoi)
       if not clippedPolygon:
         continue
+
+    cell["clippedPolygon"] = clippedPolygon
+    cell["unclippedPolygon"] = polygon
+    cell["zonePolygon"] = zonePolygon
+    yield cell
+
+
+def _cellPolygons(ring, zoneState, aoiState, zonePolygon, aoi):
+  '''
+  Builds the polygon of a cell from its ring, returns the polygon clipped to the
+  grid zone (None if the cell doesn't touch the zone or the AOI) and the unclipped
+  polygon. The intersect/disjoint tests are only run for boundary cells.
+  '''
+  polygon = _buildPolygon(ring)
+
+  if zoneState == _CELL_INSIDE:
+    clippedPolygon = polygon
+  else:
+    clippedPolygon = polygon.intersect(zonePolygon,4)      
+
+  if not clippedPolygon:
+    return None, polygon      
         
-      # now check the clipped polygon touches the AOI drawn
-      if not AOI.disjoint(polygon):
-        gridPolygon = {"clippedPolygon": clippedPolygon,
-                          "unclippedPolygon": polygon,
-                          "xmin": e,
-                          "ymin": n,
-                          "xmax": (e + 100000),
-                          "ymax": (n + 100000),
-                          "utmZone": utmZone,
-                          "latitudeZone": latitudeZone,
-                          GRID_FIELD_NAME: text}
-          
-        poly100k.append(gridPolygon)
-
-  return poly100k
-
-
-def _handleGridSquares(poly, interval, AOI):
-  '''
-  This method is similar in nature to the 'handle100kGrids' method,
-  Thus, much of this code is similar to the 'handle100kGrids' method.
-  '''
-  clippedPoly = poly['clippedPolygon']
-  latitudeZone = poly['latitudeZone']
-  utmZone = poly['utmZone']
-  GZD = poly[GRID_FIELD_NAME]
-  minE = poly['xmin']
-  maxE = poly['xmax']
-  minN = poly['ymin']
-  maxN = poly['ymax']    
-  polyOut = []
-  
-  for n in range(int(math.floor(minN / interval) * interval), int(maxN), int(interval)):    
-    for e in range(int(math.floor(minE / interval) * interval), int(maxE), int(interval)):  
-      ring = []
-      
-      ptBL = _UTMtoLL(n, e, utmZone)
-      ring.append([ptBL['lon'], ptBL['lat']])
-      ptTL = _UTMtoLL(n + interval, e, utmZone)
-      ring.append([ptTL['lon'], ptTL['lat']])
-      ptTR = _UTMtoLL(n + interval, e + interval, utmZone)
-      ring.append([ptTR['lon'], ptTR['lat']])
-      ptBR = _UTMtoLL(n, e + interval, utmZone)
-      ring.append([ptBR['lon'], ptBR['lat']])
-      # close off poly
-      ring.append([ptBL['lon'], ptBL['lat']])
-            
-      polygon = arcpy.Polygon(arcpy.Array([arcpy.Point(*coords) for coords in ring]),arcpy.SpatialReference(4326))
-            
-      clippedPolygon = polygon.intersect(clippedPoly,4)      
-      
-      if not clippedPolygon:
-        continue      
-            
-      if not AOI.disjoint(polygon):
-        text = "{0}{1}".format(GZD,_padZero(e % 100000 / interval,  5 - 
-          math.log10(interval)) + _padZero(((10000000 + n) if minN < 0 else n) % 100000 / interval, 5 - 
-          math.log10(interval)))        
-              
-        gridPolygon = {"clippedPolygon": clippedPolygon,
-          "unclippedPolygon": polygon,
-          "clippedPolygon": clippedPolygon,
-          "xmin": e,
-          "ymin": n,
-          "xmax": e + interval,
-          "ymax": n + interval,
-          "x": _padZero(e % 100000 / interval,  5 - math.log10(interval)),
-          "y": _padZero(((10000000 + n) if minN < 0 else n) % 100000 / interval,5 - math.log10(interval)),
-          "utmZone": utmZone,
-          "latitudeZone": latitudeZone,
-          GRID_FIELD_NAME: GZD,
-          "text": text}
-          
-        polyOut.append(gridPolygon)
+  if aoiState != _CELL_INSIDE and aoi['polygon'].disjoint(polygon):
+    return None, polygon
+
+  return clippedPolygon, polygon
+
+
+def _iterGridSquaresParallel(squares, finalInterval, aoi, processes, tolerance=None):
+  '''
+  Same as _iterGridSquares(squares, 10000, finalInterval, aoi, tolerance), with the cell
+  coordinates and labels computed by a pool of worker processes. The work is
+  split by 100k square (see RefGridCells.gridTasks) and the results are merged
+  in task order, so the cells are yielded in the same order as the serial
+  version. Only the cell polygons are built here, in this process.
+  '''
+  squares = list(squares)
+  zonePolygons = {}
+  for square in squares:
+    zonePolygons["{0}{1}".format(square['utmZone'], square['latitudeZone'])] = square['zonePolygon']
+
+  def tasks():
+    for square in squares:
+      zoneKey = "{0}{1}".format(square['utmZone'], square['latitudeZone'])
+      for task in RefGridCells.gridTasks(square, finalInterval, aoi['extent'], aoi['inner'], zoneKey, tolerance):
+        yield task
+
+  Utilities.SetPoolExecutable()
+  pool = multiprocessing.Pool(processes)
+  try:
+    for cells in pool.imap(RefGridCells.refineTask, tasks(), 4):
+      for text, square, ring, zoneState, aoiState, zoneKey in cells:
+        clippedPolygon, polygon = _cellPolygons(ring, zoneState, aoiState, zonePolygons[zoneKey], aoi)
+        if not clippedPolygon:
+          continue
+        yield {"clippedPolygon": clippedPolygon,
+               "unclippedPolygon": polygon,
+               GRID_FIELD_NAME: square,
+               "text": text}
+    pool.close()
+  except:
+    pool.terminate()
+    raise
+  finally:
+    pool.join()
+
 
-      
-  return polyOut
-    
-  
 def _LLtoUTM (lat, lon, zoneNumber, zoneBand):
   '''
   Converts lat/lon to UTM coords
@@ -601,101 +885,9 @@ def _UTMtoLL(UTMNorthing, UTMEasting, UTMZoneNumber):
 def _findGridLetters (zoneNum, northing, easting):
   '''
   Retrieve the square identification for a given coordinate pair & zone
-  See "lettersHelper" function documentation for more details.
-  '''
-  zoneNum = int(zoneNum)
-  northing = float(northing)
-  easting = float(easting)
-  row = 1
-  #northing coordinate to single-meter precision
-  north_1m = round(northing)
-  # Get the row position for the square identifier that contains the point
-  while north_1m >= 100000:
-    north_1m = north_1m - 100000
-    row = row + 1
-  # cycle repeats (wraps) after 20 rows
-  row = row % 20
-  col = 0
-  # easting coordinate to single-meter precision
-  east_1m = round(easting)
-  # Get the column position for the square identifier that contains the point
-  while east_1m >= 100000:
-    east_1m = east_1m - 100000
-    col = col + 1
-  #cycle repeats (wraps) after 8 columns
-  col = col % 8
-  
-  return _lettersHelper(_findSet(zoneNum), row, col);
-
-
-def _lettersHelper(set, row, col):
-  '''
-  Retrieve the Square Identification (two-character letter code), for the
-  given row, column and set identifier
+  See MGRSLabels.gridLetters for more details.
   '''
-  # handle case of last row
-  
-  if row == 0:
-    row = 20 - 1
-  else:
-    row = row - 1
-  # handle case of last column
-  if col == 0:
-    col = 8 - 1
-  else:
-    col = col - 1
-  
-  if set == 1:
-    l1 = "ABCDEFGH" # column ids
-    l2 = "ABCDEFGHJKLMNPQRSTUV" # row ids
-  elif set == 2:
-    l1 = "JKLMNPQR"
-    l2 = "FGHJKLMNPQRSTUVABCDE"
-  elif set == 3:
-    l1 = "STUVWXYZ"
-    l2 = "ABCDEFGHJKLMNPQRSTUV"
-  elif set == 4:
-    l1 = "ABCDEFGH"
-    l2 = "FGHJKLMNPQRSTUVABCDE"
-  elif set == 5:
-    l1 = "JKLMNPQR"
-    l2 = "ABCDEFGHJKLMNPQRSTUV"
-  else:
-    l1 = "STUVWXYZ"
-    l2 = "FGHJKLMNPQRSTUVABCDE"
-  
-  return l1[col] + l2[row]
-
-
-def _findSet(zoneNum):
-  '''
-  There are six unique sets, corresponding to individual grid numbers in
-  sets 1-6, 7-12, 13-18, etc. Set 1 is the same as sets 7, 13, ..;
-  Set 2 is the same as sets 8, 14, ..
-  '''
-  zoneNum = int(zoneNum)
-  zoneNum = zoneNum % 6
-  if zoneNum == 0:
-    return 6
-  elif zoneNum == 1:
-    return 1
-  elif zoneNum == 2:
-    return 2
-  elif zoneNum == 3:
-    return 3
-  elif zoneNum == 4:
-    return 4
-  elif zoneNum == 5:
-    return 5
-  else:
-    return -1
-
-
-def _padZero(number, width):
-  number = str(int(number))
-  while len(number) < width:
-    number = "0" + number
-  return number
+  return MGRSLabels.gridLetters(zoneNum, easting, northing)
 
 
 def _testing():
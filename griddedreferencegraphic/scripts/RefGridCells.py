@@ -0,0 +1,366 @@
+# coding: utf-8
+'''
+------------------------------------------------------------------------------
+ Copyright 2017 Esri
+ Licensed under the Apache License, Version 2.0 (the "License");
+ you may not use this file except in compliance with the License.
+ You may obtain a copy of the License at
+   http://www.apache.org/licenses/LICENSE-2.0
+ Unless required by applicable law or agreed to in writing, software
+ distributed under the License is distributed on an "AS IS" BASIS,
+ WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+ See the License for the specific language governing permissions and
+ limitations under the License.
+------------------------------------------------------------------------------
+ ==================================================
+ RefGridCells.py
+ --------------------------------------------------
+ requirements: Python 2.7 or Python 3.5+, NumPy (installed with ArcGIS)
+ author: ArcGIS Solutions
+ contact: support@esri.com
+ company: Esri
+ ==================================================
+ description:
+ Cell enumeration for the sub 100k MGRS grids built by RefGrid.
+ Cells are described by plain data only (UTM bounds, WGS84 corner
+ ring, label and classification), no arcpy geometry, so this module
+ does not import arcpy and its functions can run in worker processes.
+ RefGrid builds (and clips) the cell polygons from the results.
+ ==================================================
+'''
+
+import math
+import numpy
+
+try:
+    from . import UTMProjection
+    from . import MGRSLabels
+except ImportError:
+    import UTMProjection
+    import MGRSLabels
+
+GRID_FIELD_NAME = "Grid"
+
+# Cell classifications, w.r.t. a grid zone or the AOI
+CELL_OUTSIDE = 0
+CELL_BOUNDARY = 1
+CELL_INSIDE = 2
+
+# The most final cells handed to a worker in one task (see gridTasks)
+TASK_CELLS = 10000
+
+# Approximate meters per degree of latitude, and of longitude at the equator,
+# used to measure densification errors
+METERS_PER_DEGREE_LAT = 110574.0
+METERS_PER_DEGREE_LON = 111320.0
+
+# The most times an edge is halved by densifyEdge
+MAX_DENSIFY_DEPTH = 12
+
+# Mean radius of the earth (meters), used to measure grid zone areas
+EARTH_RADIUS = 6371008.8
+
+# Rough costs of writing a cell to the output, used by estimateGrid: bytes of
+# each vertex (x, y) and of the rest of a row (label, object ID, record and
+# index overhead), and cells built, clipped and inserted per second by one process
+BYTES_PER_VERTEX = 16
+BYTES_PER_CELL = 64
+CELLS_PER_SECOND = 2000.0
+
+
+def classifyExtents(xmin, ymin, xmax, ymax, region, inner=None):
+    '''
+    Classifies cells, from their lat/lon bounds (scalars or arrays), against
+    a region given as its extent (xmin, ymin, xmax, ymax):
+    CELL_OUTSIDE  - the cell bounds do not touch the region extent
+    CELL_INSIDE   - the cell bounds are within inner, an extent known to be
+                    completely covered by the region (None if not known)
+    CELL_BOUNDARY - anything else, needs a real geometry test
+    '''
+    outside = (xmax < region[0]) | (xmin > region[2]) | (ymax < region[1]) | (ymin > region[3])
+    states = numpy.where(outside, CELL_OUTSIDE, CELL_BOUNDARY)
+    if inner is not None:
+        inside = (xmin >= inner[0]) & (xmax <= inner[2]) & (ymin >= inner[1]) & (ymax <= inner[3])
+        states = numpy.where(inside, CELL_INSIDE, states)
+    return states
+
+
+def edgeErrors(startLons, startLats, endLons, endLats, midLons, midLats):
+    '''
+    Distances, in meters, between the true midpoints of UTM edges (midLons,
+    midLats) and the midpoints of the straight geographic segments between
+    their ends. Scalars or arrays.
+    '''
+    dx = (midLons - (startLons + endLons) / 2.0) * numpy.cos(numpy.radians(midLats)) * METERS_PER_DEGREE_LON
+    dy = (midLats - (startLats + endLats) / 2.0) * METERS_PER_DEGREE_LAT
+    return numpy.hypot(dx, dy)
+
+
+def densifyEdge(start, end, startLL, endLL, utmZone, tolerance, depth=0):
+    '''
+    Returns the [lon, lat] vertices to insert between the ends of a UTM edge,
+    start and end as (easting, northing) with startLL and endLL their [lon, lat],
+    so that the edge doesn't depart from the straight geographic segments between
+    its vertices by more than tolerance meters. The edge is halved until each
+    part is within tolerance.
+    '''
+    mid = ((start[0] + end[0]) / 2.0, (start[1] + end[1]) / 2.0)
+    lat, lon = UTMProjection.UTMtoLL(mid[1], mid[0], utmZone)
+    midLL = [float(lon), float(lat)]
+    if depth >= MAX_DENSIFY_DEPTH or edgeErrors(startLL[0], startLL[1], endLL[0], endLL[1], midLL[0], midLL[1]) <= tolerance:
+        return []
+    return (densifyEdge(start, mid, startLL, midLL, utmZone, tolerance, depth + 1) + [midLL] +
+            densifyEdge(mid, end, midLL, endLL, utmZone, tolerance, depth + 1))
+
+
+def densifyRing(corners, cornersLL, utmZone, tolerance, edges=None):
+    '''
+    Returns the closed [lon, lat] ring of a polygon from its UTM corners (and their
+    [lon, lat]), with each edge densified by densifyEdge. edges, if given, flags
+    which edges need densifying (the others are known to be within tolerance).
+    '''
+    ring = []
+    count = len(corners)
+    for i in range(0, count):
+        ring.append(cornersLL[i])
+        if edges is None or edges[i]:
+            j = (i + 1) % count
+            ring.extend(densifyEdge(corners[i], corners[j], cornersLL[i], cornersLL[j], utmZone, tolerance))
+    ring.append(cornersLL[0])
+    return ring
+
+
+def squareCells(square, interval, aoiExtent, aoiInner, tolerance=None):
+    '''
+    Yields the cells, of size interval, of a grid square that are not outside
+    its grid zone or the AOI, in row (south to north) then column order.
+    square needs the xmin, ymin, xmax, ymax (UTM), utmZone, latitudeZone,
+    zoneExtent, insideZone, insideAOI and Grid (100k square label) items.
+    All the cell corners are projected in one batch and all the cells are
+    classified in one pass (cells of a square that is entirely inside the
+    zone or the AOI inherit that). Each cell also carries its corner ring
+    (closed, in WGS84) and its zoneState/aoiState classifications.
+    With a tolerance (meters), the cell edges that depart from a straight
+    geographic segment by more than the tolerance are densified.
+    '''
+    utmZone = square['utmZone']
+    GZD = square[GRID_FIELD_NAME]
+    zoneExtent = square['zoneExtent']
+    minE = square['xmin']
+    maxE = square['xmax']
+    minN = square['ymin']
+    maxN = square['ymax']
+    interval = int(interval)
+
+    northings = range(int(math.floor(minN / interval) * interval), int(maxN), interval)
+    eastings = range(int(math.floor(minE / interval) * interval), int(maxE), interval)
+    if len(northings) == 0 or len(eastings) == 0:
+        return
+
+    # project every cell corner of this square in one batch, the corners
+    # are shared between neighbouring cells
+    nodeN = numpy.arange(northings[0], northings[-1] + 2 * interval, interval, dtype=numpy.float64)
+    nodeE = numpy.arange(eastings[0], eastings[-1] + 2 * interval, interval, dtype=numpy.float64)
+    lats, lons = UTMProjection.UTMtoLL(nodeN[:, None], nodeE[None, :], utmZone)
+
+    # classification pass over all the cells of the square
+    cellShape = (len(northings), len(eastings))
+    cellXMin = numpy.minimum(numpy.minimum(lons[:-1, :-1], lons[1:, :-1]), numpy.minimum(lons[1:, 1:], lons[:-1, 1:]))
+    cellXMax = numpy.maximum(numpy.maximum(lons[:-1, :-1], lons[1:, :-1]), numpy.maximum(lons[1:, 1:], lons[:-1, 1:]))
+    cellYMin = numpy.minimum(numpy.minimum(lats[:-1, :-1], lats[1:, :-1]), numpy.minimum(lats[1:, 1:], lats[:-1, 1:]))
+    cellYMax = numpy.maximum(numpy.maximum(lats[:-1, :-1], lats[1:, :-1]), numpy.maximum(lats[1:, 1:], lats[:-1, 1:]))
+    if square['insideZone']:
+        zoneStates = numpy.full(cellShape, CELL_INSIDE)
+    else:
+        zoneStates = classifyExtents(cellXMin, cellYMin, cellXMax, cellYMax, zoneExtent, zoneExtent)
+    if square['insideAOI']:
+        aoiStates = numpy.full(cellShape, CELL_INSIDE)
+    else:
+        aoiStates = classifyExtents(cellXMin, cellYMin, cellXMax, cellYMax, aoiExtent, aoiInner)
+    zoneStates = zoneStates.tolist()
+    aoiStates = aoiStates.tolist()
+
+    # check the midpoints of all the horizontal and vertical cell edges in one
+    # batch, only the edges that are out of tolerance are densified
+    if tolerance is not None:
+        midLats, midLons = UTMProjection.UTMtoLL(nodeN[:, None], nodeE[None, :-1] + interval / 2.0, utmZone)
+        rowEdges = (edgeErrors(lons[:, :-1], lats[:, :-1], lons[:, 1:], lats[:, 1:], midLons, midLats) > tolerance).tolist()
+        midLats, midLons = UTMProjection.UTMtoLL(nodeN[:-1, None] + interval / 2.0, nodeE[None, :], utmZone)
+        columnEdges = (edgeErrors(lons[:-1, :], lats[:-1, :], lons[1:, :], lats[1:, :], midLons, midLats) > tolerance).tolist()
+
+    lats = lats.tolist()
+    lons = lons.tolist()
+
+    # the label parts of each column and row of cells
+    xs = MGRSLabels.eastingSuffixes(eastings, interval)
+    ys = MGRSLabels.northingSuffixes(northings, interval)
+
+    for row, n in enumerate(northings):
+        for col, e in enumerate(eastings):
+            zoneState = zoneStates[row][col]
+            aoiState = aoiStates[row][col]
+            if zoneState == CELL_OUTSIDE or aoiState == CELL_OUTSIDE:
+                continue
+
+            ring = [[lons[row][col], lats[row][col]],
+                    [lons[row + 1][col], lats[row + 1][col]],
+                    [lons[row + 1][col + 1], lats[row + 1][col + 1]],
+                    [lons[row][col + 1], lats[row][col + 1]],
+                    # close off poly
+                    [lons[row][col], lats[row][col]]]
+            if tolerance is not None:
+                # west, north, east and south edges
+                edges = [columnEdges[row][col], rowEdges[row + 1][col], columnEdges[row][col + 1], rowEdges[row][col]]
+                if any(edges):
+                    corners = [(e, n), (e, n + interval), (e + interval, n + interval), (e + interval, n)]
+                    ring = densifyRing(corners, ring[:4], utmZone, tolerance, edges)
+
+            x = xs[col]
+            y = ys[row]
+
+            yield {"xmin": e,
+                   "ymin": n,
+                   "xmax": e + interval,
+                   "ymax": n + interval,
+                   "x": x,
+                   "y": y,
+                   "utmZone": utmZone,
+                   "latitudeZone": square['latitudeZone'],
+                   "zoneExtent": zoneExtent,
+                   "insideZone": zoneState == CELL_INSIDE,
+                   "insideAOI": aoiState == CELL_INSIDE,
+                   "zoneState": zoneState,
+                   "aoiState": aoiState,
+                   "ring": ring,
+                   GRID_FIELD_NAME: GZD,
+                   "text": "{0}{1}{2}".format(GZD, x, y)}
+
+
+def refineCells(square, interval, finalInterval, aoiExtent, aoiInner, tolerance=None):
+    '''
+    Refines a square, depth first, from interval down to finalInterval,
+    yielding only the cells of finalInterval (in the same order a level by
+    level refinement would produce them). Only the final cells are densified
+    (see squareCells).
+    '''
+    for cell in squareCells(square, interval, aoiExtent, aoiInner, tolerance if interval <= finalInterval else None):
+        if interval > finalInterval:
+            for subCell in refineCells(cell, interval // 10, finalInterval, aoiExtent, aoiInner, tolerance):
+                yield subCell
+        else:
+            yield cell
+
+
+def gridTasks(square, finalInterval, aoiExtent, aoiInner, zoneKey=None, tolerance=None):
+    '''
+    Splits the refinement of a 100k square into tasks of at most TASK_CELLS
+    final cells each, in output order. Small grids are one task per 100k
+    square, finer grids are split into the tiles (10k or 1k squares) that
+    aren't outside the zone or the AOI. zoneKey is passed back with each
+    cell, so the caller can find the zone polygon to clip with.
+    '''
+    tileInterval = finalInterval
+    while tileInterval < 100000 and (tileInterval * 10 // finalInterval) ** 2 <= TASK_CELLS:
+        tileInterval *= 10
+    if tileInterval >= 100000:
+        tiles = [square]
+    else:
+        tiles = refineCells(square, 10000, tileInterval, aoiExtent, aoiInner)
+    for tile in tiles:
+        yield (_plainSquare(tile), min(tileInterval, 100000) // 10, finalInterval, aoiExtent, aoiInner, zoneKey, tolerance)
+
+
+def refineTask(task):
+    '''
+    Worker entry point, runs one task from gridTasks and returns its final
+    cells as (text, 100k square label, ring, zoneState, aoiState, zoneKey) tuples.
+    '''
+    square, interval, finalInterval, aoiExtent, aoiInner, zoneKey, tolerance = task
+    return [(cell['text'], cell[GRID_FIELD_NAME], cell['ring'], cell['zoneState'], cell['aoiState'], zoneKey)
+            for cell in refineCells(square, interval, finalInterval, aoiExtent, aoiInner, tolerance)]
+
+
+def _plainSquare(square):
+    ''' The items of a square needed by squareCells (drops any geometry) '''
+    return dict((key, square[key]) for key in ('xmin', 'ymin', 'xmax', 'ymax', 'utmZone', 'latitudeZone',
+                                               'zoneExtent', 'insideZone', 'insideAOI', GRID_FIELD_NAME))
+
+
+def _densifiedVertices(lon, lat, utmZone, interval, tolerance):
+    '''
+    Vertices densifyEdge adds to the east-west and to the north-south edges,
+    of length interval, of a cell whose south west corner is at lon, lat
+    '''
+    e, n = UTMProjection.LLtoUTM(lat, lon, utmZone)
+    e, n = float(e), float(n)
+    added = []
+    for end in [(e + interval, n), (e, n + interval)]:
+        mid = ((e + end[0]) / 2.0, (n + end[1]) / 2.0)
+        lats, lons = UTMProjection.UTMtoLL(numpy.array([n, end[1], mid[1]]), numpy.array([e, end[0], mid[0]]), utmZone)
+        error = float(edgeErrors(lons[0], lats[0], lons[1], lats[1], lons[2], lats[2]))
+        # the error of an edge falls about four times each time it is halved
+        depth = 0
+        while error > tolerance and depth < MAX_DENSIFY_DEPTH:
+            error /= 4.0
+            depth += 1
+        added.append(2 ** depth - 1)
+    return added
+
+
+def estimateGrid(aoiExtent, zones, interval, tolerance=None):
+    '''
+    Predicts the size of a grid before it is built, as a dictionary of:
+    zones    - grid zones the AOI extent touches
+    cells    - cells of size interval (meters) that touch the AOI
+    vertices - vertices of the cell polygons
+    bytes    - size of the output
+    seconds  - time to build it in one process
+    aoiExtent is the AOI extent (xmin, ymin, xmax, ymax) in WGS84, zones the
+    (utmZone, zone extent) of the grid zones that extent touches. The grid is
+    built over the whole AOI extent, so that is what is estimated, whatever
+    part of it the AOI features themselves cover.
+    An interval of 1000000 (or more) is one cell per grid zone.
+    The cells of each zone are counted from the area of its overlap with the
+    AOI extent, plus the row and column of partial cells along its edges,
+    and the vertices follow the densification of RefGrid (every 25k m for
+    100k squares without a tolerance, else densifyEdge).
+    '''
+    cells = 0.0
+    vertices = 0.0
+    zoneCount = 0
+    for utmZone, zoneExtent in zones:
+        xmin, ymin = max(aoiExtent[0], zoneExtent[0]), max(aoiExtent[1], zoneExtent[1])
+        xmax, ymax = min(aoiExtent[2], zoneExtent[2]), min(aoiExtent[3], zoneExtent[3])
+        if xmin > xmax or ymin > ymax:
+            continue
+        # zones that only share an edge with a (non degenerate) AOI extent
+        if (xmin == xmax and aoiExtent[0] < aoiExtent[2]) or (ymin == ymax and aoiExtent[1] < aoiExtent[3]):
+            continue
+        zoneCount += 1
+        if interval >= 1000000:
+            cells += 1
+            vertices += 5
+            continue
+
+        width = math.radians(xmax - xmin) * EARTH_RADIUS * math.cos(math.radians((ymin + ymax) / 2.0))
+        height = math.radians(ymax - ymin) * EARTH_RADIUS
+        area = (EARTH_RADIUS ** 2) * math.radians(xmax - xmin) * abs(math.sin(math.radians(ymax)) - math.sin(math.radians(ymin)))
+        zoneCells = area / float(interval * interval) + (width + height) / float(interval) + 1
+
+        if tolerance is not None:
+            rowAdded, columnAdded = _densifiedVertices((xmin + xmax) / 2.0, (ymin + ymax) / 2.0, utmZone, interval, tolerance)
+            cellVertices = 5 + 2 * rowAdded + 2 * columnAdded
+        elif interval >= 100000:
+            cellVertices = 17
+        else:
+            cellVertices = 5
+        cells += zoneCells
+        vertices += zoneCells * cellVertices
+
+    cells = int(math.ceil(cells))
+    vertices = int(math.ceil(vertices))
+    return {"zones": zoneCount,
+            "cells": cells,
+            "vertices": vertices,
+            "bytes": vertices * BYTES_PER_VERTEX + cells * BYTES_PER_CELL,
+            "seconds": cells / CELLS_PER_SECOND}
@@ -0,0 +1,108 @@
+# coding: utf-8
+'''
+------------------------------------------------------------------------------
+ Copyright 2017 Esri
+ Licensed under the Apache License, Version 2.0 (the "License");
+ you may not use this file except in compliance with the License.
+ You may obtain a copy of the License at
+   http://www.apache.org/licenses/LICENSE-2.0
+ Unless required by applicable law or agreed to in writing, software
+ distributed under the License is distributed on an "AS IS" BASIS,
+ WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+ See the License for the specific language governing permissions and
+ limitations under the License.
+------------------------------------------------------------------------------
+ ==================================================
+ RefGridCheckpoint.py
+ --------------------------------------------------
+ requirements: Python 2.7 or Python 3.5+
+ author: ArcGIS Solutions
+ contact: support@esri.com
+ company: Esri
+ ==================================================
+ description:
+ Checkpoints of the reference grids built by RefGrid, so an unfinished
+ build can be resumed. A checkpoint is a JSON file:
+   {"finished": {100k square or partition: [first OID, last OID]},
+    "output": {"rows": rows of the output so far,
+               "lastOID": object id of the last of them,
+               "lastLabel": its Grid value}}
+ The output state is checked against the rows of the output before a build
+ is resumed, so a checkpoint is never applied to an output that was
+ overwritten or replaced since it was written.
+ Does not use arcpy.
+ ==================================================
+'''
+
+import os
+import json
+import hashlib
+
+
+def CheckpointPath(folder, parameters):
+    '''
+    Path of the checkpoint file of a build in folder (the scratch folder),
+    named from a hash of the build parameters
+    '''
+    signature = hashlib.md5(json.dumps([str(parameter) for parameter in parameters]).encode('utf-8')).hexdigest()
+    return os.path.join(folder, "RefGrid_{0}.json".format(signature))
+
+
+def NewCheckpoint():
+    ''' Checkpoint of a build that has not written anything yet '''
+    return {"finished": {}, "output": {"rows": 0, "lastOID": None, "lastLabel": None}}
+
+
+def ReadCheckpoint(path):
+    ''' Checkpoint at path, None if there isn't one (or it can't be read) '''
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, 'r') as checkpointFile:
+            checkpoint = json.load(checkpointFile)
+    except (IOError, ValueError):
+        return None
+    if not isinstance(checkpoint, dict) or "finished" not in checkpoint:
+        return None
+    return checkpoint
+
+
+def WriteCheckpoint(path, checkpoint):
+    with open(path, 'w') as checkpointFile:
+        json.dump(checkpoint, checkpointFile)
+
+
+def RemoveCheckpoint(path):
+    if os.path.exists(path):
+        os.remove(path)
+
+
+def RecordOutput(checkpoint, rows, lastOID, lastLabel):
+    ''' Adds rows written to the output, the last with lastOID and lastLabel, to the checkpoint '''
+    if lastOID is None:
+        return
+    state = checkpoint["output"]
+    state["rows"] += rows
+    state["lastOID"] = lastOID
+    state["lastLabel"] = lastLabel
+
+
+def MatchesOutput(checkpoint, rows):
+    '''
+    True if the (object id, label) rows of the output are the rows recorded in
+    the checkpoint: as many rows up to its last object id, the last of them
+    with its label (rows after it are the unfinished square, and are dropped
+    when resuming). Otherwise the output was overwritten, or replaced by
+    another feature class with the same path, since the checkpoint was written
+    '''
+    state = checkpoint.get("output")
+    if not isinstance(state, dict) or state.get("lastOID") is None:
+        return False
+    count = 0
+    lastLabel = None
+    for oid, label in rows:
+        if oid <= state["lastOID"]:
+            count += 1
+            if oid == state["lastOID"]:
+                lastLabel = label
+    return count == state.get("rows") and lastLabel == state.get("lastLabel")
@@ -0,0 +1,153 @@
+# coding: utf-8
+'''
+------------------------------------------------------------------------------
+ Copyright 2017 Esri
+ Licensed under the Apache License, Version 2.0 (the "License");
+ you may not use this file except in compliance with the License.
+ You may obtain a copy of the License at
+   http://www.apache.org/licenses/LICENSE-2.0
+ Unless required by applicable law or agreed to in writing, software
+ distributed under the License is distributed on an "AS IS" BASIS,
+ WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+ See the License for the specific language governing permissions and
+ limitations under the License.
+------------------------------------------------------------------------------
+ ==================================================
+ RefGridZones.py
+ --------------------------------------------------
+ requirements: Python 2.7 or Python 3.5+, NumPy (installed with ArcGIS)
+ author: ArcGIS Solutions
+ contact: support@esri.com
+ company: Esri
+ ==================================================
+ description:
+ The static index of the MGRS grid zones used by RefGrid to find the
+ grid zones of an input area. The index holds the bounds of the 1197
+ grid zones (with the Norway and Svalbard exceptions), the zones whose
+ bounds overlap the input features are looked up in it, and only those
+ candidates are tested against the features themselves, so the zones
+ found are the zones an INTERSECT selection of all of them would give.
+ Does not use arcpy.
+ ==================================================
+'''
+
+import numpy
+
+#Per MGRS definition, these are the valid grid zone letters
+# A,B,Y,Z reserved for north and south polar regions as UPS
+ZONE_LETTERS = ['C','D','E','F','G','H','J','K','L','M','N','P','Q','R','S','T','U','V','W','X']
+
+# The static grid zone index, see GridZoneIndex
+_gridZoneIndex = None
+
+
+def ZoneExtent(zoneNum, zoneLtrIndex):
+    '''
+    Returns the extent (xmin, ymin, xmax, ymax) of the zone
+    @param  {Number zoneNum The MGRS grid zone number
+    @param  {Number zoneLtrIndex
+    The index of the MGRS grid zone letter (w.r.t. ZONE_LETTERS)
+    @return {tuple The zone extent, None if the zone doesn't exist
+    '''
+    zoneId = str(zoneNum) + ZONE_LETTERS[zoneLtrIndex]
+
+    #There are several unique MGRS zones which don't follow the standard convention,
+    #they are defined here:
+    if zoneId == "32X" or zoneId == "34X" or zoneId == "36X":
+        #Per the MGRS definition, these zones don't exist
+        return None
+    elif zoneId == "31V":
+        #unique sized zone
+        return (0, 56, 3, 64)
+    elif zoneId == "32V":
+        #unique sized zone
+        return (3, 56, 12, 64)
+    elif zoneId == "31X":
+        #unique sized zone
+        return (0, 72, 9, 84)
+    elif zoneId == "33X":
+        #unique sized zone
+        return (9, 72, 21, 84)
+    elif zoneId == "35X":
+        #unique sized zone
+        return (21, 72, 33, 84)
+    elif zoneId == "37X":
+        #unique sized zone
+        return (33, 72, 42, 84)
+
+    #These are the default zones that do follow the standard MGRS convention:
+    #Compute the extent attributes of the zone
+    xmin = (zoneNum - 1) * 6 - 180
+    xmax = zoneNum * 6 - 180
+    ymin = zoneLtrIndex * 8 + -80
+    ymax = (zoneLtrIndex + 1) * 8  + -80
+
+    #Fix special cases where the numbers need to be adjusted
+    #exactly 180 or -180 causes problems, changes it to something close
+    xmin = 179.99999999 if xmin == 180 else xmin
+    xmin = -179.99999999 if xmin == -180 else xmin
+    xmax = 179.99999999 if xmax == 180 else xmax
+    xmax = -179.99999999 if xmax == -180 else xmax
+    if (ymax == 80):
+        #the top row of MGRS grid zones is taller than most, in order to extent to N84°
+        ymax  =  84
+
+    return (xmin, ymin, xmax, ymax)
+
+
+def GridZoneIndex():
+    '''
+    Returns the static index of the 1197 MGRS grid zones (excluding any zones that don't exist),
+    built once per process, in zone number then zone letter order:
+    {"ids": tuple of zone ids (i.e. "12S"),
+     "bounds": (1197, 4) array of the zone xmin, ymin, xmax, ymax in WGS84 degrees}
+    '''
+    global _gridZoneIndex
+    if _gridZoneIndex is not None:
+        return _gridZoneIndex
+
+    ids = []
+    bounds = []
+    for zoneNum in range(1,61):
+        for zoneLtr in range(0,len(ZONE_LETTERS)):
+            extent = ZoneExtent(zoneNum, zoneLtr)
+            if extent:
+                ids.append(str(zoneNum) + ZONE_LETTERS[zoneLtr])
+                bounds.append(extent)
+
+    _gridZoneIndex = {"ids": tuple(ids),
+                      "bounds": numpy.array(bounds, dtype=numpy.float64)}
+    return _gridZoneIndex
+
+
+def GridZoneIndexLookup(xmin, ymin, xmax, ymax):
+    '''
+    Returns the positions, in the grid zone index, of the zones whose bounds
+    intersect (or touch) the given WGS84 bounds
+    '''
+    bounds = GridZoneIndex()["bounds"]
+    hits = (bounds[:, 0] <= xmax) & (bounds[:, 2] >= xmin) & (bounds[:, 1] <= ymax) & (bounds[:, 3] >= ymin)
+    return numpy.nonzero(hits)[0].tolist()
+
+
+def FindGridZones(geometries, extent, intersects):
+    '''
+    Returns the positions, in the grid zone index (so in zone number then
+    zone letter order), of the grid zones that intersect any of the geometries.
+    extent(geometry) gives the (xmin, ymin, xmax, ymax) WGS84 bounds of a
+    geometry, and intersects(index, geometry) tests the zone at a position
+    in the index against a geometry, it is only called for the zones whose
+    bounds overlap the bounds of the geometry.
+    '''
+    candidates = {}
+    for geometry in geometries:
+        for index in GridZoneIndexLookup(*extent(geometry)):
+            candidates.setdefault(index, []).append(geometry)
+
+    zones = []
+    for index in sorted(candidates):
+        for geometry in candidates[index]:
+            if intersects(index, geometry):
+                zones.append(index)
+                break
+    return zones
@@ -0,0 +1,135 @@
+# coding: utf-8
+'''
+------------------------------------------------------------------------------
+ Copyright 2017 Esri
+ Licensed under the Apache License, Version 2.0 (the "License");
+ you may not use this file except in compliance with the License.
+ You may obtain a copy of the License at
+   http://www.apache.org/licenses/LICENSE-2.0
+ Unless required by applicable law or agreed to in writing, software
+ distributed under the License is distributed on an "AS IS" BASIS,
+ WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+ See the License for the specific language governing permissions and
+ limitations under the License.
+------------------------------------------------------------------------------
+ ==================================================
+ UTMProjection.py
+ --------------------------------------------------
+ requirements: Python 2.7 or Python 3.5+, NumPy (installed with ArcGIS)
+ author: ArcGIS Solutions
+ contact: support@esri.com
+ company: Esri
+ ==================================================
+ description:
+ Batched UTM <-> geographic (WGS84) conversions used by RefGrid.
+ These use the same series expansions as the scalar RefGrid._UTMtoLL and
+ RefGrid._LLtoUTM functions, but operate on whole NumPy arrays of
+ coordinates in a single call so grid vertices for a zone (or a 100k
+ square) can be projected at once.
+ ==================================================
+'''
+
+import numpy
+
+# scale factor of central meridian
+K0 = 0.9996
+# WGS84
+ER = 6378137.0
+E2 = 0.006694379990
+E2PS = E2 / (1 - E2)
+E1 = (1 - numpy.sqrt(1 - E2)) / (1 + numpy.sqrt(1 - E2))
+
+# meridian arc coefficients (shared by both directions)
+_M0 = 1 - E2 / 4 - 3 * E2 * E2 / 64 - 5 * E2 * E2 * E2 / 256
+_M2 = 3 * E2 / 8 + 3 * E2 * E2 / 32 + 45 * E2 * E2 * E2 / 1024
+_M4 = 15 * E2 * E2 / 256 + 45 * E2 * E2 * E2 / 1024
+_M6 = 35 * E2 * E2 * E2 / 3072
+
+# footprint latitude coefficients
+_P2 = 3 * E1 / 2 - 27 * E1 * E1 * E1 / 32
+_P4 = 21 * E1 * E1 / 16 - 55 * E1 * E1 * E1 * E1 / 32
+_P6 = 151 * E1 * E1 * E1 / 96
+
+
+def _lonOrigin(zoneNumber):
+    ''' central meridian, in degrees, for a zone number (+3 puts origin in zone center) '''
+    return (numpy.asarray(zoneNumber, dtype=numpy.float64) - 1) * 6 - 180 + 3
+
+
+def UTMtoLL(northings, eastings, zoneNumber):
+    '''
+    Convert UTM coordinates to decimal degrees.
+    northings  : array-like of northing-m (southern hemisphere NEGATIVE
+                 from the equator, 'real' value - 10,000,000)
+    eastings   : array-like of easting-m
+    zoneNumber : 6-deg longitudinal zone, scalar or array-like
+    All inputs are broadcast against each other.
+    Returns a (lats, lons) tuple of NumPy arrays.
+    '''
+    xUTM = numpy.asarray(eastings, dtype=numpy.float64) - 500000.0
+    yUTM = numpy.asarray(northings, dtype=numpy.float64)
+
+    M = yUTM / K0
+    mu = M / (ER * _M0)
+    phi1Rad = mu + _P2 * numpy.sin(2 * mu) + _P4 * numpy.sin(4 * mu) + _P6 * numpy.sin(6 * mu)
+
+    sinPhi1 = numpy.sin(phi1Rad)
+    cosPhi1 = numpy.cos(phi1Rad)
+    tanPhi1 = numpy.tan(phi1Rad)
+    eSin2 = 1 - E2 * sinPhi1 * sinPhi1
+
+    N1 = ER / numpy.sqrt(eSin2)
+    T1 = tanPhi1 * tanPhi1
+    C1 = E2PS * cosPhi1 * cosPhi1
+    R1 = ER * (1 - E2) / numpy.power(eSin2, 1.5)
+    D = xUTM / (N1 * K0)
+    D2 = D * D
+    D4 = D2 * D2
+
+    lat = phi1Rad - (N1 * tanPhi1 / R1) * (D2 / 2 -
+        (5 + 3 * T1 + 10 * C1 - 4 * C1 * C1 - 9 * E2PS) * D4 / 24 +
+        (61 + 90 * T1 + 298 * C1 + 45 * T1 * T1 - 252 * E2PS - 3 * C1 * C1) * D4 * D2 / 720)
+    lon = (D - (1 + 2 * T1 + C1) * D2 * D / 6 +
+        (5 - 2 * C1 + 28 * T1 - 3 * C1 * C1 + 8 * E2PS + 24 * T1 * T1) * D4 * D / 120) / cosPhi1
+
+    lats = numpy.degrees(lat)
+    lons = _lonOrigin(zoneNumber) + numpy.degrees(lon)
+    return lats, lons
+
+
+def LLtoUTM(lats, lons, zoneNumber):
+    '''
+    Convert decimal degrees to UTM coordinates in the given zone.
+    lats, lons : array-like of decimal degrees
+    zoneNumber : 6-deg longitudinal zone, scalar or array-like
+    All inputs are broadcast against each other.
+    Returns an (eastings, northings) tuple of NumPy arrays
+    (northings are NEGATIVE in the southern hemisphere).
+    '''
+    lats = numpy.asarray(lats, dtype=numpy.float64)
+    lons = numpy.asarray(lons, dtype=numpy.float64)
+
+    lonTemp = (lons + 180) - numpy.floor((lons + 180) / 360) * 360 - 180
+    latRad = numpy.radians(lats)
+    lonRad = numpy.radians(lonTemp)
+    lonOriginRad = numpy.radians(_lonOrigin(zoneNumber))
+
+    sinLat = numpy.sin(latRad)
+    cosLat = numpy.cos(latRad)
+    tanLat = numpy.tan(latRad)
+
+    N = ER / numpy.sqrt(1 - E2 * sinLat * sinLat)
+    T = tanLat * tanLat
+    C = E2PS * cosLat * cosLat
+    A = cosLat * (lonRad - lonOriginRad)
+    A2 = A * A
+    A4 = A2 * A2
+    M = ER * (_M0 * latRad - _M2 * numpy.sin(2 * latRad) +
+        _M4 * numpy.sin(4 * latRad) - _M6 * numpy.sin(6 * latRad))
+
+    eastings = (K0 * N * (A + (1 - T + C) * A2 * A / 6 +
+        (5 - 18 * T + T * T + 72 * C - 58 * E2PS) * A4 * A / 120) + 500000.0)
+    northings = (K0 * (M + N * tanLat * (A2 / 2 +
+        (5 - T + 9 * C + 4 * C * C) * A4 / 24 +
+        (61 - 58 * T + T * T + 600 * C - 330 * E2PS) * A4 * A2 / 720)))
+    return eastings, northings
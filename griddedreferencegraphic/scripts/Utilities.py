@@ -34,6 +34,7 @@ import os
 import sys
 import string
 import random
+import multiprocessing
 import arcpy
 
 PLATFORM_PRO = 'ARCGIS_PRO'
@@ -92,4 +93,31 @@ def MakeScratchGeodatabase():
     '''
     name = ''.join([random.choice(string.ascii_uppercase) for _ in range(6)])
     ws = arcpy.CreateFileGDB_management('%scratchFolder%',name,'CURRENT')[0]
-    return ws
\ No newline at end of file
+    return ws
+
+def ProcessCount(factor):
+    '''
+    Returns the number of worker processes for a Parallel Processing Factor
+    environment value (i.e. "4" or "50%"), 1 (no workers) if it isn't set.
+    Mirrored by geonames/scripts/GeonamesUtilities.py, keep the two in step
+    '''
+    if not factor:
+        return 1
+    factor = str(factor).strip()
+    try:
+        if factor.endswith('%'):
+            count = int(multiprocessing.cpu_count() * float(factor[:-1]) / 100.0)
+        else:
+            count = int(float(factor))
+    except ValueError:
+        return 1
+    return max(1, count)
+
+def SetPoolExecutable():
+    '''
+    Geoprocessing tools run inside the application (i.e. ArcGISPro.exe or ArcMap.exe),
+    the worker processes have to be started with the python install of the application.
+    Mirrored by geonames/scripts/GeonamesUtilities.py, keep the two in step
+    '''
+    if not os.path.basename(sys.executable).lower().startswith('python'):
+        multiprocessing.set_executable(os.path.join(sys.exec_prefix, 'pythonw.exe'))
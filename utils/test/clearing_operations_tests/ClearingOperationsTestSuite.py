@@ -21,6 +21,14 @@ from . import ClearingOperationsCreateGRGFromPointTestCase
 from . import ClearingOperationsCreateGRGFromAreaTestCase
 from . import ClearingOperationsNumberFeaturesTestCase
 from . import CreateReferenceSystemGRGFromAreaTestCase
+from . import UTMProjectionTestCase
+from . import RefGridCellsTestCase
+from . import RefGridCheckpointTestCase
+from . import RefGridZonesTestCase
+from . import MGRSLabelsTestCase
+from . import GRGGridTestCase
+from . import NumberingOrderTestCase
+from . import GRGCacheTestCase
 
 ''' Test suite for all tools in the Clearing Operationss Tools toolbox '''
 
@@ -42,5 +50,13 @@ def getTestSuite():
 
     #Gridded Reference Graphic
     testSuite.addTest(loader.loadTestsFromTestCase(CreateReferenceSystemGRGFromAreaTestCase.CreateReferenceSystemGRGFromAreaTestCase))
+    testSuite.addTest(loader.loadTestsFromTestCase(UTMProjectionTestCase.UTMProjectionTestCase))
+    testSuite.addTest(loader.loadTestsFromTestCase(RefGridCellsTestCase.RefGridCellsTestCase))
+    testSuite.addTest(loader.loadTestsFromTestCase(RefGridCheckpointTestCase.RefGridCheckpointTestCase))
+    testSuite.addTest(loader.loadTestsFromTestCase(RefGridZonesTestCase.RefGridZonesTestCase))
+    testSuite.addTest(loader.loadTestsFromTestCase(MGRSLabelsTestCase.MGRSLabelsTestCase))
+    testSuite.addTest(loader.loadTestsFromTestCase(GRGGridTestCase.GRGGridTestCase))
+    testSuite.addTest(loader.loadTestsFromTestCase(NumberingOrderTestCase.NumberingOrderTestCase))
+    testSuite.addTest(loader.loadTestsFromTestCase(GRGCacheTestCase.GRGCacheTestCase))
 
     return testSuite
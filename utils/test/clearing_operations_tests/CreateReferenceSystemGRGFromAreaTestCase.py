@@ -21,12 +21,26 @@ import os
 import sys
 # Add parent folder to python path if running test case standalone
 sys.path.append(os.path.normpath(os.path.join(os.path.dirname(__file__), '..')))
+# Add the Gridded Reference Graphic scripts folder so RefGrid can be imported directly
+sys.path.append(os.path.normpath(os.path.join(os.path.dirname(__file__),
+                                              r"../../../griddedreferencegraphic/scripts")))
 
 import arcpy
 import Configuration
 import UnitTestUtilities
 import DataDownload
 import arcpyAssert
+import RefGrid
+import RefGridCheckpoint
+
+class _Output(object):
+    ''' Output parameter of RefGrid.ReferenceGrid.Build '''
+    def __init__(self, value):
+        self.value = value
+
+class _StopBuild(Exception):
+    ''' Stops a build, as if it failed, after some checkpoints '''
+    pass
 
 class CreateReferenceSystemGRGFromAreaTestCase(unittest.TestCase, arcpyAssert.FeatureClassAssertMixin):
     '''
@@ -237,6 +251,126 @@ class CreateReferenceSystemGRGFromAreaTestCase(unittest.TestCase, arcpyAssert.Fe
                                      "ALL",
                                      self.ignore_options)
 
+    # 1000M Partitioned Test
+    def testCreateReferenceSystemGRGFromArea_1000MPartitioned(self):
+        '''
+        Testing with 1000M grid partitioned by 100k square
+        '''
+        if Configuration.DEBUG is True: print(".....CreateReferenceSystemGRGFromAreaTestCase.testCreateReferenceSystemGRGFromArea_1000MPartitioned")
+        print("Importing toolbox...")
+        arcpy.ImportToolbox(self.toolboxUnderTest)
+        arcpy.env.overwriteOutput = True
+
+        #inputs
+        grid_size = "1000M_GRID"
+        output = os.path.join(self.scratchGDB, "outgrg_1000M_index")
+
+        #Testing
+        runToolMsg = "Running tool (CreateReferenceSystemGRGFromArea)"
+        arcpy.AddMessage(runToolMsg)
+        Configuration.Logger.info(runToolMsg)
+        compareDataset = os.path.normpath(os.path.join(Configuration.grgInputGDB,
+                                                       "Compare1000m"))
+
+        try:
+            arcpy.CreateReferenceSystemGRGFromArea_grg(self.inputArea,
+                                                       self.ref_grid,
+                                                       grid_size,
+                                                       output,
+                                                       self.large_grid_handling,
+                                                       "PARTITION_BY_100K_SQUARE")
+        except arcpy.ExecuteError:
+            UnitTestUtilities.handleArcPyError()
+        except:
+            UnitTestUtilities.handleGeneralError()
+
+        # every partition in the index exists, and together they have all the cells
+        totalCells = 0
+        with arcpy.da.SearchCursor(output, ["Partition", "Cells"]) as cursor:
+            for row in cursor:
+                partition = os.path.join(self.scratchGDB, row[0])
+                self.assertTrue(arcpy.Exists(partition))
+                self.assertEqual(int(arcpy.GetCount_management(partition).getOutput(0)), row[1])
+                totalCells += row[1]
+        self.assertEqual(int(arcpy.GetCount_management(compareDataset).getOutput(0)), totalCells)
+
+    def _interruptedBuild(self, output, grid_size, checkpoints):
+        '''
+        Builds the grid, stopping it after it has written checkpoints checkpoints
+        '''
+        writeCheckpoint = RefGridCheckpoint.WriteCheckpoint
+        writes = [0]
+        def stoppingWriteCheckpoint(path, checkpoint):
+            writeCheckpoint(path, checkpoint)
+            writes[0] += 1
+            if writes[0] == checkpoints:
+                raise _StopBuild()
+        RefGridCheckpoint.WriteCheckpoint = stoppingWriteCheckpoint
+        try:
+            with self.assertRaises(_StopBuild):
+                RefGrid.ReferenceGrid(self.inputArea, self.ref_grid, grid_size,
+                                      self.large_grid_handling).Build(_Output(output))
+        finally:
+            RefGridCheckpoint.WriteCheckpoint = writeCheckpoint
+
+    # 1000M Resume Test
+    def testCreateReferenceSystemGRGFromArea_1000MResume(self):
+        '''
+        Testing a 1000M grid stopped after two 100k squares, then resumed
+        '''
+        if Configuration.DEBUG is True: print(".....CreateReferenceSystemGRGFromAreaTestCase.testCreateReferenceSystemGRGFromArea_1000MResume")
+        arcpy.env.overwriteOutput = True
+
+        #inputs
+        grid_size = "1000M_GRID"
+        output = os.path.join(self.scratchGDB, "outgrg_1000M_resume")
+        compareDataset = os.path.normpath(os.path.join(Configuration.grgInputGDB,
+                                                       "Compare1000m"))
+
+        #Testing
+        self._interruptedBuild(output, grid_size, 2)
+        self.assertTrue(int(arcpy.GetCount_management(output).getOutput(0)) > 0)
+        RefGrid.ReferenceGrid(self.inputArea, self.ref_grid, grid_size, self.large_grid_handling,
+                              resume_previous_run=True).Build(_Output(output))
+        arcpy.AddSpatialIndex_management(output)
+
+        self.assertFeatureClassEqual(compareDataset,
+                                     output,
+                                     arcpy.Describe(output).oidFieldName,
+                                     None,
+                                     "ALL",
+                                     self.ignore_options)
+
+    # 1000M Resume Mismatched Output Test
+    def testCreateReferenceSystemGRGFromArea_1000MResumeReplacedOutput(self):
+        '''
+        Testing a 1000M grid stopped after two 100k squares, whose output is
+        then replaced by another grid: resuming builds the whole grid
+        '''
+        if Configuration.DEBUG is True: print(".....CreateReferenceSystemGRGFromAreaTestCase.testCreateReferenceSystemGRGFromArea_1000MResumeReplacedOutput")
+        arcpy.env.overwriteOutput = True
+
+        #inputs
+        grid_size = "1000M_GRID"
+        output = os.path.join(self.scratchGDB, "outgrg_1000M_replaced")
+        compareDataset = os.path.normpath(os.path.join(Configuration.grgInputGDB,
+                                                       "Compare1000m"))
+
+        #Testing
+        self._interruptedBuild(output, grid_size, 2)
+        RefGrid.ReferenceGrid(self.inputArea, self.ref_grid, "10000M_GRID",
+                              self.large_grid_handling).Build(_Output(output))
+        RefGrid.ReferenceGrid(self.inputArea, self.ref_grid, grid_size, self.large_grid_handling,
+                              resume_previous_run=True).Build(_Output(output))
+        arcpy.AddSpatialIndex_management(output)
+
+        self.assertFeatureClassEqual(compareDataset,
+                                     output,
+                                     arcpy.Describe(output).oidFieldName,
+                                     None,
+                                     "ALL",
+                                     self.ignore_options)
+
     # 100M Test
     def testCreateReferenceSystemGRGFromArea_100M(self):
         '''
@@ -0,0 +1,102 @@
+#------------------------------------------------------------------------------
+# Copyright 2017 Esri
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#------------------------------------------------------------------------------
+
+import unittest
+import os
+import sys
+# Add parent folder to python path if running test case standalone
+sys.path.append(os.path.normpath(os.path.join(os.path.dirname(__file__), '..')))
+# Add the Gridded Reference Graphic scripts folder so GRGCache can be imported directly
+sys.path.append(os.path.normpath(os.path.join(os.path.dirname(__file__),
+                                              r"../../../griddedreferencegraphic/scripts")))
+
+import pickle
+import shutil
+import tempfile
+import zlib
+import Configuration
+import GRGCache
+import GRGGrid
+
+class GRGCacheTestCase(unittest.TestCase):
+    '''
+    Test the GRG result cache (without arcpy).
+    '''
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+
+    def tearDown(self):
+        shutil.rmtree(self.folder, ignore_errors=True)
+
+    def testCacheKey(self):
+        ''' same inputs give the same key, different inputs a different one '''
+        if Configuration.DEBUG is True: print(".....GRGCacheTestCase.testCacheKey")
+        key = GRGCache.CacheKey("Area", [(0, 0), (10.5, 3)], 100, "Lower-Left", "-")
+        self.assertEqual(key, GRGCache.CacheKey("Area", [(0.0, 0.0), (10.5, 3.0)], 100.0, "Lower-Left", "-"))
+        self.assertNotEqual(key, GRGCache.CacheKey("Area", [(0, 0), (10.5, 3)], 100, "Upper-Left", "-"))
+        self.assertNotEqual(key, GRGCache.CacheKey("Area", [(0, 0), (10.5, 3.001)], 100, "Lower-Left", "-"))
+
+    def testGetCachedCells(self):
+        ''' cached cells come back with the same rings and labels '''
+        if Configuration.DEBUG is True: print(".....GRGCacheTestCase.testGetCachedCells")
+        cells = list(GRGGrid.GridLabelledCells(10.0, 20.0, 5, 5, 3, 4, "Upper-Left", "Alpha-Alpha", "-", 15, (10.0, 20.0)))
+        cache = GRGCache.GRGCache(self.folder)
+        self.assertIsNone(cache.Get("a"))
+        cache.Put("a", iter(cells))
+        cached = cache.Get("a")
+        self.assertEqual(len(cached), len(cells))
+        for (ring, label), (cachedRing, cachedLabel) in zip(cells, cached):
+            self.assertEqual(label, cachedLabel)
+            self.assertEqual([tuple(point) for point in ring], cachedRing)
+
+    def testInvalidEntryIsMiss(self):
+        ''' entries that are not valid cache entries are misses, and are dropped '''
+        if Configuration.DEBUG is True: print(".....GRGCacheTestCase.testInvalidEntryIsMiss")
+        cells = list(GRGGrid.GridLabelledCells(0.0, 0.0, 1, 1, 2, 2, "Lower-Left", "Numeric", "-"))
+        data = GRGCache.PackCells(cells)
+        header = GRGCache.HEADER.pack(GRGCache.CACHE_VERSION, 3, 3 * GRGCache.CELL_BYTES)
+        entries = {"pickle": pickle.dumps([1, 2, 3], 2),
+                   "truncated": data[:len(data) // 2],
+                   "version": zlib.compress(GRGCache.HEADER.pack(GRGCache.CACHE_VERSION - 1, 0, 0) + b"[]"),
+                   "labels": zlib.compress(header + b"\0" * 3 * GRGCache.CELL_BYTES + b'["1", "2"]')}
+        cache = GRGCache.GRGCache(self.folder)
+        for key, entry in entries.items():
+            path = os.path.join(self.folder, key + GRGCache.ENTRY_EXTENSION)
+            with open(path, "wb") as entryFile:
+                entryFile.write(entry)
+            self.assertIsNone(cache.Get(key))
+            self.assertFalse(os.path.exists(path))
+        self.assertEqual(len(GRGCache.UnpackCells(data)), len(cells))
+
+    def testEvictLeastRecentlyUsed(self):
+        ''' the least recently used entries are evicted to keep within the size bound '''
+        if Configuration.DEBUG is True: print(".....GRGCacheTestCase.testEvictLeastRecentlyUsed")
+        cells = list(GRGGrid.GridLabelledCells(0.0, 0.0, 1, 1, 2, 2, "Lower-Left", "Numeric", "-"))
+        cache = GRGCache.GRGCache(self.folder)
+        for age, key in enumerate(["a", "b", "c"]):
+            cache.Put(key, cells)
+            # make the ages distinct, whatever the file time resolution
+            os.utime(os.path.join(self.folder, key + GRGCache.ENTRY_EXTENSION), (1000 + age, 1000 + age))
+        size = cache.Entries()[0][1]
+        cache.Get("a")
+        cache.maxBytes = size * 2
+        cache.Evict()
+        self.assertIsNone(cache.Get("b"))
+        self.assertIsNotNone(cache.Get("a"))
+        self.assertIsNotNone(cache.Get("c"))
+
+if __name__ == "__main__":
+    unittest.main()
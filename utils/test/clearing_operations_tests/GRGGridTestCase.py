@@ -0,0 +1,134 @@
+#------------------------------------------------------------------------------
+# Copyright 2017 Esri
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#------------------------------------------------------------------------------
+
+import unittest
+import os
+import sys
+# Add parent folder to python path if running test case standalone
+sys.path.append(os.path.normpath(os.path.join(os.path.dirname(__file__), '..')))
+# Add the Gridded Reference Graphic scripts folder so GRGGrid can be imported directly
+sys.path.append(os.path.normpath(os.path.join(os.path.dirname(__file__),
+                                              r"../../../griddedreferencegraphic/scripts")))
+
+import math
+import Configuration
+import GRGGrid
+
+class GRGGridTestCase(unittest.TestCase):
+    '''
+    Test the GRG grid engine (cells and labels without arcpy).
+    '''
+
+    def testGridCellsOrder(self):
+        ''' cells come row by row away from each label start position '''
+        if Configuration.DEBUG is True: print(".....GRGGridTestCase.testGridCellsOrder")
+        expectedFirstCorners = {"Lower-Left": [(0.0, 0.0), (10.0, 0.0), (20.0, 0.0), (0.0, 5.0)],
+                                "Lower-Right": [(20.0, 0.0), (10.0, 0.0), (0.0, 0.0), (20.0, 5.0)],
+                                "Upper-Left": [(0.0, 5.0), (10.0, 5.0), (20.0, 5.0), (0.0, 0.0)],
+                                "Upper-Right": [(20.0, 5.0), (10.0, 5.0), (0.0, 5.0), (20.0, 0.0)]}
+        for start, expected in expectedFirstCorners.items():
+            cells = list(GRGGrid.GridCells(0.0, 0.0, 10, 5, 2, 3, start))
+            self.assertEqual(len(cells), 6)
+            self.assertEqual([ring[0] for row, column, ring in cells[:4]], expected)
+            for row, column, ring in cells:
+                self.assertEqual(ring[0], (column * 10.0, row * 5.0))
+                self.assertEqual(ring[0], ring[-1])
+                self.assertEqual(ring[2], (ring[0][0] + 10.0, ring[0][1] + 5.0))
+
+    def testGridCellsRotation(self):
+        ''' rotated cells are the unrotated cells turned clockwise about the pivot '''
+        if Configuration.DEBUG is True: print(".....GRGGridTestCase.testGridCellsRotation")
+        cells = list(GRGGrid.GridCells(0.0, 0.0, 10, 5, 2, 3, "Lower-Left"))
+        rotated = list(GRGGrid.GridCells(0.0, 0.0, 10, 5, 2, 3, "Lower-Left", 90, (15.0, 5.0)))
+        for (row, column, ring), (rotatedRow, rotatedColumn, rotatedRing) in zip(cells, rotated):
+            self.assertEqual((row, column), (rotatedRow, rotatedColumn))
+            for (x, y), (rotatedX, rotatedY) in zip(ring, rotatedRing):
+                # 90 degrees clockwise about (15, 5): (x, y) -> (15 + (y - 5), 5 - (x - 15))
+                self.assertAlmostEqual(rotatedX, 15.0 + (y - 5.0), places=9)
+                self.assertAlmostEqual(rotatedY, 5.0 - (x - 15.0), places=9)
+
+    def testMinimumBoundingRectangle(self):
+        ''' smallest rectangle around a rotated rectangle and points inside it is that rectangle '''
+        if Configuration.DEBUG is True: print(".....GRGGridTestCase.testMinimumBoundingRectangle")
+        angle = math.radians(20)
+        rotate = lambda x, y: (x * math.cos(angle) + y * math.sin(angle), -x * math.sin(angle) + y * math.cos(angle))
+        points = [rotate(x, y) for x, y in [(0, 0), (0, 50), (300, 50), (300, 0), (150, 25), (10, 40), (150, 0)]]
+        corners = GRGGrid.MinimumBoundingRectangle(points)
+        self.assertEqual(len(corners), 4)
+        area = 0.5 * abs(sum(corners[i - 1][0] * corners[i][1] - corners[i][0] * corners[i - 1][1] for i in range(0, 4)))
+        self.assertAlmostEqual(area, 300 * 50, places=6)
+        for corner in [rotate(0, 0), rotate(0, 50), rotate(300, 50), rotate(300, 0)]:
+            self.assertTrue(min(math.hypot(corner[0] - x, corner[1] - y) for x, y in corners) < 1e-6)
+
+    def testAreaGridTask(self):
+        ''' grid of a rotated rectangle starts at the rectangle corner and covers it '''
+        if Configuration.DEBUG is True: print(".....GRGGridTestCase.testAreaGridTask")
+        # 1000 x 400 rectangle, rotated 30 degrees clockwise about (0, 0), clockwise corners
+        angle = math.radians(30)
+        rotate = lambda x, y: (x * math.cos(angle) + y * math.sin(angle), -x * math.sin(angle) + y * math.cos(angle))
+        corners = [rotate(0, 0), rotate(0, 400), rotate(1000, 400), rotate(1000, 0)]
+        cells = GRGGrid.AreaGridTask(("AOI 1", corners + [rotate(500, 200)], 100, 100, "Lower-Left", "Alpha-Numeric", "-"))
+        self.assertEqual(len(cells), 40)
+        self.assertEqual([(label, aoiId) for ring, label, aoiId in cells[:2]], [("A1", "AOI 1"), ("A2", "AOI 1")])
+        self.assertEqual(cells[-1][1], "D10")
+        for (x, y), expected in zip([cells[0][0][0], cells[-1][0][2]], [corners[0], corners[2]]):
+            self.assertAlmostEqual(x, expected[0], places=6)
+            self.assertAlmostEqual(y, expected[1], places=6)
+
+    def testRunGridTasks(self):
+        ''' grids of several areas and points, serially and on a pool, are in AOI order '''
+        if Configuration.DEBUG is True: print(".....GRGGridTestCase.testRunGridTasks")
+        areaTasks = [(str(aoi), [(x, y) for x, y in [(0, 0), (0, 200), (300, 200), (300, 0)]],
+                      100, 100, "Upper-Left", "Alpha-Numeric", "-") for aoi in range(1, 6)]
+        pointTasks = [(str(aoi), 1000.0 * aoi, 0.0, 2, 3, 50, 50, "Lower-Left", "Numeric", "-", 15.0)
+                      for aoi in range(1, 6)]
+        for worker, tasks, cellsPerGrid in [(GRGGrid.AreaGridTask, areaTasks, 6),
+                                            (GRGGrid.PointGridTask, pointTasks, 6)]:
+            serial = list(GRGGrid.RunGridTasks(worker, tasks, 1))
+            pooled = list(GRGGrid.RunGridTasks(worker, iter(tasks), 3))
+            self.assertEqual(serial, pooled)
+            self.assertEqual([[aoiId for ring, label, aoiId in cells] for cells in pooled],
+                             [[str(aoi)] * cellsPerGrid for aoi in range(1, 6)])
+            self.assertEqual(pooled[0], worker(tasks[0]))
+        # each point grid is centered on its point
+        for cells, task in zip(GRGGrid.RunGridTasks(GRGGrid.PointGridTask, pointTasks, 2), pointTasks):
+            corners = [point for ring, label, aoiId in cells for point in ring[0:4]]
+            self.assertAlmostEqual(sum(x for x, y in corners) / len(corners), task[1], places=6)
+
+    def testCellLabels(self):
+        ''' label styles '''
+        if Configuration.DEBUG is True: print(".....GRGGridTestCase.testCellLabels")
+        labels = [label for ring, label in GRGGrid.GridLabelledCells(0, 0, 1, 1, 2, 3, "Upper-Left", "Alpha-Numeric", "-")]
+        self.assertEqual(labels, ["A1", "A2", "A3", "B1", "B2", "B3"])
+        labels = [label for ring, label in GRGGrid.GridLabelledCells(0, 0, 1, 1, 2, 3, "Lower-Right", "Alpha-Alpha", "-")]
+        self.assertEqual(labels, ["A-A", "A-B", "A-C", "B-A", "B-B", "B-C"])
+        labels = [label for ring, label in GRGGrid.GridLabelledCells(0, 0, 1, 1, 2, 3, "Upper-Right", "Numeric", "-")]
+        self.assertEqual(labels, ["1", "2", "3", "4", "5", "6"])
+        self.assertEqual(GRGGrid.GridLabel(26, 27, 30, 30, "Lower-Left", "Alpha-Alpha", ""), "AAAB")
+
+    def testGridLabelsMatchGridLabel(self):
+        ''' batch labels match the single cell labels '''
+        if Configuration.DEBUG is True: print(".....GRGGridTestCase.testGridLabelsMatchGridLabel")
+        rows, columns = 4, 30
+        for start in GRGGrid.START_POSITIONS:
+            for style in ["Alpha-Numeric", "Alpha-Alpha", "Numeric"]:
+                labels = GRGGrid.GridLabels(rows, columns, start, style, "-")
+                for row in range(0, rows):
+                    for column in range(0, columns):
+                        self.assertEqual(labels[row][column],
+                                         GRGGrid.GridLabel(row, column, rows, columns, start, style, "-"))
+
+if __name__ == "__main__":
+    unittest.main()
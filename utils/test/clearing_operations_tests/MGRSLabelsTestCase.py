@@ -0,0 +1,62 @@
+#------------------------------------------------------------------------------
+# Copyright 2017 Esri
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#------------------------------------------------------------------------------
+
+import unittest
+import os
+import sys
+# Add parent folder to python path if running test case standalone
+sys.path.append(os.path.normpath(os.path.join(os.path.dirname(__file__), '..')))
+# Add the Gridded Reference Graphic scripts folder so MGRSLabels can be imported directly
+sys.path.append(os.path.normpath(os.path.join(os.path.dirname(__file__),
+                                              r"../../../griddedreferencegraphic/scripts")))
+
+import numpy
+import Configuration
+import MGRSLabels
+
+class MGRSLabelsTestCase(unittest.TestCase):
+    '''
+    Test the table driven MGRS labels.
+    '''
+
+    def testGridLetters(self):
+        ''' square identifications of known MGRS locations '''
+        if Configuration.DEBUG is True: print(".....MGRSLabelsTestCase.testGridLetters")
+        # Washington, DC - 18S UJ 23487 06483
+        self.assertEqual(MGRSLabels.gridLetters(18, 323487, 4306483), "UJ")
+        # Sydney, Australia - 56H LH 34052 51180 (false northing applied)
+        self.assertEqual(MGRSLabels.gridLetters(56, 334052, 6251180), "LH")
+
+    def testGridLettersBatch(self):
+        ''' batch square identifications match the single ones '''
+        if Configuration.DEBUG is True: print(".....MGRSLabelsTestCase.testGridLettersBatch")
+        zones = numpy.arange(1, 61)
+        eastings = numpy.arange(150000, 900000, 100000)
+        northings = numpy.arange(50000, 9350000, 300000)
+        letters = MGRSLabels.gridLettersBatch(zones[:, None, None], eastings[None, None, :], northings[None, :, None])
+        expected = [MGRSLabels.gridLetters(z, e, n) for z in zones for n in northings for e in eastings]
+        self.assertEqual(expected, letters)
+
+    def testCellLabels(self):
+        ''' numeric label parts, including southern hemisphere northings '''
+        if Configuration.DEBUG is True: print(".....MGRSLabelsTestCase.testCellLabels")
+        self.assertEqual(MGRSLabels.cellLabels("18SUJ", [323000, 323480], [4306000, 4306480], 10),
+                         ["18SUJ23000600", "18SUJ23480648"])
+        self.assertEqual(MGRSLabels.cellLabels("56HLH", 334000, -3749000, 1000), ["56HLH3451"])
+        self.assertEqual(MGRSLabels.eastingSuffixes([323000, 399000], 10000), ["2", "9"])
+        self.assertEqual(MGRSLabels.northingSuffixes([-3749000], 100), ["510"])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,86 @@
+#------------------------------------------------------------------------------
+# Copyright 2017 Esri
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#------------------------------------------------------------------------------
+
+import unittest
+import os
+import sys
+# Add parent folder to python path if running test case standalone
+sys.path.append(os.path.normpath(os.path.join(os.path.dirname(__file__), '..')))
+# Add the Gridded Reference Graphic scripts folder so NumberingOrder can be imported directly
+sys.path.append(os.path.normpath(os.path.join(os.path.dirname(__file__),
+                                              r"../../../griddedreferencegraphic/scripts")))
+
+import random
+import Configuration
+import NumberingOrder
+
+class NumberingOrderTestCase(unittest.TestCase):
+    '''
+    Test the in memory ordering strategies of Number Features.
+    '''
+
+    def setUp(self):
+        if Configuration.DEBUG is True: print("         NumberingOrderTestCase.setUp")
+        random.seed(42)
+        self.points = [(i, random.uniform(0.0, 1000.0), random.uniform(0.0, 500.0)) for i in range(0, 300)]
+
+    def testRowMajorOrder(self):
+        ''' rows from top to bottom, left to right, banded by the tolerance '''
+        if Configuration.DEBUG is True: print(".....NumberingOrderTestCase.testRowMajorOrder")
+        points = [(1, 0.0, 10.0), (2, 5.0, 9.6), (3, 1.0, 9.4), (4, 0.0, 0.0)]
+        self.assertEqual(NumberingOrder.RowMajorOrder(points), [1, 2, 3, 4])
+        self.assertEqual(NumberingOrder.RowMajorOrder(points, 1.0), [1, 3, 2, 4])
+
+    def testDefaultOrder(self):
+        ''' no numbering order (a cleared optional parameter) is Row-Major '''
+        if Configuration.DEBUG is True: print(".....NumberingOrderTestCase.testDefaultOrder")
+        rowMajor = NumberingOrder.RowMajorOrder(self.points, 25.0)
+        self.assertEqual(NumberingOrder.NumberingOrder(self.points, None, 25.0), rowMajor)
+        self.assertEqual(NumberingOrder.NumberingOrder(self.points, "", 25.0), rowMajor)
+        self.assertRaises(ValueError, NumberingOrder.NumberingOrder, self.points, "Peano")
+
+    def testOrdersNumberEveryPointOnce(self):
+        ''' every strategy returns each key exactly once '''
+        if Configuration.DEBUG is True: print(".....NumberingOrderTestCase.testOrdersNumberEveryPointOnce")
+        for order in NumberingOrder.ORDERS:
+            keys = NumberingOrder.NumberingOrder(self.points, order, 25.0)
+            self.assertEqual(sorted(keys), [point[0] for point in self.points])
+
+    def testNearestNeighborOrder(self):
+        ''' each step goes to the nearest point not yet numbered '''
+        if Configuration.DEBUG is True: print(".....NumberingOrderTestCase.testNearestNeighborOrder")
+        keys = NumberingOrder.NearestNeighborOrder(self.points)
+        byKey = dict((point[0], point) for point in self.points)
+        remaining = set(keys)
+        for current, following in zip(keys, keys[1:]):
+            remaining.discard(current)
+            x, y = byKey[current][1], byKey[current][2]
+            distance = lambda key: (byKey[key][1] - x) ** 2 + (byKey[key][2] - y) ** 2
+            self.assertEqual(distance(following), min(distance(key) for key in remaining))
+
+    def testNearestNeighborOrderClustered(self):
+        ''' clusters far apart, with a few points between them, are each numbered in one run '''
+        if Configuration.DEBUG is True: print(".....NumberingOrderTestCase.testNearestNeighborOrderClustered")
+        points = [(i, random.uniform(0.0, 1.0) + (1000000.0 if i % 2 else 0.0), random.uniform(0.0, 1.0))
+                  for i in range(0, 2000)]
+        points.extend((2000 + i, 250000.0 * (i + 1), 10.0) for i in range(0, 3))
+        keys = NumberingOrder.NearestNeighborOrder(points)
+        self.assertEqual(sorted(keys), [point[0] for point in points])
+        # the path crosses from one cluster to the other only once
+        cluster = [key % 2 for key in keys if key < 2000]
+        self.assertEqual(sum(1 for a, b in zip(cluster, cluster[1:]) if a != b), 1)
+
+if __name__ == "__main__":
+    unittest.main()
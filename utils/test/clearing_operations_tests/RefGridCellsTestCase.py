@@ -0,0 +1,222 @@
+#------------------------------------------------------------------------------
+# Copyright 2017 Esri
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#------------------------------------------------------------------------------
+
+import unittest
+import os
+import sys
+# Add parent folder to python path if running test case standalone
+sys.path.append(os.path.normpath(os.path.join(os.path.dirname(__file__), '..')))
+# Add the Gridded Reference Graphic scripts folder so RefGridCells can be imported directly
+sys.path.append(os.path.normpath(os.path.join(os.path.dirname(__file__),
+                                              r"../../../griddedreferencegraphic/scripts")))
+
+import numpy
+import Configuration
+import UTMProjection
+import RefGridCells
+
+class RefGridCellsTestCase(unittest.TestCase):
+    '''
+    Test the split of the sub 100k grid refinement into worker tasks.
+    '''
+
+    def setUp(self):
+        if Configuration.DEBUG is True: print("         RefGridCellsTestCase.setUp")
+
+        # 100k square 18S VE (southern part of zone 18S), inside its zone
+        self.square = {"xmin": 400000, "ymin": 3900000, "xmax": 500000, "ymax": 4000000,
+                       "utmZone": 18, "latitudeZone": "S",
+                       "zoneExtent": (-78.0, 32.0, -72.0, 40.0),
+                       "insideZone": True, "insideAOI": False,
+                       "Grid": "18SVE"}
+        # AOI that covers part of the square
+        self.aoiExtent = (-76.0, 35.2, -75.9, 35.3)
+
+    def testClassifyConcaveRegion(self):
+        ''' cells of a concave region are only inside within its known covered inner extent '''
+        if Configuration.DEBUG is True: print(".....RefGridCellsTestCase.testClassifyConcaveRegion")
+        # L shaped region: extent (0, 0, 10, 10) without its north east quarter,
+        # the southern half is known to be covered
+        region = (0.0, 0.0, 10.0, 10.0)
+        inner = (0.0, 0.0, 10.0, 5.0)
+        cells = {"south": ((1.0, 1.0, 2.0, 2.0), RefGridCells.CELL_INSIDE),
+                 "west arm": ((1.0, 6.0, 2.0, 7.0), RefGridCells.CELL_BOUNDARY),
+                 # in the notch, outside the region but within its extent: left to the geometry test
+                 "notch": ((6.0, 6.0, 7.0, 7.0), RefGridCells.CELL_BOUNDARY),
+                 "across inner edge": ((1.0, 4.5, 2.0, 5.5), RefGridCells.CELL_BOUNDARY),
+                 "outside": ((11.0, 11.0, 12.0, 12.0), RefGridCells.CELL_OUTSIDE)}
+        for name, (bounds, expected) in cells.items():
+            self.assertEqual(RefGridCells.classifyExtents(*bounds, region=region, inner=inner), expected, name)
+        # classified as arrays, the same as one by one
+        names = sorted(cells)
+        bounds = [numpy.array([cells[name][0][i] for name in names]) for i in range(0, 4)]
+        self.assertEqual(RefGridCells.classifyExtents(*bounds, region=region, inner=inner).tolist(),
+                         [cells[name][1] for name in names])
+
+    def testClassifyRegionWithHole(self):
+        ''' cells in the hole of a region are never inside, the inner extent must leave out the hole '''
+        if Configuration.DEBUG is True: print(".....RefGridCellsTestCase.testClassifyRegionWithHole")
+        # region (0, 0, 10, 10) with a hole (4, 4, 6, 6)
+        region = (0.0, 0.0, 10.0, 10.0)
+        hole = (4.5, 4.5, 5.5, 5.5)
+        ring = (0.5, 0.5, 1.5, 1.5)
+        # no inner extent: every cell within the extent needs the geometry test
+        for bounds in [hole, ring]:
+            self.assertEqual(RefGridCells.classifyExtents(*bounds, region=region),
+                             RefGridCells.CELL_BOUNDARY)
+        # inner extent of the part south of the hole
+        inner = (0.0, 0.0, 10.0, 4.0)
+        self.assertEqual(RefGridCells.classifyExtents(*hole, region=region, inner=inner), RefGridCells.CELL_BOUNDARY)
+        self.assertEqual(RefGridCells.classifyExtents(*ring, region=region, inner=inner), RefGridCells.CELL_INSIDE)
+
+    def testClassifyCellsOnBoundary(self):
+        ''' cells touching the region are boundary cells, cells on the inner extent edges are inside '''
+        if Configuration.DEBUG is True: print(".....RefGridCellsTestCase.testClassifyCellsOnBoundary")
+        region = (0.0, 0.0, 10.0, 10.0)
+        cells = [# sharing an edge or a corner with the region extent
+                 ((10.0, 2.0, 11.0, 3.0), RefGridCells.CELL_BOUNDARY),
+                 ((-1.0, 2.0, 0.0, 3.0), RefGridCells.CELL_BOUNDARY),
+                 ((2.0, 10.0, 3.0, 11.0), RefGridCells.CELL_BOUNDARY),
+                 ((10.0, 10.0, 11.0, 11.0), RefGridCells.CELL_BOUNDARY),
+                 # just beyond the region extent
+                 ((10.000001, 2.0, 11.0, 3.0), RefGridCells.CELL_OUTSIDE),
+                 ((2.0, -1.0, 3.0, -0.000001), RefGridCells.CELL_OUTSIDE),
+                 # the whole inner extent, and cells on its edges
+                 ((0.0, 0.0, 10.0, 10.0), RefGridCells.CELL_INSIDE),
+                 ((9.0, 0.0, 10.0, 1.0), RefGridCells.CELL_INSIDE),
+                 ((9.0, 9.0, 10.000001, 10.0), RefGridCells.CELL_BOUNDARY)]
+        for bounds, expected in cells:
+            self.assertEqual(RefGridCells.classifyExtents(*bounds, region=region, inner=region), expected, bounds)
+
+    def testSquareCellsClassification(self):
+        ''' cells of a square are dropped when outside the zone or the AOI, and keep their classifications '''
+        if Configuration.DEBUG is True: print(".....RefGridCellsTestCase.testSquareCellsClassification")
+        # the zone boundary at -75.5 crosses the square, the rectangle AOI overlaps the zone boundary
+        square = dict(self.square, zoneExtent=(-78.0, 32.0, -75.5, 40.0), insideZone=False)
+        aoiExtent = (-75.9, 35.2, -75.3, 35.9)
+        for aoiInner in [aoiExtent, None]:
+            cells = list(RefGridCells.squareCells(square, 10000, aoiExtent, aoiInner))
+            self.assertTrue(len(cells) > 0)
+            kept = set()
+            for cell in cells:
+                lons = [point[0] for point in cell["ring"]]
+                lats = [point[1] for point in cell["ring"]]
+                bounds = (min(lons), min(lats), max(lons), max(lats))
+                self.assertEqual(cell["zoneState"], RefGridCells.classifyExtents(*bounds, region=square["zoneExtent"],
+                                                                                 inner=square["zoneExtent"]))
+                self.assertEqual(cell["aoiState"], RefGridCells.classifyExtents(*bounds, region=aoiExtent, inner=aoiInner))
+                self.assertNotEqual(cell["zoneState"], RefGridCells.CELL_OUTSIDE)
+                self.assertNotEqual(cell["aoiState"], RefGridCells.CELL_OUTSIDE)
+                self.assertEqual(cell["insideAOI"], cell["aoiState"] == RefGridCells.CELL_INSIDE)
+                kept.add((cell["xmin"], cell["ymin"]))
+            states = set(cell["aoiState"] for cell in cells)
+            if aoiInner is None:
+                # a concave (or unknown) AOI leaves every cell to the geometry test
+                self.assertEqual(states, set([RefGridCells.CELL_BOUNDARY]))
+            else:
+                self.assertEqual(states, set([RefGridCells.CELL_BOUNDARY, RefGridCells.CELL_INSIDE]))
+            self.assertEqual(set(cell["zoneState"] for cell in cells),
+                             set([RefGridCells.CELL_BOUNDARY, RefGridCells.CELL_INSIDE]))
+            # the dropped cells are outside the zone or the AOI
+            allCells = list(RefGridCells.squareCells(dict(square, insideZone=True, insideAOI=True), 10000, aoiExtent, None))
+            self.assertEqual(len(allCells), 100)
+            for cell in allCells:
+                if (cell["xmin"], cell["ymin"]) in kept:
+                    continue
+                lons = [point[0] for point in cell["ring"]]
+                lats = [point[1] for point in cell["ring"]]
+                bounds = (min(lons), min(lats), max(lons), max(lats))
+                self.assertTrue(RefGridCells.CELL_OUTSIDE in
+                                [RefGridCells.classifyExtents(*bounds, region=square["zoneExtent"]),
+                                 RefGridCells.classifyExtents(*bounds, region=aoiExtent)])
+        # cells of a square inside the AOI inherit that
+        square = dict(self.square, insideAOI=True)
+        states = set(cell["aoiState"] for cell in RefGridCells.squareCells(square, 10000, aoiExtent, None))
+        self.assertEqual(states, set([RefGridCells.CELL_INSIDE]))
+
+    def testTasksMatchSerialOrder(self):
+        ''' cells from the worker tasks are the serial cells, in the same order '''
+        if Configuration.DEBUG is True: print(".....RefGridCellsTestCase.testTasksMatchSerialOrder")
+        for finalInterval in [1000, 100]:
+            serial = [cell['text'] for cell in
+                      RefGridCells.refineCells(self.square, 10000, finalInterval, self.aoiExtent, None)]
+            tasks = list(RefGridCells.gridTasks(self.square, finalInterval, self.aoiExtent, None, "18S"))
+            merged = []
+            for task in tasks:
+                cells = RefGridCells.refineTask(task)
+                self.assertLessEqual(len(cells), RefGridCells.TASK_CELLS)
+                merged.extend([cell[0] for cell in cells])
+            self.assertTrue(len(serial) > 0)
+            self.assertEqual(serial, merged)
+
+    def testDensifyEdgeWithinTolerance(self):
+        ''' densified 100k edges stay within tolerance, with fewer vertices near the central meridian '''
+        if Configuration.DEBUG is True: print(".....RefGridCellsTestCase.testDensifyEdgeWithinTolerance")
+        tolerance = 5.0
+        counts = []
+        for easting in [200000, 500000]:
+            start = (easting, 4000000)
+            end = (easting, 4100000)
+            lats, lons = UTMProjection.UTMtoLL([start[1], end[1]], [start[0], end[0]], 18)
+            startLL = [lons[0], lats[0]]
+            endLL = [lons[1], lats[1]]
+            vertices = [startLL] + RefGridCells.densifyEdge(start, end, startLL, endLL, 18, tolerance) + [endLL]
+            counts.append(len(vertices))
+            # check the true grid line midway between each pair of vertices
+            for first, second in zip(vertices[:-1], vertices[1:]):
+                firstE, firstN = UTMProjection.LLtoUTM(first[1], first[0], 18)
+                secondE, secondN = UTMProjection.LLtoUTM(second[1], second[0], 18)
+                midLat, midLon = UTMProjection.UTMtoLL((firstN + secondN) / 2.0, (firstE + secondE) / 2.0, 18)
+                error = RefGridCells.edgeErrors(first[0], first[1], second[0], second[1], midLon, midLat)
+                self.assertLessEqual(error, tolerance)
+        self.assertLess(counts[1], counts[0])
+
+    def testEstimateGrid(self):
+        ''' estimated cells and vertices are close to the cells the grid is built from '''
+        if Configuration.DEBUG is True: print(".....RefGridCellsTestCase.testEstimateGrid")
+        zones = [(18, self.square["zoneExtent"])]
+        # AOI extent within the 100k square
+        aoiExtent = (-75.95, 35.3, -75.85, 35.4)
+        for finalInterval, tolerance in [(1000, None), (1000, 0.01), (100, None)]:
+            cells = list(RefGridCells.refineCells(self.square, 10000, finalInterval, aoiExtent, None, tolerance))
+            vertices = sum(len(cell["ring"]) for cell in cells)
+            estimate = RefGridCells.estimateGrid(aoiExtent, zones, finalInterval, tolerance)
+            self.assertEqual(estimate["zones"], 1)
+            self.assertAlmostEqual(estimate["cells"] / float(len(cells)), 1.0, delta=0.05)
+            self.assertAlmostEqual(estimate["vertices"] / float(vertices), 1.0, delta=0.05)
+            self.assertTrue(estimate["bytes"] > 0 and estimate["seconds"] > 0)
+        # one cell per grid zone the extent crosses, not those it only touches
+        estimate = RefGridCells.estimateGrid((-78.0, 32.0, -70.0, 40.0),
+                                             [(18, (-78.0, 32.0, -72.0, 40.0)), (19, (-72.0, 32.0, -66.0, 40.0)),
+                                              (17, (-84.0, 32.0, -78.0, 40.0))], 1000000)
+        self.assertEqual((estimate["zones"], estimate["cells"]), (2, 2))
+
+    def testEstimatePartialCoverage(self):
+        ''' an AOI covering part of its extent is estimated as the cells of its whole extent, which is what is built '''
+        if Configuration.DEBUG is True: print(".....RefGridCellsTestCase.testEstimatePartialCoverage")
+        zones = [(18, self.square["zoneExtent"])]
+        # diagonal triangle (-75.95, 35.3), (-75.85, 35.3), (-75.85, 35.4) covers half of its extent
+        aoiExtent = (-75.95, 35.3, -75.85, 35.4)
+        triangleArea = 0.5 * (aoiExtent[2] - aoiExtent[0]) * (aoiExtent[3] - aoiExtent[1])
+        coverage = triangleArea / ((aoiExtent[2] - aoiExtent[0]) * (aoiExtent[3] - aoiExtent[1]))
+        self.assertTrue(coverage < 1.0)
+        # Build grids the input extent polygon, which isn't known to be covered by the AOI (no inner extent)
+        cells = list(RefGridCells.refineCells(self.square, 10000, 1000, aoiExtent, None, None))
+        estimate = RefGridCells.estimateGrid(aoiExtent, zones, 1000)
+        self.assertAlmostEqual(estimate["cells"] / float(len(cells)), 1.0, delta=0.05)
+        self.assertTrue(estimate["cells"] * coverage < len(cells) * 0.95)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,102 @@
+#------------------------------------------------------------------------------
+# Copyright 2017 Esri
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#------------------------------------------------------------------------------
+
+import unittest
+import os
+import sys
+# Add parent folder to python path if running test case standalone
+sys.path.append(os.path.normpath(os.path.join(os.path.dirname(__file__), '..')))
+# Add the Gridded Reference Graphic scripts folder so RefGridCheckpoint can be imported directly
+sys.path.append(os.path.normpath(os.path.join(os.path.dirname(__file__),
+                                              r"../../../griddedreferencegraphic/scripts")))
+
+import shutil
+import tempfile
+import Configuration
+import RefGridCheckpoint
+
+class RefGridCheckpointTestCase(unittest.TestCase):
+    '''
+    Test the checkpoints of reference grid builds (without arcpy).
+    '''
+
+    def setUp(self):
+        self.folder = tempfile.mkdtemp()
+        # a build that finished two 100k squares, of 3 and 2 cells
+        self.checkpoint = RefGridCheckpoint.NewCheckpoint()
+        self.checkpoint["finished"]["18SVE"] = [1, 3]
+        RefGridCheckpoint.RecordOutput(self.checkpoint, 3, 3, "18SVE0403")
+        self.checkpoint["finished"]["18SVF"] = [4, 5]
+        RefGridCheckpoint.RecordOutput(self.checkpoint, 2, 5, "18SVF0001")
+        self.output = [(1, "18SVE0401"), (2, "18SVE0402"), (3, "18SVE0403"),
+                       (4, "18SVF0000"), (5, "18SVF0001")]
+
+    def tearDown(self):
+        shutil.rmtree(self.folder, ignore_errors=True)
+
+    def testCheckpointPath(self):
+        ''' the checkpoint of a build is named from all of its parameters '''
+        if Configuration.DEBUG is True: print(".....RefGridCheckpointTestCase.testCheckpointPath")
+        parameters = ["C:/scratch.gdb/output_grid", "MGRS", "1000M_GRID", "NO_PARTITIONS", None, '{"rings": []}']
+        path = RefGridCheckpoint.CheckpointPath(self.folder, parameters)
+        self.assertEqual(os.path.dirname(path), self.folder)
+        self.assertEqual(path, RefGridCheckpoint.CheckpointPath(self.folder, list(parameters)))
+        for index, changed in enumerate(["C:/scratch.gdb/other_grid", "USNG", "100M_GRID",
+                                         "PARTITION_BY_GRID_ZONE", 5.0, '{"rings": [[]]}']):
+            other = list(parameters)
+            other[index] = changed
+            self.assertNotEqual(path, RefGridCheckpoint.CheckpointPath(self.folder, other))
+
+    def testReadWriteCheckpoint(self):
+        ''' checkpoints are read back as written, missing or invalid files are no checkpoint '''
+        if Configuration.DEBUG is True: print(".....RefGridCheckpointTestCase.testReadWriteCheckpoint")
+        path = RefGridCheckpoint.CheckpointPath(self.folder, ["a"])
+        self.assertIsNone(RefGridCheckpoint.ReadCheckpoint(path))
+        RefGridCheckpoint.WriteCheckpoint(path, self.checkpoint)
+        self.assertEqual(RefGridCheckpoint.ReadCheckpoint(path), self.checkpoint)
+        for text in ['{"finished": {', '[1, 2]', '{"output": {}}']:
+            with open(path, "w") as checkpointFile:
+                checkpointFile.write(text)
+            self.assertIsNone(RefGridCheckpoint.ReadCheckpoint(path))
+        RefGridCheckpoint.RemoveCheckpoint(path)
+        self.assertFalse(os.path.exists(path))
+        RefGridCheckpoint.RemoveCheckpoint(path)
+
+    def testMatchesOutput(self):
+        ''' a checkpoint only matches an output with its rows, rows of the unfinished square may follow '''
+        if Configuration.DEBUG is True: print(".....RefGridCheckpointTestCase.testMatchesOutput")
+        self.assertEqual(self.checkpoint["output"], {"rows": 5, "lastOID": 5, "lastLabel": "18SVF0001"})
+        self.assertTrue(RefGridCheckpoint.MatchesOutput(self.checkpoint, self.output))
+        self.assertTrue(RefGridCheckpoint.MatchesOutput(self.checkpoint, self.output + [(6, "18SVG0000")]))
+
+    def testMismatchedOutput(self):
+        ''' overwritten, replaced or edited outputs, and checkpoints without output rows, do not match '''
+        if Configuration.DEBUG is True: print(".....RefGridCheckpointTestCase.testMismatchedOutput")
+        mismatched = [[],
+                      # rebuilt from the start, and stopped earlier
+                      self.output[0:3],
+                      # a row deleted
+                      self.output[0:2] + self.output[3:],
+                      # another grid at the same path
+                      [(oid, "19TBK" + label[5:]) for oid, label in self.output],
+                      # the same number of rows, but with other object ids
+                      [(oid + 1, label) for oid, label in self.output]]
+        for output in mismatched:
+            self.assertFalse(RefGridCheckpoint.MatchesOutput(self.checkpoint, output))
+        self.assertFalse(RefGridCheckpoint.MatchesOutput(RefGridCheckpoint.NewCheckpoint(), self.output))
+        self.assertFalse(RefGridCheckpoint.MatchesOutput({"finished": {"18SVE": [1, 3]}}, self.output))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,137 @@
+#------------------------------------------------------------------------------
+# Copyright 2017 Esri
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#------------------------------------------------------------------------------
+
+import unittest
+import os
+import sys
+# Add parent folder to python path if running test case standalone
+sys.path.append(os.path.normpath(os.path.join(os.path.dirname(__file__), '..')))
+# Add the Gridded Reference Graphic scripts folder so RefGridZones can be imported directly
+sys.path.append(os.path.normpath(os.path.join(os.path.dirname(__file__),
+                                              r"../../../griddedreferencegraphic/scripts")))
+
+import Configuration
+import RefGridZones
+
+def _ringExtent(ring):
+    xs = [x for x, y in ring]
+    ys = [y for x, y in ring]
+    return (min(xs), min(ys), max(xs), max(ys))
+
+def _segmentIntersectsBounds(start, end, bounds):
+    ''' clip the segment to the (closed) bounds, Liang-Barsky '''
+    xmin, ymin, xmax, ymax = bounds
+    (x0, y0), (x1, y1) = start, end
+    low, high = 0.0, 1.0
+    for p, q in [(x0 - x1, x0 - xmin), (x1 - x0, xmax - x0), (y0 - y1, y0 - ymin), (y1 - y0, ymax - y0)]:
+        if p == 0:
+            if q < 0:
+                return False
+        elif p < 0:
+            low = max(low, float(q) / p)
+        else:
+            high = min(high, float(q) / p)
+    return low <= high
+
+def _pointInRing(x, y, ring):
+    inside = False
+    for (x0, y0), (x1, y1) in zip(ring[:-1], ring[1:]):
+        if (y0 > y) != (y1 > y) and x < x0 + (y - y0) * (x1 - x0) / float(y1 - y0):
+            inside = not inside
+    return inside
+
+def _ringIntersectsBounds(ring, bounds):
+    '''
+    INTERSECT (touching included) of a closed polygon ring and a grid zone
+    rectangle, as the old selection of the GridZones feature class gave
+    '''
+    for start, end in zip(ring[:-1], ring[1:]):
+        if _segmentIntersectsBounds(start, end, bounds):
+            return True
+    # no edge of the ring meets the zone, the zone is inside the ring or apart from it
+    return _pointInRing(bounds[0], bounds[1], ring)
+
+class RefGridZonesTestCase(unittest.TestCase):
+    '''
+    Test the grid zone lookup of reference grids (without arcpy).
+    '''
+
+    def _findGridZones(self, rings):
+        index = RefGridZones.GridZoneIndex()
+        def intersects(position, ring):
+            return _ringIntersectsBounds(ring, index["bounds"][position].tolist())
+        positions = RefGridZones.FindGridZones(rings, _ringExtent, intersects)
+        return [index["ids"][position] for position in positions]
+
+    def _selectGridZones(self, rings):
+        ''' the zones an INTERSECT selection of all the grid zones gives '''
+        selected = []
+        for zoneNum in range(1, 61):
+            for zoneLtr in range(0, len(RefGridZones.ZONE_LETTERS)):
+                bounds = RefGridZones.ZoneExtent(zoneNum, zoneLtr)
+                if bounds and any(_ringIntersectsBounds(ring, bounds) for ring in rings):
+                    selected.append(str(zoneNum) + RefGridZones.ZONE_LETTERS[zoneLtr])
+        return selected
+
+    def _assertGridZones(self, rings, expected):
+        found = self._findGridZones(rings)
+        self.assertEqual(found, self._selectGridZones(rings))
+        self.assertEqual(sorted(found), sorted(expected))
+
+    def testGridZoneIndex(self):
+        ''' the index has every grid zone but 32X, 34X and 36X, in zone number then letter order '''
+        if Configuration.DEBUG is True: print(".....RefGridZonesTestCase.testGridZoneIndex")
+        index = RefGridZones.GridZoneIndex()
+        self.assertEqual(len(index["ids"]), 1197)
+        self.assertEqual(index["bounds"].shape, (1197, 4))
+        self.assertEqual(index["ids"][0:2], ("1C", "1D"))
+        for missing in ["32X", "34X", "36X"]:
+            self.assertNotIn(missing, index["ids"])
+        self.assertEqual(index["bounds"][index["ids"].index("18T")].tolist(), [-78, 40, -72, 48])
+        self.assertEqual(index["bounds"][index["ids"].index("1X")].tolist(), [-179.99999999, 72, -174, 84])
+
+    def testZoneAndBandBoundaries(self):
+        ''' an AOI across the 18/19 UTM zone boundary and the S/T latitude band edge '''
+        if Configuration.DEBUG is True: print(".....RefGridZonesTestCase.testZoneAndBandBoundaries")
+        aoi = [(-74, 38), (-74, 42), (-70, 42), (-70, 38), (-74, 38)]
+        self._assertGridZones([aoi], ["18S", "18T", "19S", "19T"])
+        # an L shaped AOI whose extent, but not itself, overlaps 19S
+        concave = [(-74, 38), (-74, 42), (-70, 42), (-70, 41), (-73, 41), (-73, 38), (-74, 38)]
+        self._assertGridZones([concave], ["18S", "18T", "19T"])
+        # an AOI touching the band edge and zone boundary selects the zones it touches
+        touching = [(-75, 36), (-75, 40), (-72, 40), (-72, 36), (-75, 36)]
+        self._assertGridZones([touching], ["18S", "18T", "19S", "19T"])
+        # AOIs of several features, in separate zones
+        other = [(10, -30), (10, -29), (11, -29), (11, -30), (10, -30)]
+        self._assertGridZones([concave, other], ["18S", "18T", "19T", "32J"])
+
+    def testNorwayZones(self):
+        ''' 31V is 0 to 3 east, 32V 3 to 12 east '''
+        if Configuration.DEBUG is True: print(".....RefGridZonesTestCase.testNorwayZones")
+        self._assertGridZones([[(2, 58), (2, 62), (8, 62), (8, 58), (2, 58)]], ["31V", "32V"])
+        # west Norway is in 32V, not the 31V of the standard zones
+        self._assertGridZones([[(4, 59), (4, 61), (5, 61), (5, 59), (4, 59)]], ["32V"])
+        # across the V/W band edge, where the standard zones resume
+        self._assertGridZones([[(4, 62), (4, 66), (5, 66), (5, 62), (4, 62)]], ["31W", "32V"])
+
+    def testSvalbardZones(self):
+        ''' the X band has 31X, 33X, 35X and 37X, and no 32X, 34X or 36X '''
+        if Configuration.DEBUG is True: print(".....RefGridZonesTestCase.testSvalbardZones")
+        self._assertGridZones([[(10, 75), (10, 80), (25, 80), (25, 75), (10, 75)]], ["33X", "35X"])
+        self._assertGridZones([[(5, 70), (5, 74), (11, 74), (11, 70), (5, 70)]], ["31W", "32W", "31X", "33X"])
+        self._assertGridZones([[(30, 78), (30, 79), (40, 79), (40, 78), (30, 78)]], ["35X", "37X"])
+
+if __name__ == "__main__":
+    unittest.main()
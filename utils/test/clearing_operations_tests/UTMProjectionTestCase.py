@@ -0,0 +1,70 @@
+#------------------------------------------------------------------------------
+# Copyright 2017 Esri
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#------------------------------------------------------------------------------
+
+import unittest
+import os
+import sys
+# Add parent folder to python path if running test case standalone
+sys.path.append(os.path.normpath(os.path.join(os.path.dirname(__file__), '..')))
+# Add the Gridded Reference Graphic scripts folder so RefGrid can be imported directly
+sys.path.append(os.path.normpath(os.path.join(os.path.dirname(__file__),
+                                              r"../../../griddedreferencegraphic/scripts")))
+
+import numpy
+import Configuration
+import UTMProjection
+import RefGrid
+
+class UTMProjectionTestCase(unittest.TestCase):
+    '''
+    Test the batched UTMProjection conversions against the scalar RefGrid conversions.
+    '''
+
+    def setUp(self):
+        if Configuration.DEBUG is True: print("         UTMProjectionTestCase.setUp")
+
+        # a lattice of points in every zone, both hemispheres
+        self.zones = range(1, 61)
+        self.northings = numpy.arange(-9000000.0, 9300001.0, 300000.0)
+        self.eastings = numpy.arange(200000.0, 800001.0, 50000.0)
+
+    def testUTMtoLL(self):
+        ''' batched UTM to lat/lon matches RefGrid._UTMtoLL '''
+        if Configuration.DEBUG is True: print(".....UTMProjectionTestCase.testUTMtoLL")
+        for zone in self.zones:
+            lats, lons = UTMProjection.UTMtoLL(self.northings[:, None],
+                                               self.eastings[None, :],
+                                               zone)
+            for i, n in enumerate(self.northings):
+                for j, e in enumerate(self.eastings):
+                    expected = RefGrid._UTMtoLL(n, e, zone)
+                    self.assertAlmostEqual(expected['lat'], lats[i][j], places=9)
+                    self.assertAlmostEqual(expected['lon'], lons[i][j], places=9)
+
+    def testLLtoUTM(self):
+        ''' batched lat/lon to UTM matches RefGrid._LLtoUTM '''
+        if Configuration.DEBUG is True: print(".....UTMProjectionTestCase.testLLtoUTM")
+        lats = numpy.arange(-80.0, 84.1, 4.0)
+        for zone in self.zones:
+            lons = numpy.linspace((zone - 1) * 6 - 180, zone * 6 - 180, 7)
+            eastings, northings = UTMProjection.LLtoUTM(lats[:, None], lons[None, :], zone)
+            for i, lat in enumerate(lats):
+                for j, lon in enumerate(lons):
+                    expected = RefGrid._LLtoUTM(lat, lon, zone, "")
+                    self.assertAlmostEqual(expected[0], eastings[i][j], places=5)
+                    self.assertAlmostEqual(expected[1], northings[i][j], places=5)
+
+if __name__ == "__main__":
+    unittest.main()
@@ -19,6 +19,8 @@ import logging
 import Configuration
 
 from . import GeoNamesTestCase
+from . import GeonamesParserTestCase
+from . import GeonamesUtilitiesTestCase
 
 ''' Test suite for all tools in the Sun Position Analysis Tools toolbox '''
     
@@ -34,6 +36,8 @@ def getTestSuite():
     loader = unittest.TestLoader()
 
     testSuite.addTest(loader.loadTestsFromTestCase(GeoNamesTestCase.GeoNamesTestCase))
+    testSuite.addTest(loader.loadTestsFromTestCase(GeonamesParserTestCase.GeonamesParserTestCase))
+    testSuite.addTest(loader.loadTestsFromTestCase(GeonamesUtilitiesTestCase.GeonamesUtilitiesTestCase))
 
     return testSuite
     
\ No newline at end of file
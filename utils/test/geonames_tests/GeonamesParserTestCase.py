@@ -0,0 +1,239 @@
+#------------------------------------------------------------------------------
+# Copyright 2017 Esri
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#------------------------------------------------------------------------------
+
+import unittest
+import os
+import sys
+# Add parent folder to python path if running test case standalone
+sys.path.append(os.path.normpath(os.path.join(os.path.dirname(__file__), '..')))
+# Add the Geonames scripts folder so GeonamesParser can be imported directly
+sys.path.append(os.path.normpath(os.path.join(os.path.dirname(__file__),
+                                              r"../../../geonames/scripts")))
+
+import shutil
+import tempfile
+from datetime import datetime
+import Configuration
+import GeonamesParser
+
+HEADER = "RC\tUFI\tUNI\tLAT\tLONG\tDSG\tCC1\tADM1\tPOP\tFULL_NAME_ND_RO\tMODIFY_DATE\tNM_MODIFY_DATE\n"
+
+TARGET_FIELDS = [("OBJECTID", "OID"), ("Shape", "Geometry"), ("RC", "SmallInteger"),
+                 ("UFI", "Integer"), ("UNI", "Integer"), ("DSG", "String"), ("CC1", "String"), ("ADM1", "String"),
+                 ("POP", "Integer"), ("FULL_NAME_ND_RO", "String"), ("MODIFY_DATE", "Date"),
+                 ("NM_MODIFY_DATE", "Date"),
+                 ("COUNTRYCODE1", "String"), ("COUNTRYNAME1", "String"), ("ADM1CODE", "String"),
+                 ("ADM1NAME", "String"), ("ADM1CLASS", "String"), ("USER_FLD", "String"),
+                 ("DSGNAME", "String"), ("PLACENAME", "String")]
+
+class GeonamesParserTestCase(unittest.TestCase):
+    '''
+    Test the parsing of geonames file lines (without arcpy).
+    '''
+
+    def setUp(self):
+        self.codeTables = GeonamesParser.DeriveCodeTables({"MN": "Monaco", "FR": "France"},
+                                                          {"MN00": ("Monaco [conventional] / Monaco [French]",
+                                                                    "Principality / Principaute (first-order)"),
+                                                           "FR11": ("Ile-de-France", None),
+                                                           "FR12": (None, None)},
+                                                          {"PPL": "populated place"})
+        self.plan = GeonamesParser.LoadPlan(GeonamesParser.ReadHeader(HEADER), TARGET_FIELDS, self.codeTables)
+
+    def value(self, row, field):
+        return row[self.plan.fields.index(field)]
+
+    def testAdminNameAndClass(self):
+        ''' first name and assembled class of primary admin divisions '''
+        if Configuration.DEBUG is True: print(".....GeonamesParserTestCase.testAdminNameAndClass")
+        self.assertEqual(GeonamesParser.AdminName("Brussels-Capital Region [conventional] / Bruxelles-Capitale [French]"),
+                         "Brussels-Capital Region")
+        self.assertEqual(GeonamesParser.AdminClass("Province / Provincia (first-order)"), "Province (first-order)")
+        self.assertEqual(GeonamesParser.AdminClass("Region / Region"), "Region")
+
+    def testCodeTablesCache(self):
+        ''' derived admin records, and cached code tables are only used for the same state of the tables '''
+        if Configuration.DEBUG is True: print(".....GeonamesParserTestCase.testCodeTablesCache")
+        self.assertEqual(self.codeTables.admin1["MN00"],
+                         ("Monaco [conventional] / Monaco [French]", "Monaco",
+                          "Principality / Principaute (first-order)", "Principality (first-order)",
+                          "Primary Admin Division: Monaco [Principality (first-order)]"))
+        self.assertEqual(self.codeTables.admin1["FR11"], ("Ile-de-France", "Ile-de-France", None, None, None))
+        self.assertFalse("FR12" in self.codeTables.admin1)
+        folder = tempfile.mkdtemp()
+        path = os.path.join(folder, "codes.json")
+        try:
+            self.assertEqual(GeonamesParser.ReadCodeTablesCache(path, ["state"]), None)
+            # files that are not code table caches are not read
+            for text in ["\x80\x02}q\x00.", "[1, 2]", '{"version": 2}']:
+                with open(path, "w") as cacheFile:
+                    cacheFile.write(text)
+                self.assertEqual(GeonamesParser.ReadCodeTablesCache(path, ["state"]), None)
+            state = [["C:/codes.gdb/cc", 3, 10, 4096, 1500000000.25]]
+            GeonamesParser.WriteCodeTablesCache(path, state, self.codeTables)
+            cached = GeonamesParser.ReadCodeTablesCache(path, state)
+            self.assertEqual((cached.countries, cached.admin1, cached.features),
+                             (self.codeTables.countries, self.codeTables.admin1, self.codeTables.features))
+            self.assertEqual(GeonamesParser.ReadCodeTablesCache(path, ["changed state"]), None)
+        finally:
+            shutil.rmtree(folder)
+
+    def testPlanFields(self):
+        ''' cursor fields are the loaded columns, then the derived fields, then the shape '''
+        if Configuration.DEBUG is True: print(".....GeonamesParserTestCase.testPlanFields")
+        self.assertEqual(self.plan.fields,
+                         ["RC", "UFI", "UNI", "DSG", "CC1", "ADM1", "POP", "FULL_NAME_ND_RO", "MODIFY_DATE", "NM_MODIFY_DATE",
+                          "COUNTRYCODE1", "COUNTRYNAME1", "ADM1CODE", "ADM1NAME", "ADM1CLASS",
+                          "USER_FLD", "DSGNAME", "PLACENAME", "SHAPE@XY"])
+        self.assertEqual(self.plan.extraFields, ["LAT", "LONG"])
+
+    def testRow(self):
+        ''' converted columns, code table lookups and shape of a line '''
+        if Configuration.DEBUG is True: print(".....GeonamesParserTestCase.testRow")
+        row = self.plan.Row("1\t-7\t-8\t43.73\t7.42\tPPL\tMN,FR\t00\t\tMonaco\t2014-05-13\t2014-05-14\n")
+        self.assertEqual(len(row), len(self.plan.fields))
+        self.assertEqual(self.value(row, "RC"), 1)
+        self.assertEqual(self.value(row, "UFI"), -7)
+        self.assertEqual(self.value(row, "POP"), None)
+        self.assertEqual(self.value(row, "MODIFY_DATE"), datetime(2014, 5, 13))
+        self.assertEqual(self.value(row, "COUNTRYCODE1"), "MN")
+        self.assertEqual(self.value(row, "COUNTRYNAME1"), "Monaco")
+        self.assertEqual(self.value(row, "ADM1CODE"), "MN00")
+        self.assertEqual(self.value(row, "ADM1NAME"), "Monaco")
+        self.assertEqual(self.value(row, "ADM1CLASS"), "Principality (first-order)")
+        self.assertEqual(self.value(row, "USER_FLD"), "Primary Admin Division: Monaco [Principality (first-order)]")
+        self.assertEqual(self.value(row, "DSGNAME"), "populated place")
+        self.assertEqual(self.value(row, "PLACENAME"), "Monaco")
+        self.assertEqual(row[-1], (7.42, 43.73))
+
+    def testRowWarnings(self):
+        ''' values that can't be converted are null, with a warning '''
+        if Configuration.DEBUG is True: print(".....GeonamesParserTestCase.testRowWarnings")
+        warnings = []
+        row = self.plan.Row("1\t8\t9\t1.5\t2.5\tXXX\tFR\t99\tmany\t\t\t\n", 12, warnings)
+        self.assertEqual(self.value(row, "POP"), None)
+        self.assertEqual(len(warnings), 1)
+        self.assertTrue("POP" in warnings[0] and "12" in warnings[0])
+        self.assertEqual(self.value(row, "ADM1CODE"), "FR99")
+        self.assertEqual(self.value(row, "ADM1NAME"), None)
+        self.assertEqual(self.value(row, "DSGNAME"), None)
+        self.assertEqual(self.value(row, "PLACENAME"), "")
+        self.assertEqual(self.plan.Row("1\t8\t9\t\t2.5\tPPL\t\t\t\tX\t\t\n")[-1], None)
+
+    def testFileChunks(self):
+        ''' chunks of a file are whole lines, with their byte offsets and first line numbers '''
+        if Configuration.DEBUG is True: print(".....GeonamesParserTestCase.testFileChunks")
+        lines = ["1\t{0}\t{0}\t1.5\t2.5\tPPL\tMN\t00\t\tP{0}\t\t".format(i) for i in range(0, 7)]
+        handle, path = tempfile.mkstemp(suffix=".txt")
+        try:
+            with os.fdopen(handle, "wb") as geonameFile:
+                # Windows line endings, and no newline at the end of the file
+                geonameFile.write("\r\n".join([HEADER.rstrip("\n")] + lines).encode("utf-8"))
+            with GeonamesParser.GeonameFile(path) as geonameFile:
+                self.assertEqual(geonameFile.header, GeonamesParser.ReadHeader(HEADER))
+                self.assertEqual(geonameFile.dataOffset, len(HEADER) + 1)
+                chunks = list(geonameFile.Chunks(geonameFile.dataOffset, 2, 60))
+        finally:
+            os.remove(path)
+        self.assertEqual(chunks[0][0], len(HEADER) + 1)
+        self.assertEqual(chunks[-1][1], len(HEADER) + 1 + sum(len(line) + 2 for line in lines) - 2)
+        for (offset, end, firstLineNumber, data), following in zip(chunks, chunks[1:]):
+            self.assertEqual(end, following[0])
+            self.assertTrue(data.endswith(b"\n"))
+            self.assertEqual(firstLineNumber + data.count(b"\n"), following[2])
+        GeonamesParser.InitWorker(self.plan)
+        rows = [row for chunk in chunks for row in GeonamesParser.ParseChunk((chunk[2], chunk[3]))]
+        self.assertEqual(rows, list(GeonamesParser.ParseLines(self.plan, [line + "\n" for line in lines], 2)))
+        self.assertEqual([lineNumber for lineNumber, values, warnings, key in rows], list(range(2, 9)))
+        self.assertEqual([self.value(values, "PLACENAME") for lineNumber, values, warnings, key in rows],
+                         ["P{0}".format(i) for i in range(0, 7)])
+
+    def testDelta(self):
+        ''' names are inserted, updated, left or deleted by UFI, UNI and modify dates '''
+        if Configuration.DEBUG is True: print(".....GeonamesParserTestCase.testDelta")
+        existing = [(1, 10, 100, datetime(2014, 5, 13), datetime(2014, 5, 13), "MN"),
+                    (2, 10, 101, datetime(2014, 5, 13), datetime(2014, 5, 13), "MN"),
+                    (3, 11, 102, datetime(2014, 5, 13), None, "MN"),
+                    (4, 12, 103, datetime(2014, 5, 13), None, "FR")]
+        delta = GeonamesParser.Delta(self.plan, existing)
+        compare = lambda line: delta.Compare(self.plan.Row(line))
+        self.assertEqual(compare("1\t10\t100\t1\t2\tPPL\tMN\t00\t\tA\t2014-05-13\t2014-05-13\n"),
+                         (GeonamesParser.UNCHANGED, 1))
+        self.assertEqual(compare("1\t11\t102\t1\t2\tPPL\tMN\t00\t\tB\t2014-05-13\t2016-01-01\n"),
+                         (GeonamesParser.UPDATE, 3))
+        self.assertEqual(compare("1\t13\t104\t1\t2\tPPL\tMN\t00\t\tC\t2016-01-01\t\n"),
+                         (GeonamesParser.INSERT, None))
+        # names repeated in the file are only inserted or updated once
+        self.assertEqual(compare("1\t11\t102\t1\t2\tPPL\tMN\t00\t\tB\t2014-05-13\t2016-01-01\n"),
+                         (GeonamesParser.UNCHANGED, 3))
+        self.assertEqual(compare("1\t13\t104\t1\t2\tPPL\tMN\t00\t\tC\t2016-01-01\t\n"),
+                         (GeonamesParser.UNCHANGED, None))
+        # only the names of the countries in the file are deleted
+        self.assertEqual(delta.Deletes(), [2])
+
+    def testDeltaUnparsedLine(self):
+        ''' the name of a line that can't be parsed is kept, not deleted '''
+        if Configuration.DEBUG is True: print(".....GeonamesParserTestCase.testDeltaUnparsedLine")
+        existing = [(1, 10, 100, datetime(2014, 5, 13), None, "MN"),
+                    (2, 11, 101, datetime(2014, 5, 13), None, "MN")]
+        delta = GeonamesParser.Delta(self.plan, existing)
+        lines = ["1\t10\t100\t1\t2\tPPL\tMN\t00\t\tA\t2016-01-01\t\n",
+                 "1\t11\t101\tnorth\t2\tPPL\tMN\t00\t\tB\t2016-01-01\t\n"]
+        rows = list(GeonamesParser.ParseLines(self.plan, lines, 2))
+        self.assertEqual([(values is None, key) for lineNumber, values, warnings, key in rows],
+                         [(False, None), (True, (11, 101))])
+        self.assertEqual(delta.Compare(rows[0][1]), (GeonamesParser.UPDATE, 1))
+        delta.Keep(rows[1][3])
+        self.assertEqual(delta.Deletes(), [])
+        # without a readable key, no names are deleted
+        delta = GeonamesParser.Delta(self.plan, existing)
+        self.assertEqual(self.plan.Key("1\tx\t101\tnorth\t2\tPPL\tMN\t00\t\tB\t\t\n"), None)
+        delta.Compare(rows[0][1])
+        delta.Keep(None)
+        self.assertEqual(delta.Deletes(), [])
+
+    def testDeltaDuplicates(self):
+        ''' the first copy of a name loaded more than once is updated, the other copies deleted '''
+        if Configuration.DEBUG is True: print(".....GeonamesParserTestCase.testDeltaDuplicates")
+        existing = [(1, 10, 100, datetime(2014, 5, 13), None, "MN"),
+                    (2, 10, 100, datetime(2014, 5, 13), None, "MN"),
+                    (3, 11, 101, datetime(2014, 5, 13), None, "MN"),
+                    (4, 11, 101, datetime(2014, 5, 13), None, "MN"),
+                    (5, 12, 102, datetime(2014, 5, 13), None, "MN")]
+        delta = GeonamesParser.Delta(self.plan, existing)
+        self.assertEqual(delta.Compare(self.plan.Row("1\t10\t100\t1\t2\tPPL\tMN\t00\t\tA\t2016-01-01\t\n")),
+                         (GeonamesParser.UPDATE, 1))
+        self.assertEqual(delta.Compare(self.plan.Row("1\t12\t102\t1\t2\tPPL\tMN\t00\t\tC\t2014-05-13\t\n")),
+                         (GeonamesParser.UNCHANGED, 5))
+        self.assertEqual(delta.duplicates, [2])
+        # both copies of a name no longer in the file are deleted
+        self.assertEqual(delta.Deletes(), [2, 3, 4])
+
+    def testDeltaWithoutCountry(self):
+        ''' without a COUNTRYCODE1 field, names not in the file are deleted in all countries '''
+        if Configuration.DEBUG is True: print(".....GeonamesParserTestCase.testDeltaWithoutCountry")
+        plan = GeonamesParser.LoadPlan(GeonamesParser.ReadHeader(HEADER),
+                                       [field for field in TARGET_FIELDS if field[0] != "COUNTRYCODE1"],
+                                       self.codeTables)
+        self.assertEqual(GeonamesParser.Delta.IndexFields(plan), ["OID@", "UFI", "UNI", "MODIFY_DATE", "NM_MODIFY_DATE"])
+        self.assertEqual(GeonamesParser.Delta.IndexFields(self.plan)[-1], "COUNTRYCODE1")
+        delta = GeonamesParser.Delta(plan, [(1, 10, 100, datetime(2014, 5, 13), None),
+                                            (4, 12, 103, datetime(2014, 5, 13), None)])
+        self.assertEqual(delta.Compare(plan.Row("1\t10\t100\t1\t2\tPPL\tMN\t00\t\tA\t2014-05-13\t\n")),
+                         (GeonamesParser.UNCHANGED, 1))
+        self.assertEqual(delta.Deletes(), [4])
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,61 @@
+#------------------------------------------------------------------------------
+# Copyright 2017 Esri
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#   http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+#------------------------------------------------------------------------------
+
+import unittest
+import os
+import sys
+# Add parent folder to python path if running test case standalone
+sys.path.append(os.path.normpath(os.path.join(os.path.dirname(__file__), '..')))
+# Add the Geonames scripts folder so GeonamesUtilities can be imported directly
+sys.path.append(os.path.normpath(os.path.join(os.path.dirname(__file__),
+                                              r"../../../geonames/scripts")))
+
+import ast
+import multiprocessing
+import Configuration
+import GeonamesUtilities
+
+class GeonamesUtilitiesTestCase(unittest.TestCase):
+    '''
+    Test the process pool helpers of the Geonames tools (without arcpy).
+    '''
+
+    def testProcessCount(self):
+        ''' processes for Parallel Processing Factor values '''
+        if Configuration.DEBUG is True: print(".....GeonamesUtilitiesTestCase.testProcessCount")
+        self.assertEqual(GeonamesUtilities.ProcessCount(None), 1)
+        self.assertEqual(GeonamesUtilities.ProcessCount(""), 1)
+        self.assertEqual(GeonamesUtilities.ProcessCount("4"), 4)
+        self.assertEqual(GeonamesUtilities.ProcessCount("0"), 1)
+        self.assertEqual(GeonamesUtilities.ProcessCount("100%"), multiprocessing.cpu_count())
+        self.assertEqual(GeonamesUtilities.ProcessCount("many"), 1)
+
+    def testMatchesGRGUtilities(self):
+        ''' the helpers are the same as those of the Gridded Reference Graphic Utilities '''
+        if Configuration.DEBUG is True: print(".....GeonamesUtilitiesTestCase.testMatchesGRGUtilities")
+        scripts = os.path.join(os.path.dirname(__file__), r"../../..")
+        functions = []
+        for path in ["geonames/scripts/GeonamesUtilities.py", "griddedreferencegraphic/scripts/Utilities.py"]:
+            with open(os.path.normpath(os.path.join(scripts, path))) as script:
+                tree = ast.parse(script.read())
+            # the code of the functions, without their docstrings
+            functions.append(dict((node.name, ast.dump(ast.Module(body=node.body[1:]))) for node in tree.body
+                                  if isinstance(node, ast.FunctionDef) and
+                                  node.name in ["ProcessCount", "SetPoolExecutable"]))
+        self.assertEqual(sorted(functions[0]), ["ProcessCount", "SetPoolExecutable"])
+        self.assertEqual(functions[0], functions[1])
+
+if __name__ == "__main__":
+    unittest.main()